@@ -0,0 +1,276 @@
+"""
+Módulo de Comparação de Motores de ASR
+Este módulo fornece funcionalidades para medir, em um conjunto local fixo de
+gravações reais, o fator de tempo real (RTF) e a taxa de erro de palavras (WER)
+de cada motor de ASR (ver man_aud.elabs.motores_asr) e indicar o mais rápido
+que atende ao limite de WER.
+
+O conjunto é uma pasta com pares nome.wav (mono, 16 bits, 16 kHz) e nome.txt
+(transcrição de referência em português). As gravações não vêm com o projeto;
+cada máquina usa o seu conjunto, sempre o mesmo entre comparações.
+
+Uso:
+    python -m benchmarks.asr --conjunto ~/conjunto_asr
+    python -m benchmarks.asr --motores vosk whisper:small whisper:base --threads 2
+    python -m benchmarks.asr --quadros 2000 4000 8000 --saida asr.json
+
+O RTF é o tempo de decodificação dividido pela duração do áudio, em um único
+worker (o pool divide os núcleos entre workers); o carregamento do modelo é
+medido à parte.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import unicodedata
+import wave
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from man_aud.elabs.motores_asr import MOTORES, QUADROS_POR_BLOCO, configuracao_asr, criar_motor
+from man_aud.elabs.transcribe import _transcrever_arquivo
+
+
+CONJUNTO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "conjunto_asr")
+WER_MAXIMO_PADRAO = 0.35
+
+
+def carregar_conjunto(pasta):
+    """
+    Lista os pares (áudio, referência) do conjunto de teste.
+
+    Args:
+        pasta (str): Pasta com nome.wav e nome.txt
+
+    Returns:
+        list: Tuplas (caminho do WAV, texto de referência, duração em s), por nome
+
+    Raises:
+        FileNotFoundError: Se a pasta não existir ou não tiver nenhum par completo
+    """
+    if not os.path.isdir(pasta):
+        raise FileNotFoundError(f"Conjunto de teste não encontrado em {pasta}")
+
+    itens = []
+    for nome in sorted(os.listdir(pasta)):
+        base, ext = os.path.splitext(nome)
+        referencia = os.path.join(pasta, base + ".txt")
+        if ext.lower() != ".wav" or not os.path.exists(referencia):
+            continue
+        with open(referencia, "r", encoding="utf-8") as f:
+            texto = f.read()
+        with wave.open(os.path.join(pasta, nome), "rb") as wf:
+            duracao = wf.getnframes() / wf.getframerate()
+        itens.append((os.path.join(pasta, nome), texto, duracao))
+
+    if not itens:
+        raise FileNotFoundError(f"Nenhum par nome.wav/nome.txt em {pasta}")
+    return itens
+
+
+def avaliar_motor(config, conjunto, repeticoes=1):
+    """
+    Carrega o motor e transcreve o conjunto, medindo tempo e erros.
+
+    Args:
+        config (ConfigASR): Motor, modelo, quadros por bloco e threads
+        conjunto (list): Saída de carregar_conjunto
+        repeticoes (int): Passadas cronometradas (vale a mediana)
+
+    Returns:
+        dict: {'carga_s', 'decodificacao_s', 'audio_s', 'rtf', 'wer', 'palavras'}
+    """
+    inicio = time.perf_counter()
+    motor = criar_motor(config)
+    carga = time.perf_counter() - inicio
+
+    # Uma passada de aquecimento, que também fornece as hipóteses para o WER
+    hipoteses = [_texto(_transcrever_arquivo(caminho, motor)) for caminho, _, _ in conjunto]
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for caminho, _, _ in conjunto:
+            _transcrever_arquivo(caminho, motor)
+        tempos.append(time.perf_counter() - inicio)
+
+    erros = 0
+    palavras = 0
+    for hipotese, (_, referencia, _) in zip(hipoteses, conjunto):
+        ref = normalizar(referencia)
+        erros += distancia_palavras(ref, normalizar(hipotese))
+        palavras += len(ref)
+
+    decodificacao = statistics.median(tempos)
+    audio = sum(duracao for _, _, duracao in conjunto)
+    return {
+        "carga_s": round(carga, 3),
+        "decodificacao_s": round(decodificacao, 3),
+        "audio_s": round(audio, 3),
+        "rtf": round(decodificacao / audio, 4),
+        "wer": round(erros / max(1, palavras), 4),
+        "palavras": palavras,
+    }
+
+
+def normalizar(texto):
+    """
+    Reduz um texto a palavras comparáveis: minúsculas, sem pontuação e com os
+    acentos preservados (o modelo de português os produz).
+
+    Args:
+        texto (str): Texto livre
+
+    Returns:
+        list: Palavras
+    """
+    texto = unicodedata.normalize("NFC", texto.lower())
+    return re.sub(r"[^\w\s]", " ", texto).split()
+
+
+def distancia_palavras(referencia, hipotese):
+    """
+    Distância de Levenshtein em palavras (substituições, inserções e remoções).
+
+    Args:
+        referencia (list): Palavras de referência
+        hipotese (list): Palavras reconhecidas
+
+    Returns:
+        int: Número de erros
+    """
+    anterior = list(range(len(hipotese) + 1))
+    for i, palavra_ref in enumerate(referencia, start=1):
+        atual = [i]
+        for j, palavra_hip in enumerate(hipotese, start=1):
+            atual.append(min(anterior[j] + 1, atual[j - 1] + 1,
+                             anterior[j - 1] + (palavra_ref != palavra_hip)))
+        anterior = atual
+    return anterior[-1]
+
+
+def recomendar(resultados, wer_maximo):
+    """
+    Escolhe o motor de menor RTF entre os que atendem ao limite de WER.
+
+    Args:
+        resultados (dict): Rótulo -> resultado de avaliar_motor (ou {'erro'})
+        wer_maximo (float): WER máximo aceito
+
+    Returns:
+        str: Rótulo escolhido, ou None se nenhum atender
+    """
+    aceitos = [(r["rtf"], rotulo) for rotulo, r in resultados.items()
+               if "rtf" in r and r["wer"] <= wer_maximo]
+    return min(aceitos)[1] if aceitos else None
+
+
+def _texto(resultados):
+    """
+    Junta os textos dos resultados JSON de um recorte.
+
+    Args:
+        resultados (list): Resultados do motor (ou ['Formato inválido'])
+
+    Returns:
+        str: Transcrição do recorte
+    """
+    textos = []
+    for resultado in resultados:
+        try:
+            textos.append(json.loads(resultado).get("text", ""))
+        except json.JSONDecodeError:
+            continue
+    return " ".join(t for t in textos if t)
+
+
+def _configuracoes(motores, quadros, threads):
+    """
+    Expande as combinações pedidas em configurações rotuladas.
+
+    Args:
+        motores (list): Itens 'motor' ou 'motor:modelo'
+        quadros (list): Quadros por bloco a testar
+        threads (int): Threads por motor
+
+    Returns:
+        list: Tuplas (rótulo, ConfigASR)
+
+    Raises:
+        ValueError: Se algum motor não existir
+    """
+    configuracoes = []
+    for item in motores:
+        motor, _, modelo = item.partition(":")
+        motor = motor.strip().lower()
+        if motor not in MOTORES:
+            raise ValueError(f"Motor de ASR desconhecido: {motor} (use {', '.join(MOTORES)})")
+        # Sem modelo explícito vale o padrão do motor, não POLIGLOTA_ASR_MODELO
+        base = configuracao_asr(motor, modelo or MOTORES[motor][1])
+        for q in quadros:
+            rotulo = item if len(quadros) == 1 else f"{item}/q{q}"
+            configuracoes.append((rotulo, base._replace(quadros=q, threads=threads)))
+    return configuracoes
+
+
+def main():
+    """
+    Avalia os motores pedidos e sai com código 1 se nenhum atender ao limite de WER.
+    """
+    parser = argparse.ArgumentParser(description="Comparação de motores de ASR (RTF e WER)")
+    parser.add_argument("--conjunto", default=CONJUNTO_PADRAO,
+                        help="Pasta com pares nome.wav/nome.txt")
+    parser.add_argument("--motores", nargs="+", default=list(MOTORES),
+                        help="Motores a comparar, como 'vosk' ou 'whisper:small'")
+    parser.add_argument("--quadros", nargs="+", type=int, default=[QUADROS_POR_BLOCO],
+                        help="Quadros por bloco enviados ao reconhecedor")
+    parser.add_argument("--threads", type=int, default=1, help="Threads por motor")
+    parser.add_argument("--wer-maximo", type=float, default=WER_MAXIMO_PADRAO,
+                        help="WER máximo para recomendar um motor")
+    parser.add_argument("-r", "--repeticoes", type=int, default=1,
+                        help="Passadas cronometradas por motor")
+    parser.add_argument("--saida", help="Grava os resultados em JSON")
+    args = parser.parse_args()
+
+    try:
+        configuracoes = _configuracoes(args.motores, args.quadros, args.threads)
+        conjunto = carregar_conjunto(args.conjunto)
+    except ValueError as e:
+        print(e)
+        sys.exit(2)
+    except FileNotFoundError as e:
+        print(f"{e}. Informe o conjunto com --conjunto.")
+        sys.exit(2)
+    print(f"Conjunto: {len(conjunto)} gravações, {sum(d for _, _, d in conjunto):.1f}s de áudio")
+
+    resultados = {}
+    for rotulo, config in configuracoes:
+        try:
+            resultados[rotulo] = avaliar_motor(config, conjunto, args.repeticoes)
+        except Exception as e:
+            resultados[rotulo] = {"erro": str(e)}
+            print(f"  {rotulo:<24} erro: {e}")
+            continue
+        r = resultados[rotulo]
+        print(f"  {rotulo:<24} rtf={r['rtf']:<8} wer={r['wer']:<8} carga={r['carga_s']}s")
+
+    escolhido = recomendar(resultados, args.wer_maximo)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"wer_maximo": args.wer_maximo, "recomendado": escolhido, "motores": resultados},
+                      f, ensure_ascii=False, indent=2)
+
+    if escolhido is None:
+        print(f"Nenhum motor atende a WER <= {args.wer_maximo}.")
+        sys.exit(1)
+    print(f"Recomendado: {escolhido} (POLIGLOTA_ASR_MOTOR / POLIGLOTA_ASR_MODELO)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""
+Módulo de Execução dos Benchmarks
+Este módulo fornece funcionalidades para cronometrar os caminhos críticos do
+pipeline sobre fixtures sintéticas (ver benchmarks.fixtures), comparar os tempos
+com uma baseline em JSON e falhar quando algum caso ficar mais lento que o limite.
+
+Uso:
+    python -m benchmarks.executar                       # compara com a baseline
+    python -m benchmarks.executar --salvar-baseline     # grava a baseline atual
+    python -m benchmarks.executar --tamanhos curto -r 5 --saida resultado.json --sem-comparar
+
+A baseline depende da máquina e não vem com o projeto: sem ela, a comparação
+falha (código 2) em vez de passar sem comparar nada.
+
+Tradução e TTS usam backends simulados (sem rede). O ASR usa o motor configurado
+(POLIGLOTA_ASR_MOTOR) e só roda se o modelo estiver instalado, e o mux só roda
+se houver ffmpeg; do contrário, os casos aparecem como pulados. A comparação de
+motores de ASR em áudio real fica em benchmarks.asr.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from benchmarks import fixtures
+from main import Shortstranslate
+from man_aud.elabs.motores_asr import criar_motor
+from utils.intervals import detectar_intervalos_fala
+from utils.manifesto import Manifesto
+from utils.modulos import carregar_modulo
+
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Folga permitida sobre a mediana da baseline antes de acusar regressão
+TOLERANCIA_PADRAO = 0.25
+TOLERANCIAS = {
+    # Dominados por E/S de disco, variam mais entre execuções
+    "recorte": 0.40,
+    "mux": 0.40,
+    "mux_mp4": 0.40,
+}
+
+FRASES_SIMULADAS = [
+    "hello and welcome back to the channel",
+    "today we are looking at something new",
+    "this is the part everybody asks about",
+    "thanks for watching and see you soon",
+]
+
+
+class CasoPulado(Exception):
+    """
+    O caso não pode rodar neste ambiente (ex.: sem modelo Vosk ou ffmpeg).
+    """
+
+
+def bench_intervalos(job, fixture, repeticoes):
+    """
+    Detecção de intervalos de fala no WAV de 16 kHz.
+    """
+    tempos = _cronometrar(lambda: detectar_intervalos_fala(fixture["vosk"], **job.parametros_vad),
+                          repeticoes)
+    return {"tempos": tempos, "audio_s": fixture["duracao"]}
+
+
+def bench_recorte(job, fixture, repeticoes):
+    """
+    Recorte do áudio em um WAV por intervalo (modo por etapas).
+    """
+    man_aud = job._modulo_man_aud()
+    tempos = _cronometrar(
+        lambda: man_aud.exportar_recortes(fixture["vosk"], fixture["manifesto"]),
+        repeticoes,
+    )
+    return {"tempos": tempos, "trechos": len(fixture["intervalos"])}
+
+
+def bench_asr(job, fixture, repeticoes):
+    """
+    Vazão do _transcrever_arquivo sobre os recortes com o motor de ASR configurado,
+    com fator de tempo real (RTF).
+    """
+    man_aud = job._modulo_man_aud()
+    transcribe = man_aud._carregar_elabs("transcribe")
+    if job.config_asr.motor == "vosk" and not os.path.isdir(job.config_asr.modelo):
+        raise CasoPulado(f"modelo Vosk não encontrado em {job.config_asr.modelo}")
+    try:
+        motor = criar_motor(job.config_asr)
+    except ImportError as e:
+        raise CasoPulado(f"motor {job.config_asr.motor} indisponível: {e}")
+    pasta = man_aud.exportar_recortes(fixture["vosk"], fixture["manifesto"])
+    recortes = [os.path.join(pasta, n) for n in Manifesto.carregar(fixture["manifesto"]).nomes()]
+    audio_s = sum(_duracao(r) for r in recortes)
+
+    tempos = _cronometrar(lambda: [transcribe._transcrever_arquivo(r, motor) for r in recortes],
+                          repeticoes)
+    return {"tempos": tempos, "audio_s": round(audio_s, 3),
+            "rtf": round(statistics.median(tempos) / audio_s, 4)}
+
+
+def bench_traducao_tts(job, fixture, repeticoes):
+    """
+    Tradução e TTS de todos os trechos com backends simulados, medindo a
+    sobrecarga de deduplicação, lotes, pool de conexões e cache em disco.
+    """
+    man_aud = job._modulo_man_aud()
+    traduct = man_aud._carregar_elabs("traduct")
+    labs = man_aud._carregar_elabs("labs")
+
+    class ClienteSimulado(labs.ClienteTTS):
+        def _baixar(self, texto, voice_id, modelo, formato, caminho_cache):
+            os.makedirs(os.path.dirname(caminho_cache), exist_ok=True)
+            sinal = fixtures.sinal_fala([{"start": 0.0, "end": 1.0}], 1.0, 22050, len(texto))
+            fixtures.escrever_pcm16(caminho_cache, sinal[:, None], 22050)
+
+    textos = [[FRASES_SIMULADAS[i % len(FRASES_SIMULADAS)], f"segment number {i}"]
+              for i in range(len(fixture["intervalos"]))]
+    pasta = tempfile.mkdtemp(prefix="tts_", dir=fixture["workspace"])
+
+    def executar():
+        # Cache vazio a cada repetição, para medir a síntese e não só a cópia
+        pasta_cache = tempfile.mkdtemp(prefix="cache_", dir=pasta)
+        tradutor = traduct.Tradutor(traduct.BackendStub())
+        cliente = ClienteSimulado("simulado", pasta_cache=pasta_cache)
+        try:
+            for idx, frases in enumerate(textos, start=1):
+                traduzidas = tradutor.traduzir(frases)
+                labs.sintetizar_textos(traduzidas, os.path.join(pasta, f"recorte_{idx}.wav"),
+                                       job.voice_id, cliente=cliente)
+        finally:
+            cliente.fechar()
+
+    return {"tempos": _cronometrar(executar, repeticoes), "trechos": len(textos)}
+
+
+def bench_separacao(job, fixture, repeticoes):
+    """
+    Separação de voz e ambiente sobre o master (separar_ambiente), com fator de
+    tempo real (RTF) e pico de memória, que deve ficar estável entre os tamanhos.
+    """
+    separacao = carregar_modulo("separacao")
+    os.makedirs(job.man_vid_dir, exist_ok=True)
+    # Fora de ambiente.wav, para não mudar a base dos casos de colagem e mux
+    saida = os.path.join(job.man_vid_dir, "ambiente_bench.wav")
+
+    def separar():
+        separacao.separar_ambiente(fixture["master"], saida, fixture["intervalos"])
+
+    tempos = _cronometrar(separar, repeticoes)
+    return {"tempos": tempos, "audio_s": fixture["duracao"],
+            "rtf": round(statistics.median(tempos) / fixture["duracao"], 4),
+            "pico_mb": _pico_memoria_mb(separar)}
+
+
+def bench_colagem(job, fixture, repeticoes):
+    """
+    Colagem dos recortes dublados na linha do tempo (_colar_recortes_no_audio),
+    com o pico de memória alocada, que deve ficar estável entre os tamanhos.
+    """
+    json_form = job._modulo_json_form()
+    fixtures.gerar_dublados(os.path.join(fixture["downloads"], "aud_recort", "tts"),
+                            fixture["intervalos"], manifesto=fixture["manifesto"])
+    os.makedirs(job.man_vid_dir, exist_ok=True)
+    duracao_ms = fixture["duracao"] * 1000
+
+    def colar():
+        json_form._colar_recortes_no_audio(fixture["master"], fixture["downloads"],
+                                           duracao_ms, job.man_vid_dir)
+
+    tempos = _cronometrar(colar, repeticoes)
+    return {"tempos": tempos, "audio_s": fixture["duracao"], "pico_mb": _pico_memoria_mb(colar)}
+
+
+def bench_mux(job, fixture, repeticoes):
+    """
+    Geração do vídeo final (gerar_video_final) com o áudio montado.
+    """
+    if not fixture["video"]:
+        raise CasoPulado("ffmpeg não encontrado")
+    if not os.path.exists(os.path.join(job.man_vid_dir, "base_finalizado.wav")):
+        bench_colagem(job, fixture, 1)
+    return {"tempos": _cronometrar(job.gerar_video_final, repeticoes),
+            "audio_s": fixture["duracao"]}
+
+
+def bench_mux_mp4(job, fixture, repeticoes):
+    """
+    Vídeo final em MP4/AAC com o áudio montado em memória e enviado pelo stdin
+    do ffmpeg (codec_final='aac'), sem base_finalizado.wav.
+    """
+    if not fixture["video"]:
+        raise CasoPulado("ffmpeg não encontrado")
+    if not Manifesto.carregar(fixture["manifesto"]).artefatos_tts("en"):
+        bench_colagem(job, fixture, 1)
+    job_mp4 = Shortstranslate(job.url, job.workspace, codec_final="aac")
+    return {"tempos": _cronometrar(job_mp4.gerar_video_final, repeticoes),
+            "audio_s": fixture["duracao"]}
+
+
+BENCHMARKS = [
+    ("intervalos", bench_intervalos),
+    ("recorte", bench_recorte),
+    ("asr", bench_asr),
+    ("traducao_tts", bench_traducao_tts),
+    ("separacao", bench_separacao),
+    ("colagem", bench_colagem),
+    ("mux", bench_mux),
+    ("mux_mp4", bench_mux_mp4),
+]
+
+
+def executar_benchmarks(tamanhos, repeticoes=3, nomes=None, pasta=None):
+    """
+    Gera as fixtures e roda os benchmarks escolhidos.
+
+    Args:
+        tamanhos (list): Chaves de fixtures.TAMANHOS
+        repeticoes (int): Execuções cronometradas por caso
+        nomes (list, optional): Benchmarks a rodar. Se None, roda todos
+        pasta (str, optional): Onde criar as fixtures. Se None, usa uma pasta temporária
+
+    Returns:
+        dict: "nome/tamanho" -> resultado ({'mediana_s', 'min_s', ...} ou {'pulado'})
+    """
+    raiz = pasta or tempfile.mkdtemp(prefix="poliglota_bench_")
+    resultados = {}
+    try:
+        for tamanho in tamanhos:
+            workspace = os.path.join(raiz, tamanho)
+            print(f"Gerando fixture '{tamanho}' em {workspace}...")
+            fixture = fixtures.gerar_workspace(workspace, tamanho)
+            job = Shortstranslate(f"https://www.youtube.com/shorts/{fixtures.VIDEO_ID}", workspace)
+
+            for nome, funcao in BENCHMARKS:
+                if nomes and nome not in nomes:
+                    continue
+                chave = f"{nome}/{tamanho}"
+                try:
+                    # As mensagens do pipeline iriam para o terminal a cada repetição
+                    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                        resultado = funcao(job, fixture, repeticoes)
+                except CasoPulado as e:
+                    resultados[chave] = {"pulado": str(e)}
+                    print(f"  {chave:<24} pulado ({e})")
+                    continue
+
+                tempos = resultado.pop("tempos")
+                resultados[chave] = {
+                    "mediana_s": round(statistics.median(tempos), 4),
+                    "min_s": round(min(tempos), 4),
+                    **resultado,
+                }
+                extra = f" rtf={resultado['rtf']}" if "rtf" in resultado else ""
+                if "pico_mb" in resultado:
+                    extra += f" pico={resultado['pico_mb']}MB"
+                print(f"  {chave:<24} {resultados[chave]['mediana_s']:>9.4f}s{extra}")
+    finally:
+        if pasta is None:
+            shutil.rmtree(raiz, ignore_errors=True)
+    return resultados
+
+
+def comparar_com_baseline(resultados, baseline):
+    """
+    Compara os resultados com a baseline.
+
+    Args:
+        resultados (dict): Saída de executar_benchmarks
+        baseline (dict): Baseline carregada (chave 'casos')
+
+    Returns:
+        list: Regressões como (chave, mediana_atual, mediana_baseline, limite)
+    """
+    regressoes = []
+    for chave, atual in resultados.items():
+        base = baseline.get("casos", {}).get(chave)
+        if not base or "mediana_s" not in atual or "mediana_s" not in base:
+            continue
+        tolerancia = base.get("tolerancia", TOLERANCIA_PADRAO)
+        limite = base["mediana_s"] * (1 + tolerancia)
+        if atual["mediana_s"] > limite:
+            regressoes.append((chave, atual["mediana_s"], base["mediana_s"], limite))
+    return regressoes
+
+
+def salvar_baseline(resultados, caminho):
+    """
+    Grava os resultados como baseline, com a tolerância de cada caso.
+
+    Args:
+        resultados (dict): Saída de executar_benchmarks
+        caminho (str): Caminho do JSON da baseline
+    """
+    casos = {
+        chave: {**valor, "tolerancia": TOLERANCIAS.get(chave.split("/")[0], TOLERANCIA_PADRAO)}
+        for chave, valor in resultados.items() if "mediana_s" in valor
+    }
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"maquina": _descrever_maquina(), "casos": casos}, f, ensure_ascii=False, indent=2)
+    print(f"Baseline salva em: {caminho}")
+
+
+def _cronometrar(funcao, repeticoes):
+    """
+    Executa a função uma vez para aquecer e depois mede cada repetição.
+
+    Args:
+        funcao (callable): Função sem argumentos
+        repeticoes (int): Número de execuções medidas
+
+    Returns:
+        list: Tempos em segundos
+    """
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def _pico_memoria_mb(funcao):
+    """
+    Pico de memória alocada (tracemalloc, inclui buffers do NumPy) durante a função.
+
+    Args:
+        funcao (callable): Função sem argumentos
+
+    Returns:
+        float: Pico em MB
+    """
+    tracemalloc.start()
+    try:
+        funcao()
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+    finally:
+        tracemalloc.stop()
+
+
+def _duracao(caminho):
+    """
+    Duração de um WAV em segundos.
+
+    Args:
+        caminho (str): Caminho do WAV
+
+    Returns:
+        float: Duração em segundos
+    """
+    with wave.open(caminho, "rb") as wf:
+        return wf.getnframes() / wf.getframerate()
+
+
+def _descrever_maquina():
+    """
+    Identifica a máquina em que a baseline foi gravada.
+
+    Returns:
+        dict: Python, plataforma, processador e núcleos
+    """
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "nucleos": os.cpu_count(),
+    }
+
+
+def main():
+    """
+    Roda os benchmarks e sai com código 1 se houver regressão ou 2 se não houver
+    baseline para comparar.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline de dublagem")
+    parser.add_argument("--tamanhos", nargs="+", default=list(fixtures.TAMANHOS),
+                        choices=list(fixtures.TAMANHOS), help="Tamanhos de fixture")
+    parser.add_argument("--casos", nargs="+", choices=[nome for nome, _ in BENCHMARKS],
+                        help="Benchmarks a rodar (padrão: todos)")
+    parser.add_argument("-r", "--repeticoes", type=int, default=3,
+                        help="Execuções cronometradas por caso")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help="JSON da baseline")
+    parser.add_argument("--salvar-baseline", action="store_true",
+                        help="Grava os resultados como nova baseline em vez de comparar")
+    parser.add_argument("--sem-comparar", action="store_true",
+                        help="Só cronometra, sem comparar com a baseline")
+    parser.add_argument("--saida", help="Grava os resultados desta execução em JSON")
+    parser.add_argument("--pasta", help="Mantém as fixtures nesta pasta em vez de uma temporária")
+    args = parser.parse_args()
+
+    comparar = not (args.salvar_baseline or args.sem_comparar)
+    # Verificado antes de rodar, para não gastar a execução inteira à toa
+    if comparar and not os.path.exists(args.baseline):
+        print(f"Baseline não encontrada em {args.baseline}; rode com --salvar-baseline "
+              f"(ou use --sem-comparar).")
+        sys.exit(2)
+
+    resultados = executar_benchmarks(args.tamanhos, args.repeticoes, args.casos, args.pasta)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"maquina": _descrever_maquina(), "casos": resultados}, f,
+                      ensure_ascii=False, indent=2)
+
+    if args.salvar_baseline:
+        salvar_baseline(resultados, args.baseline)
+        return
+
+    if not comparar:
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressoes = comparar_com_baseline(resultados, baseline)
+    if not regressoes:
+        print("Nenhuma regressão em relação à baseline.")
+        return
+
+    print("\nREGRESSÕES DE DESEMPENHO:")
+    for chave, atual, base, limite in regressoes:
+        print(f"  {chave:<24} {atual:.4f}s (baseline {base:.4f}s, limite {limite:.4f}s, "
+              f"{(atual / base - 1) * 100:+.0f}%)")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Módulo de Fixtures Sintéticas para Benchmarks
+Este módulo fornece funcionalidades para gerar localmente, de forma determinística,
+workspaces de job com áudio parecido com fala (trechos sonoros com harmônicos e
+modulação silábica separados por pausas com ruído baixo), nos mesmos caminhos
+que o pipeline usa: {id}_vosk.wav, {id}_master.wav, o manifesto de trechos
+(segmentos.json), recortes dublados simulados e, se houver ffmpeg, o {id}.mp4.
+"""
+
+import os
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+
+from utils.manifesto import Manifesto, caminho_manifesto
+
+
+# Tamanhos de fixture: nome -> (duração em segundos, número de trechos de fala)
+TAMANHOS = {
+    "curto": (15, 6),
+    "medio": (60, 24),
+    "longo": (180, 72),
+}
+
+VIDEO_ID = "bench"
+TAXA_VOSK = 16000
+TAXA_MASTER = 44100
+
+
+def gerar_workspace(pasta, tamanho, semente=0, com_video=True):
+    """
+    Gera um workspace de job completo para um tamanho de fixture.
+
+    Args:
+        pasta (str): Diretório do workspace (criado se não existir)
+        tamanho (str): Chave de TAMANHOS
+        semente (int): Semente do gerador, para fixtures reprodutíveis
+        com_video (bool): Se True e houver ffmpeg, gera também o MP4
+
+    Returns:
+        dict: Caminhos gerados e metadados ('workspace', 'downloads', 'vosk',
+              'master', 'manifesto', 'intervalos', 'duracao', 'video')
+    """
+    duracao, n_trechos = TAMANHOS[tamanho]
+    rng = np.random.default_rng(semente)
+    intervalos = _sortear_intervalos(rng, duracao, n_trechos)
+
+    downloads = os.path.join(pasta, "downloads")
+    os.makedirs(downloads, exist_ok=True)
+    vosk = os.path.join(downloads, f"{VIDEO_ID}_vosk.wav")
+    master = os.path.join(downloads, f"{VIDEO_ID}_master.wav")
+    manifesto = caminho_manifesto(downloads)
+
+    sinal_vosk = sinal_fala(intervalos, duracao, TAXA_VOSK, semente)
+    escrever_pcm16(vosk, sinal_vosk[:, None], TAXA_VOSK)
+    sinal_master = sinal_fala(intervalos, duracao, TAXA_MASTER, semente)
+    escrever_pcm16(master, np.repeat(sinal_master[:, None], 2, axis=1), TAXA_MASTER)
+
+    trechos = Manifesto(manifesto)
+    trechos.definir_intervalos(vosk, intervalos)
+    trechos.salvar()
+
+    video = None
+    if com_video and shutil.which("ffmpeg"):
+        video = os.path.join(downloads, f"{VIDEO_ID}.mp4")
+        _gerar_mp4(master, video, duracao)
+
+    return {
+        "workspace": pasta,
+        "downloads": downloads,
+        "vosk": vosk,
+        "master": master,
+        "manifesto": manifesto,
+        "intervalos": intervalos,
+        "duracao": duracao,
+        "video": video,
+    }
+
+
+def gerar_dublados(pasta_tts, intervalos, semente=0, manifesto=None, idioma="en"):
+    """
+    Gera recortes "dublados" simulados (tts/recorte_N.wav), um pouco mais longos
+    ou mais curtos que o trecho original, como acontece com a TTS real.
+
+    Args:
+        pasta_tts (str): Pasta de saída dos recortes dublados
+        intervalos (list): Intervalos {'start', 'end'} em segundos
+        semente (int): Semente do gerador
+        manifesto (str, optional): Manifesto de trechos onde registrar os recortes
+        idioma (str): Idioma em que os recortes são registrados
+
+    Returns:
+        list: Caminhos dos recortes gerados
+    """
+    os.makedirs(pasta_tts, exist_ok=True)
+    rng = np.random.default_rng(semente + 1)
+    caminhos = []
+    for idx, intervalo in enumerate(intervalos, start=1):
+        duracao = (intervalo["end"] - intervalo["start"]) * rng.uniform(0.8, 1.3)
+        sinal = sinal_fala([{"start": 0.0, "end": duracao}], duracao, 22050, semente + idx)
+        caminho = os.path.join(pasta_tts, f"recorte_{idx}.wav")
+        escrever_pcm16(caminho, sinal[:, None], 22050)
+        caminhos.append(caminho)
+    if manifesto is not None:
+        trechos = Manifesto.carregar(manifesto)
+        trechos.definir_tts(idioma, {os.path.basename(c): c for c in caminhos})
+        trechos.salvar()
+    return caminhos
+
+
+def sinal_fala(intervalos, duracao, taxa, semente=0):
+    """
+    Sintetiza um sinal mono parecido com fala nos intervalos dados.
+
+    Cada trecho tem frequência fundamental entre 100 e 220 Hz com vibrato,
+    harmônicos decrescentes até ~3,5 kHz e envelope silábico de ~4 Hz. Fora
+    dos trechos há apenas ruído de fundo em -60 dB.
+
+    Args:
+        intervalos (list): Intervalos {'start', 'end'} em segundos
+        duracao (float): Duração total em segundos
+        taxa (int): Taxa de amostragem
+        semente (int): Semente do gerador
+
+    Returns:
+        np.ndarray: Amostras float32 em [-1, 1]
+    """
+    rng = np.random.default_rng(semente)
+    n = int(round(duracao * taxa))
+    sinal = (rng.standard_normal(n) * 1e-3).astype(np.float32)
+
+    for intervalo in intervalos:
+        inicio = int(intervalo["start"] * taxa)
+        fim = min(n, int(intervalo["end"] * taxa))
+        if fim <= inicio:
+            continue
+        t = np.arange(fim - inicio, dtype=np.float64) / taxa
+        f0 = rng.uniform(100, 220) * (1 + 0.03 * np.sin(2 * np.pi * 5 * t))
+        fase = 2 * np.pi * np.cumsum(f0) / taxa
+        voz = sum(np.sin(k * fase) / k for k in range(1, int(3500 // f0.max()) + 1))
+        silabas = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 5) * t) ** 2
+        sinal[inicio:fim] += (0.3 * voz * silabas).astype(np.float32)
+
+    return np.clip(sinal, -1.0, 1.0)
+
+
+def escrever_pcm16(caminho, amostras, taxa):
+    """
+    Grava uma matriz float (amostras x canais) como WAV PCM 16 bits.
+
+    Args:
+        caminho (str): Caminho de saída
+        amostras (np.ndarray): Amostras em [-1, 1]
+        taxa (int): Taxa de amostragem
+    """
+    pcm = (np.clip(amostras, -1.0, 1.0) * 32767.0).astype("<i2")
+    with wave.open(caminho, "wb") as wf:
+        wf.setnchannels(pcm.shape[1])
+        wf.setsampwidth(2)
+        wf.setframerate(taxa)
+        wf.writeframes(pcm.tobytes())
+
+
+def _sortear_intervalos(rng, duracao, n_trechos):
+    """
+    Distribui os trechos de fala ao longo da duração, com pausas entre eles.
+
+    Args:
+        rng (np.random.Generator): Gerador de números aleatórios
+        duracao (float): Duração total em segundos
+        n_trechos (int): Número de trechos
+
+    Returns:
+        list: Intervalos {'start', 'end'} ordenados, em segundos
+    """
+    slot = duracao / n_trechos
+    intervalos = []
+    for i in range(n_trechos):
+        tamanho = slot * rng.uniform(0.45, 0.75)
+        inicio = i * slot + rng.uniform(0.1, slot - tamanho - 0.05)
+        intervalos.append({"start": round(inicio, 3), "end": round(inicio + tamanho, 3)})
+    return intervalos
+
+
+def _gerar_mp4(audio_path, video_path, duracao):
+    """
+    Gera um MP4 vertical simples (fundo preto) com o áudio dado, como um Short.
+
+    Args:
+        audio_path (str): WAV master
+        video_path (str): Caminho do MP4 de saída
+        duracao (float): Duração em segundos
+    """
+    cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"color=c=black:s=360x640:r=30:d={duracao}",
+        "-i", audio_path,
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest",
+        video_path,
+    ]
+    subprocess.run(cmd, check=True)
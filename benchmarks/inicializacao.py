@@ -0,0 +1,155 @@
+"""
+Módulo de Orçamento de Inicialização da CLI
+Este módulo fornece funcionalidades para medir, com `python -X importtime`, quanto
+a CLI gasta importando módulos nos comandos que não fazem trabalho pesado
+(--status, --dry-run e um job com todas as etapas em cache) e falhar quando o
+tempo passa do orçamento ou quando uma dependência pesada é importada sem
+necessidade.
+
+Uso:
+    python -m benchmarks.inicializacao
+    python -m benchmarks.inicializacao --orcamento 0.5 --orcamento-imports 0.25
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+MAIN = os.path.join(RAIZ, "main.py")
+URL_TESTE = "https://www.youtube.com/shorts/orcamento"
+
+# Só as etapas que realmente rodam podem importar estes módulos
+PROIBIDOS = ("yt_dlp", "pydub", "vosk", "faster_whisper", "numpy", "requests", "deep_translator",
+             "dotenv")
+
+ORCAMENTO_PADRAO_S = 0.5
+ORCAMENTO_IMPORTS_PADRAO_S = 0.25
+
+
+def medir_comando(argumentos):
+    """
+    Executa a CLI com -X importtime e coleta tempo total e imports.
+
+    Args:
+        argumentos (list): Argumentos passados ao main.py
+
+    Returns:
+        dict: {'parede_s', 'imports_s', 'modulos' (nome -> cumulativo em s), 'codigo'}
+    """
+    inicio = time.perf_counter()
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", MAIN, *argumentos],
+        capture_output=True, text=True, stdin=subprocess.DEVNULL, cwd=RAIZ,
+    )
+    parede = time.perf_counter() - inicio
+
+    total_us = 0
+    modulos = {}
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, cumulativo, nome = linha.split(":", 1)[1].split("|")
+        # O nome vem recuado conforme o nível de aninhamento do import
+        nome = nome[1:].rstrip()
+        total_us += int(proprio)
+        modulos[nome] = int(cumulativo) / 1e6
+
+    return {"parede_s": parede, "imports_s": total_us / 1e6, "modulos": modulos,
+            "codigo": processo.returncode}
+
+
+def preparar_job_em_cache(pasta_jobs):
+    """
+    Cria um workspace em que todas as etapas já estão registradas como executadas,
+    com saídas vazias, para medir uma execução 100% em cache.
+
+    Args:
+        pasta_jobs (str): Diretório raiz dos workspaces
+    """
+    from main import Shortstranslate, video_id_da_url
+    from utils.etapas import PipelineEtapas, _eh_padrao
+    from utils.manifesto import Manifesto
+
+    workspace = os.path.join(pasta_jobs, video_id_da_url(URL_TESTE))
+    job = Shortstranslate(URL_TESTE, workspace)
+    # Manifesto sem trechos, com todas as seções preenchidas
+    Manifesto(job.get_manifesto_path(), idiomas=job._codigos_idiomas()).salvar()
+    etapas = job.etapas()
+    for etapa in etapas:
+        for saida in etapa.saidas:
+            if not _eh_padrao(saida) and "#" not in saida:
+                os.makedirs(os.path.dirname(saida), exist_ok=True)
+                open(saida, "wb").close()
+        etapa.funcao = lambda: None
+
+    estado = os.path.join(workspace, ".etapas.json")
+    with open(os.devnull, "w") as nulo:
+        saida_padrao, sys.stdout = sys.stdout, nulo
+        try:
+            PipelineEtapas(etapas, estado).executar(forcar=True)
+        finally:
+            sys.stdout = saida_padrao
+
+
+def main():
+    """
+    Mede os comandos leves e sai com código 1 se algum estourar o orçamento.
+    """
+    parser = argparse.ArgumentParser(description="Orçamento de inicialização da CLI")
+    parser.add_argument("--orcamento", type=float, default=ORCAMENTO_PADRAO_S,
+                        help="Tempo total máximo por comando, em segundos")
+    parser.add_argument("--orcamento-imports", type=float, default=ORCAMENTO_IMPORTS_PADRAO_S,
+                        help="Tempo máximo gasto em imports por comando, em segundos")
+    args = parser.parse_args()
+
+    pasta_jobs = tempfile.mkdtemp(prefix="poliglota_init_")
+    preparar_job_em_cache(pasta_jobs)
+    comandos = {
+        "status": ["--status", "--pasta-jobs", pasta_jobs],
+        "dry-run": ["--dry-run", "--pasta-jobs", pasta_jobs, URL_TESTE],
+        "cache": ["--pasta-jobs", pasta_jobs, URL_TESTE],
+    }
+    try:
+        resultados = {nome: medir_comando(argumentos) for nome, argumentos in comandos.items()}
+    finally:
+        shutil.rmtree(pasta_jobs, ignore_errors=True)
+
+    falhas = []
+    for nome, resultado in resultados.items():
+        print(f"{nome:<8} total {resultado['parede_s']:.3f}s  imports {resultado['imports_s']:.3f}s  "
+              f"código {resultado['codigo']}")
+
+        mais_lentos = sorted(((s, m) for m, s in resultado["modulos"].items() if not m.startswith(" ")),
+                             reverse=True)[:5]
+        for segundos, modulo in mais_lentos:
+            print(f"    {segundos * 1000:8.1f} ms  {modulo}")
+
+        pesados = sorted({m.strip().split(".")[0] for m in resultado["modulos"]} & set(PROIBIDOS))
+        if pesados:
+            falhas.append(f"{nome}: importou {', '.join(pesados)}")
+        if resultado["codigo"] != 0:
+            falhas.append(f"{nome}: saiu com código {resultado['codigo']}")
+        if resultado["parede_s"] > args.orcamento:
+            falhas.append(f"{nome}: {resultado['parede_s']:.3f}s > orçamento de {args.orcamento}s")
+        if resultado["imports_s"] > args.orcamento_imports:
+            falhas.append(f"{nome}: imports {resultado['imports_s']:.3f}s > "
+                          f"orçamento de {args.orcamento_imports}s")
+
+    if falhas:
+        print("\nORÇAMENTO DE INICIALIZAÇÃO ESTOURADO:")
+        for falha in falhas:
+            print(f"  {falha}")
+        sys.exit(1)
+    print("\nTodos os comandos dentro do orçamento.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,20 +4,31 @@ Este script serve para baixar, processar e manipular vídeos do YouTube Shorts,
 extraindo áudio, detectando intervalos de fala e gerando vídeos finais processados.
 """
 
+import argparse
 import os
 import re
 import json
 import subprocess
-import importlib.util
 import sys
+import threading
+import time
 
 from colorama import Fore, Style
 
-from utils.download import download_shorts
-from utils.audioextr import extrair_audio_mp4
+from man_aud.elabs.motores_asr import configuracao_asr, parametros_asr
+from utils.audioextr import caminhos_pcm, extrair_audio_pcm
 from utils.induplique import audio_ja_existe
+from utils.etapas import Etapa, ErroEtapa, PipelineEtapas
+from utils.idiomas import IDIOMA_PADRAO, VOZ_PADRAO, interpretar_idiomas, pasta_tts, sufixo_idioma
+from utils.manifesto import Manifesto, caminho_manifesto, secao
+from utils.memoria import definir_limite_memoria
+from utils.modulos import carregar_modulo
+from utils.rastreio import ativar_rastreio, exportar, rastreio_ativo, rastrear
 from utils.url import shorts_url_ok
 
+# Intervalo entre consultas de um trabalhador quando não há job disponível
+ESPERA_FILA_S = 5.0
+
 
 class Shortstranslate:
     """
@@ -25,14 +36,58 @@ class Shortstranslate:
     Gerencia download, extração de áudio, detecção de intervalos e geração de vídeo final.
     """
 
-    def __init__(self, url):
+    def __init__(self, url, workspace=".", streaming=True, arquivo_registro=None,
+                 audio_primeiro=False, codec_final="pcm", asr_unico=False, idiomas=None):
         """
         Inicializa o processador com a URL do YouTube Shorts.
         
         Args:
             url (str): URL do vídeo YouTube Shorts
+            workspace (str): Diretório de trabalho do job. Todos os arquivos
+                             intermediários ficam em workspace/downloads e
+                             workspace/man_vid, isolando jobs executados em paralelo
+            streaming (bool): Se True, cada trecho passa por ASR, tradução e TTS
+                              sem esperar os demais; se False, usa etapas separadas
+            arquivo_registro (str, optional): Registro de downloads (formato
+                                              --download-archive do yt-dlp)
+            audio_primeiro (bool): Se True, baixa só o áudio para as etapas de
+                                   áudio e o vídeo sem áudio em paralelo, juntando
+                                   os dois apenas no vídeo final
+            codec_final (str): 'pcm' gera {id}_final.avi a partir de base_finalizado.wav;
+                               'aac' ou 'opus' gera {id}_final.mp4 (faststart)
+                               enviando o áudio montado em blocos ao ffmpeg
+            asr_unico (bool): Se True, uma passada de ASR com tempo por palavra na
+                              trilha inteira gera intervalos e transcrições juntos
+            idiomas (list, optional): Pares (idioma, voice_id) de destino. Download,
+                                      ASR e recortes são compartilhados; com mais de
+                                      um idioma o vídeo final é um MP4 com uma trilha
+                                      por idioma (codec 'pcm' vira 'aac'). Padrão: inglês
         """
         self.url = url
+        self.workspace = workspace
+        self.downloads_dir = os.path.join(workspace, "downloads")
+        self.man_vid_dir = os.path.join(workspace, "man_vid")
+        self.streaming = streaming
+        self.arquivo_registro = arquivo_registro
+        self.audio_primeiro = audio_primeiro
+        self.idiomas = list(idiomas or [(IDIOMA_PADRAO, VOZ_PADRAO)])
+        # AVI com PCM tem uma só trilha de áudio; vários idiomas exigem MP4
+        self.codec_final = "aac" if codec_final == "pcm" and len(self.idiomas) > 1 else codec_final
+        self.asr_unico = asr_unico
+        self._video_em_andamento = None
+        # Parâmetros que entram na impressão digital das etapas
+        self.parametros_vad = {"gap": 0.5, "min_duration": 0.1, "padding": 0.1}
+        self.config_asr = configuracao_asr()
+        self.parametros_asr = parametros_asr(self.config_asr)
+        # POLIGLOTA_SEPARACAO=nenhuma usa um ambiente.wav pronto (ou o master) em vez de separar
+        self.separar_voz = os.getenv("POLIGLOTA_SEPARACAO", "stft").strip().lower() != "nenhuma"
+        self.parametros_separacao = {"janela": 2048, "salto": 512}
+        # Voz do primeiro idioma; por padrão "EXAVITQu4vr4xnSDxMaL" (Rachel, ElevenLabs)
+        self.voice_id = self.idiomas[0][1]
+        self.audio_vosk = None
+        self.audio_master = None
+        # Callback de progresso da execução atual, repassado às etapas por trecho
+        self._progresso = None
 
     def check(self):
         """
@@ -43,6 +98,15 @@ class Shortstranslate:
         """
         return shorts_url_ok(self.url)
 
+    def get_video_id(self):
+        """
+        Extrai o ID do vídeo a partir da URL.
+        
+        Returns:
+            str: ID do vídeo ou "video" se não encontrado
+        """
+        return video_id_da_url(self.url)
+
     def get_video_path(self):
         """
         Gera o caminho do arquivo de vídeo baseado na URL.
@@ -50,26 +114,50 @@ class Shortstranslate:
         Returns:
             str: Caminho completo do arquivo de vídeo
         """
-        match = re.search(r"shorts/([\w-]+)", self.url)
-        video_id = match.group(1) if match else "video"
-        return os.path.join("downloads", f"{video_id}.mp4")
+        return os.path.join(self.downloads_dir, f"{self.get_video_id()}.mp4")
 
-    def download(self):
+    def get_origem_audio(self):
         """
-        Baixa o vídeo do YouTube Shorts se ainda não existir.
+        Arquivo de onde o áudio é extraído: o vídeo completo ou, no modo
+        áudio primeiro, só a trilha de áudio baixada.
         
         Returns:
-            str: Caminho do arquivo baixado ou None se falhar
+            str: Caminho do arquivo de origem do áudio
         """
-        video_path = self.get_video_path()
+        if not self.audio_primeiro:
+            return self.get_video_path()
+        return carregar_modulo("download").caminho_download(
+            self.downloads_dir, self.get_video_id(), "audio")
+
+    def get_video_mux_path(self):
+        """
+        Arquivo de onde o vídeo final copia a imagem: o vídeo completo ou, no
+        modo áudio primeiro, o vídeo sem áudio.
         
-        if os.path.exists(video_path):
-            print(Fore.YELLOW + f"Arquivo já existe: {video_path}" + Style.RESET_ALL)
-            return video_path
-            
+        Returns:
+            str: Caminho do arquivo de vídeo usado no mux
+        """
+        if not self.audio_primeiro:
+            return self.get_video_path()
+        return carregar_modulo("download").caminho_download(
+            self.downloads_dir, self.get_video_id(), "video")
+
+    def download(self, formato="completo"):
+        """
+        Baixa o vídeo do YouTube Shorts se ainda não existir um arquivo íntegro.
+        Downloads interrompidos são retomados.
+        
+        Args:
+            formato (str): 'completo', 'audio' ou 'video' (ver utils.download.FORMATOS)
+        
+        Returns:
+            str: Caminho do arquivo baixado ou None se falhar
+        """
         if self.check():
-            print("Baixando o vídeo...")
-            resultado = download_shorts(self.url)
+            download_mod = carregar_modulo("download")
+            registro = (download_mod.RegistroDownloads(self.arquivo_registro)
+                        if self.arquivo_registro else None)
+            resultado = download_mod.download_shorts(self.url, self.downloads_dir, registro, formato)
             print(resultado)
             return resultado
         else:
@@ -78,120 +166,269 @@ class Shortstranslate:
 
     def extcaud(self):
         """
-        Extrai áudio do vídeo e converte para formato compatível com Vosk.
+        Extrai o áudio do vídeo uma única vez, gerando o PCM 16 kHz do Vosk
+        e o PCM master na taxa original. Chamadas seguintes reutilizam o cache.
         
         Returns:
-            str: Caminho do arquivo de áudio convertido
+            str: Caminho do arquivo de áudio compatível com Vosk
         """
+        if self.audio_vosk:
+            return self.audio_vosk
+
         video_path = self.get_video_path()
-        existe, audio_path = audio_ja_existe(video_path)
+        origem = self.get_origem_audio()
+        existe, _ = audio_ja_existe(video_path, origem)
         
         if existe:
-            print(f"Áudio já existe: {audio_path}")
+            vosk_path, master_path = caminhos_pcm(video_path)
+            print(f"Áudio já existe: {vosk_path}")
         else:
-            resultado = extrair_audio_mp4(video_path)
-            print(resultado)
-            audio_path = resultado
-        
-        # Converte para WAV mono 16kHz compatível com Vosk
-        wav_path = os.path.splitext(audio_path)[0] + "_vosk.wav"
-        subprocess.run([
-            "ffmpeg", "-y", "-i", audio_path,
-            "-ac", "1", "-ar", "16000", wav_path
-        ], check=True)
+            # Os PCM sempre levam o nome do vídeo ({id}_vosk.wav, {id}_master.wav)
+            resultado = extrair_audio_pcm(origem, video_path)
+            if resultado is None:
+                return None
+            vosk_path, master_path = resultado
+            print(f"Áudio extraído: {vosk_path} e {master_path}")
         
-        print(f"Áudio convertido para Vosk: {wav_path}")
-        return wav_path
+        self.audio_vosk = vosk_path
+        self.audio_master = master_path
+        return vosk_path
 
     def mostrar_intervalos(self):
         """
-        Detecta intervalos de fala no áudio e salva em JSON.
-        Executa o fluxo de processamento de áudio e vídeo.
+        Detecta intervalos de fala no áudio e grava os trechos no manifesto.
+        
+        Returns:
+            str: Caminho do manifesto de trechos do job
         """
-        from utils.intervals import mostrar_intervalos_fala
+        from utils.intervals import detectar_intervalos_fala
         
-        video_path = self.get_video_path()
-        _, audio_path_original = audio_ja_existe(video_path)
-        audio_path = os.path.splitext(audio_path_original)[0] + "_vosk.wav"
-        
-        # Executa detecção de intervalos
-        mostrar_intervalos_fala(audio_path)
-        
-        # Lê intervalos do arquivo gerado
-        json_path = os.path.splitext(audio_path)[0] + "_intervals.json"
-        if os.path.exists(json_path):
-            with open(json_path, "r", encoding="utf-8") as f:
-                intervalos = json.load(f)
-            print(f"Intervalos lidos de {json_path}: {intervalos}")
-        else:
-            print(f"Arquivo de intervalos não encontrado: {json_path}")
-            intervalos = []
+        audio_path = self.extcaud()
+        intervalos = detectar_intervalos_fala(audio_path, **self.parametros_vad)
+        print(f"Intervalos detectados em {audio_path}: {intervalos}")
+
+        return self._gravar_trechos(audio_path, intervalos)
+
+    def detectar_e_transcrever(self):
+        """
+        Modo ASR único: reconhece a trilha inteira uma vez, com tempo por palavra,
+        e grava juntos no manifesto os trechos de fala e suas transcrições.
         
-        self.salvar_intervalos_json(intervalos)
+        Returns:
+            str: Caminho do manifesto de trechos do job
+            
+        Raises:
+            ErroEtapa: Se o reconhecimento falhar
+        """
+        audio_path = self.extcaud()
+        transcribe = self._modulo_man_aud()._carregar_elabs('transcribe')
+        resultado = transcribe.transcrever_com_intervalos(audio_path, **self.parametros_vad)
+        if "erro" in resultado:
+            raise ErroEtapa(f"ASR falhou: {resultado['erro']}")
+        
+        intervalos = resultado["intervalos"]
+        print(f"Intervalos reconhecidos em {audio_path}: {intervalos}")
+        textos = {f"recorte_{idx}.wav": [texto]
+                  for idx, texto in enumerate(resultado["textos"], 1)}
+        return self._gravar_trechos(audio_path, intervalos, textos)
 
-    def salvar_intervalos_json(self, intervalos):
+    def _gravar_trechos(self, audio_path, intervalos, textos=None):
         """
-        Salva intervalos de fala em arquivo JSON e executa processamento.
+        Grava os intervalos de fala (e, se houver, as transcrições) no manifesto.
+        Trechos que não mudaram mantêm seus resultados; os demais perdem recorte
+        e áudios dublados.
         
         Args:
-            intervalos (list): Lista de intervalos de fala detectados
+            audio_path (str): WAV de 16 kHz dos intervalos
+            intervalos (list): Intervalos {'start', 'end'} em segundos
+            textos (dict, optional): Nome do recorte -> frases transcritas
+            
+        Returns:
+            str: Caminho do manifesto salvo
         """
-        match = re.search(r"shorts/([\w-]+)", self.url)
-        video_id = match.group(1) if match else "video"
-        json_path = os.path.join("downloads", f"{video_id}.json")
+        caminho = self.get_manifesto_path()
+        manifesto = Manifesto.carregar_ou_vazio(caminho)
+        manifesto.definir_intervalos(audio_path, intervalos, self.get_recortes_dir())
+        if textos is not None:
+            manifesto.definir_textos(textos)
+        manifesto.salvar()
+        print(f"Trechos salvos em: {caminho}")
+        return caminho
+
+    def get_manifesto_path(self):
+        """
+        Retorna o caminho do manifesto de trechos do job (ver utils.manifesto).
         
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(intervalos, f, ensure_ascii=False, indent=2)
+        Returns:
+            str: Caminho de downloads/segmentos.json
+        """
+        return caminho_manifesto(self.downloads_dir)
+
+    def get_recortes_dir(self):
+        """
+        Retorna a pasta de recortes do job.
         
-        print(f"Intervalos salvos em: {json_path}")
+        Returns:
+            str: Caminho de downloads/aud_recort
+        """
+        return os.path.join(self.downloads_dir, "aud_recort")
+
+    def recortar(self):
+        """
+        Recorta o áudio nos intervalos detectados.
+        """
+        self._modulo_man_aud().exportar_recortes(self.extcaud(), self.get_manifesto_path())
+
+    def transcrever(self):
+        """
+        Transcreve os recortes com o pool de ASR.
+        """
+        self._modulo_man_aud().transcrever_recortes(self.get_manifesto_path())
+
+    def traduzir(self):
+        """
+        Traduz as transcrições dos recortes para cada idioma de destino.
+        """
+        self._modulo_man_aud().traduzir_recortes(self.get_manifesto_path(), self._codigos_idiomas())
+
+    def sintetizar(self):
+        """
+        Gera os áudios dublados de cada recorte em cada idioma de destino.
+        """
+        self._executar_trechos(self._modulo_man_aud().sintetizar_recortes,
+                               self.get_manifesto_path(), self.voice_id, self.idiomas)
+
+    def processar_segmentos(self):
+        """
+        Recorta, transcreve, traduz e sintetiza os trechos em fluxo contínuo.
+        No modo ASR único os trechos já chegam transcritos e só são traduzidos e sintetizados.
+        """
+        self._executar_trechos(
+            self._modulo_man_aud().processar_segmentos_streaming,
+            self.extcaud(), self.get_manifesto_path(), self.voice_id,
+            reconhecer=not self.asr_unico, idiomas=self.idiomas
+        )
+
+    def _executar_trechos(self, funcao, *args, **kwargs):
+        """
+        Executa uma etapa por trecho, repassando os eventos de cada trecho ao
+        progresso do job, e falha se algum trecho falhou (ASR, tradução ou TTS).
+        
+        Assim a etapa não é registrada como concluída e a próxima execução a
+        refaz; os trechos que deram certo saem do cache do TTS e só os que
+        falharam voltam à API.
+        
+        Args:
+            funcao (callable): Função da etapa, que aceita o argumento progresso
+            *args: Argumentos posicionais da função
+            **kwargs: Argumentos nomeados da função
+            
+        Raises:
+            ErroEtapa: Se algum trecho falhar
+        """
+        falhas = []
+        lock = threading.Lock()
         
-        # Executa fluxo de recorte e processamento de áudio
-        self._executar_man_aud(json_path)
+        def progresso(evento):
+            # Os idiomas são sintetizados em threads separadas
+            with lock:
+                if evento["acao"] == "erro":
+                    falhas.append(f"{evento['trecho']} ({evento['etapa']}, {evento['idioma']})")
+                if self._progresso is not None:
+                    self._progresso(evento)
         
-        # Executa processamento de recortes e áudio
-        self._executar_json_form()
+        funcao(*args, progresso=progresso, **kwargs)
+        if falhas:
+            raise ErroEtapa(f"{len(falhas)} trecho(s) falharam: {', '.join(falhas[:5])}")
 
-    def _executar_man_aud(self, json_path):
+    def _codigos_idiomas(self):
         """
-        Executa o módulo de manipulação de áudio.
+        Códigos dos idiomas de destino, na ordem das trilhas do vídeo final.
         
-        Args:
-            json_path (str): Caminho do arquivo JSON com intervalos
+        Returns:
+            list: Códigos dos idiomas (ex.: ['en', 'es'])
+        """
+        return [idioma for idioma, _ in self.idiomas]
+
+    def _modulo_man_aud(self):
+        """
+        Carrega o módulo de manipulação de áudio.
+        
+        Returns:
+            module: Módulo man_aud/man_aud.py
         """
-        caminho_man_aud = os.path.join(os.path.dirname(__file__), "man_aud", "man_aud.py")
-        spec_man_aud = importlib.util.spec_from_file_location("man_aud", caminho_man_aud)
-        man_aud = importlib.util.module_from_spec(spec_man_aud)
-        sys.modules["man_aud"] = man_aud
-        spec_man_aud.loader.exec_module(man_aud)
+        return carregar_modulo("man_aud")
+
+    def _modulo_json_form(self):
+        """
+        Carrega o módulo de formatação JSON e montagem do áudio.
         
-        audio_file = self.extcaud()
-        man_aud.recortar_audio(audio_file, json_path)
+        Returns:
+            module: Módulo man_vid/json_form.py
+        """
+        return carregar_modulo("json_form")
+
+    def separar_ambiente(self):
+        """
+        Gera man_vid/ambiente.wav a partir do master, atenuando a voz original
+        nos intervalos de fala (ver man_vid.separacao), para a base da montagem.
+        """
+        _, master = caminhos_pcm(self.get_video_path())
+        os.makedirs(self.man_vid_dir, exist_ok=True)
+        intervalos = Manifesto.carregar(self.get_manifesto_path()).intervalos()
+        carregar_modulo("separacao").separar_ambiente(master, self.get_ambiente_path(), intervalos,
+                                                      **self.parametros_separacao)
+        print(f"Ambiente separado: {self.get_ambiente_path()}")
 
-    def _executar_json_form(self):
+    def get_ambiente_path(self):
         """
-        Executa o módulo de formatação JSON e preparação de ambiente.
+        Returns:
+            str: Caminho de man_vid/ambiente.wav, a base da montagem do áudio
+        """
+        return os.path.join(self.man_vid_dir, "ambiente.wav")
+
+    def montar_audio(self):
         """
-        caminho_json_form = os.path.join(os.path.dirname(__file__), 'man_vid', 'json_form.py')
-        spec_json = importlib.util.spec_from_file_location('json_form', caminho_json_form)
-        json_form_mod = importlib.util.module_from_spec(spec_json)
-        spec_json.loader.exec_module(json_form_mod)
+        Cola os recortes do manifesto no áudio base, gerando
+        man_vid/base_finalizado.wav (saída PCM). Com saída em MP4 não há
+        montagem separada: o áudio é montado em blocos no vídeo final.
+        """
+        self._modulo_json_form().preparar_ambiente(self.downloads_dir, self.man_vid_dir,
+                                                   self.get_video_id(), self.idiomas[0][0])
+
+    def get_base_finalizado_path(self):
+        """
+        Caminho do áudio final em WAV (saída PCM, um único idioma).
         
-        json_form_mod.json_form()
-        json_form_mod.preparar_ambiente()
+        Returns:
+            str: Caminho de man_vid/base_finalizado{sufixo}.wav
+        """
+        return os.path.join(self.man_vid_dir, f"base_finalizado{sufixo_idioma(self.idiomas[0][0])}.wav")
+
+    def get_saida_final(self):
+        """
+        Caminho do vídeo final: {id}_final.avi (PCM) ou {id}_final.mp4 (AAC/Opus).
+        
+        Returns:
+            str: Caminho do vídeo final
+        """
+        extensao = "avi" if self.codec_final == "pcm" else "mp4"
+        return os.path.join(self.downloads_dir, f"{self.get_video_id()}_final.{extensao}")
 
     def gerar_video_final(self):
         """
-        Gera vídeo final combinando vídeo MP4 com áudio processado.
+        Gera vídeo final combinando vídeo MP4 com áudio processado
+        (AVI com PCM ou, com codec_final 'aac'/'opus', MP4 com faststart).
         
         Returns:
             str: Caminho do vídeo final gerado
         """
-        match = re.search(r"shorts/([\w-]+)", self.url)
-        video_id = match.group(1) if match else "video"
+        if self.codec_final != "pcm":
+            return self._gerar_video_final_mp4()
         
-        video_mp4 = os.path.join("downloads", f"{video_id}.mp4")
-        audio_final_wav = os.path.join("man_vid", "base_finalizado.wav")
-        output_video_avi = os.path.join("downloads", f"{video_id}_final.avi")
+        video_mp4 = self.get_video_mux_path()
+        audio_final_wav = self.get_base_finalizado_path()
+        output_video_avi = self.get_saida_final()
         
         if os.path.exists(video_mp4) and os.path.exists(audio_final_wav):
             cmd_mux = [
@@ -205,29 +442,906 @@ class Shortstranslate:
                 "-shortest",
                 output_video_avi
             ]
-            subprocess.run(cmd_mux, check=True)
+            with rastrear("ffmpeg", "subprocesso", acao="mux", arquivo=output_video_avi):
+                subprocess.run(cmd_mux, check=True)
             print(f"Vídeo final gerado em: {output_video_avi}")
             return output_video_avi
         else:
             print("Arquivo de vídeo ou áudio final não encontrado para substituição.")
             return None
 
+    def _gerar_video_final_mp4(self):
+        """
+        Monta o áudio final de cada idioma em blocos e envia as trilhas ao ffmpeg,
+        que as codifica em AAC/Opus e copia o vídeo para um MP4 com faststart e
+        uma trilha de áudio por idioma. Cada trilha é montada na thread que a
+        escreve no ffmpeg, então os idiomas são montados em paralelo e a memória
+        fica limitada a um bloco por trilha (ver utils.memoria).
+        
+        Returns:
+            str: Caminho do MP4 final ou None se faltar vídeo ou áudio
+        """
+        video_mp4 = self.get_video_mux_path()
+        faixas = [self._montar_faixa_pcm(idioma) for idioma in self._codigos_idiomas()]
+        if not os.path.exists(video_mp4) or None in faixas:
+            print("Arquivo de vídeo ou áudio final não encontrado para substituição.")
+            return None
+        
+        saida = carregar_modulo("mux").codificar_mp4_faixas(
+            video_mp4, faixas, self.get_saida_final(), self.codec_final)
+        print(f"Vídeo final gerado em: {saida}")
+        return saida
+
+    def _montar_faixa_pcm(self, idioma):
+        """
+        Prepara o áudio final de um idioma como blocos PCM 16 bits gerados sob demanda.
+        
+        Args:
+            idioma (str): Código do idioma
+            
+        Returns:
+            tuple: (blocos, taxa, canais, idioma) ou None se faltar áudio
+        """
+        fluxo = self._modulo_json_form().fluxo_audio_final(
+            self.downloads_dir, self.man_vid_dir, self.get_video_id(), idioma)
+        if fluxo is None:
+            return None
+        return (*fluxo, idioma)
+
+
+    def etapas(self):
+        """
+        Declara as etapas do job com suas entradas, parâmetros e saídas.
+        
+        As etapas por trecho dividem o manifesto de trechos e declaram só as
+        seções que leem e gravam ('segmentos.json#texto', ver utils.etapas).
+        
+        Returns:
+            list: Etapas em ordem de execução
+        """
+        video = self.get_video_path()
+        origem = self.get_origem_audio()
+        video_mux = self.get_video_mux_path()
+        vosk, master = caminhos_pcm(video)
+        recortes = self.get_recortes_dir()
+        manifesto = self.get_manifesto_path()
+        base_finalizado = self.get_base_finalizado_path()
+        entradas_audio = [master, secao(manifesto, "intervalos"),
+                          *(secao(manifesto, f"tts:{idioma}") for idioma in self._codigos_idiomas()),
+                          os.path.join(recortes, "recorte_*.wav"), self.get_ambiente_path()]
+        
+        if self.audio_primeiro:
+            # O vídeo sem áudio baixa em segundo plano e só é esperado no fim
+            download = Etapa("download", self._baixar_audio_ou_falhar,
+                             saidas=[origem], parametros={"url": self.url, "formato": "audio"},
+                             recurso="rede")
+            download_video = [Etapa("download_video", self._aguardar_video_ou_falhar,
+                                    saidas=[video_mux],
+                                    parametros={"url": self.url, "formato": "video"},
+                                    recurso="rede")]
+        else:
+            download = Etapa("download", self._baixar_ou_falhar,
+                             saidas=[video], parametros={"url": self.url}, recurso="rede")
+            download_video = []
+        
+        if self.asr_unico:
+            # Uma passada de ASR já entrega os intervalos e as transcrições
+            intervalos = Etapa("intervalos", self.detectar_e_transcrever,
+                               entradas=[vosk],
+                               saidas=[secao(manifesto, "intervalos"), secao(manifesto, "texto")],
+                               parametros={**self.parametros_vad, **self.parametros_asr,
+                                           "asr_unico": True},
+                               depende=["extracao"], recurso="cpu")
+        else:
+            intervalos = Etapa("intervalos", self.mostrar_intervalos,
+                               entradas=[vosk], saidas=[secao(manifesto, "intervalos")],
+                               parametros=self.parametros_vad, depende=["extracao"],
+                               recurso="cpu")
+        if self.streaming:
+            depende_audio = ["segmentos"]
+        else:
+            depende_audio = ["tts"] if self.asr_unico else ["recorte", "tts"]
+        if self.separar_voz:
+            ambiente = [Etapa("ambiente", self.separar_ambiente,
+                              entradas=[master, secao(manifesto, "intervalos")],
+                              saidas=[self.get_ambiente_path()],
+                              parametros=self.parametros_separacao, depende=["intervalos"],
+                              recurso="cpu")]
+            depende_audio = [*depende_audio, "ambiente"]
+        else:
+            ambiente = []
+        
+        if self.codec_final == "pcm":
+            montagem = [Etapa("montagem", self.montar_audio,
+                              entradas=entradas_audio, saidas=[base_finalizado],
+                              depende=depende_audio, recurso="cpu")]
+            entradas_final = [video_mux, base_finalizado]
+            depende_final = ["montagem"]
+        else:
+            # O áudio final só existe em memória, dentro da etapa do vídeo final
+            montagem = []
+            entradas_final = [video_mux, *entradas_audio]
+            depende_final = depende_audio
+        
+        return [
+            download,
+            Etapa("extracao", self.extcaud,
+                  entradas=[origem], saidas=[vosk, master], depende=["download"],
+                  recurso="cpu"),
+            intervalos,
+            *self._etapas_segmentos(vosk, recortes),
+            *ambiente,
+            *montagem,
+            *download_video,
+            Etapa("video_final", self.gerar_video_final,
+                  entradas=entradas_final,
+                  saidas=[self.get_saida_final()], parametros={"codec": self.codec_final},
+                  depende=depende_final, recurso="cpu"),
+        ]
+
+    def _etapas_segmentos(self, vosk, recortes):
+        """
+        Declara as etapas por trecho: uma única etapa em fluxo (streaming)
+        ou recorte, ASR, tradução e TTS separados por barreiras. No modo ASR
+        único não há recorte nem ASR por trecho.
+        
+        Args:
+            vosk (str): Caminho do áudio 16 kHz
+            recortes (str): Pasta de recortes do job
+            
+        Returns:
+            list: Etapas por trecho
+        """
+        parametros_asr = self.parametros_asr
+        idiomas = self._codigos_idiomas()
+        parametros_traducao = {"source": "pt", "target": ",".join(idiomas),
+                               "backend": os.getenv("POLIGLOTA_TRADUTOR", "google")}
+        if len(self.idiomas) == 1:
+            parametros_tts = {"voice_id": self.voice_id}
+        else:
+            parametros_tts = {"vozes": dict(self.idiomas)}
+        manifesto = self.get_manifesto_path()
+        intervalos = secao(manifesto, "intervalos")
+        texto = secao(manifesto, "texto")
+        traduzido = [secao(manifesto, f"traducao:{idioma}") for idioma in idiomas]
+        dublados = [secao(manifesto, f"tts:{idioma}") for idioma in idiomas]
+        dublados += [os.path.join(pasta_tts(recortes, idioma), "*.wav") for idioma in idiomas]
+        clipes = os.path.join(recortes, "recorte_*.wav")
+        
+        if self.streaming and self.asr_unico:
+            return [
+                Etapa("segmentos", self.processar_segmentos,
+                      entradas=[texto, intervalos],
+                      saidas=[*traduzido, *dublados],
+                      parametros={**parametros_traducao, **parametros_tts},
+                      depende=["intervalos"], recurso="rede"),
+            ]
+        if self.asr_unico:
+            return [
+                Etapa("traducao", self.traduzir,
+                      entradas=[texto],
+                      saidas=traduzido,
+                      parametros=parametros_traducao, depende=["intervalos"], recurso="rede"),
+                Etapa("tts", self.sintetizar,
+                      entradas=traduzido,
+                      saidas=dublados,
+                      parametros=parametros_tts, depende=["traducao"], recurso="rede"),
+            ]
+        if self.streaming:
+            return [
+                Etapa("segmentos", self.processar_segmentos,
+                      entradas=[vosk, intervalos],
+                      saidas=[texto, *traduzido, *dublados],
+                      parametros={**parametros_asr, **parametros_traducao, **parametros_tts},
+                      depende=["intervalos"], recurso="rede"),
+            ]
+        
+        return [
+            Etapa("recorte", self.recortar,
+                  entradas=[vosk, intervalos],
+                  saidas=[clipes],
+                  depende=["intervalos"], recurso="cpu"),
+            Etapa("asr", self.transcrever,
+                  entradas=[intervalos, clipes],
+                  saidas=[texto],
+                  parametros=parametros_asr, depende=["recorte"], recurso="cpu"),
+            Etapa("traducao", self.traduzir,
+                  entradas=[texto],
+                  saidas=traduzido,
+                  parametros=parametros_traducao, depende=["asr"], recurso="rede"),
+            Etapa("tts", self.sintetizar,
+                  entradas=traduzido,
+                  saidas=dublados,
+                  parametros=parametros_tts, depende=["traducao"], recurso="rede"),
+        ]
+
+    def pipeline(self):
+        """
+        Cria o pipeline incremental do job, com estado em workspace/.etapas.json.
+        
+        Returns:
+            PipelineEtapas: Pipeline pronto para planejar ou executar
+        """
+        return PipelineEtapas(self.etapas(), os.path.join(self.workspace, ".etapas.json"))
+
+    def planejar(self):
+        """
+        Mostra quais etapas rodariam, sem executar nada.
+        
+        Returns:
+            list: Tuplas (etapa, acao, motivo)
+        """
+        return self.pipeline().planejar()
+
+    def _baixar_ou_falhar(self):
+        """
+        Executa o download e falha se o vídeo não for obtido.
+        
+        Raises:
+            ErroEtapa: Se o download falhar
+        """
+        resultado = self.download()
+        if not (resultado and os.path.exists(resultado)):
+            raise ErroEtapa(f"Download falhou: {resultado}")
+
+    def _baixar_audio_ou_falhar(self):
+        """
+        Modo áudio primeiro: garante o download do vídeo sem áudio em segundo
+        plano e baixa só a trilha de áudio, liberando as etapas de áudio.
+        
+        Raises:
+            ErroEtapa: Se o download do áudio falhar
+        """
+        self._iniciar_download_video()
+        resultado = self.download("audio")
+        if not (resultado and os.path.exists(resultado)):
+            raise ErroEtapa(f"Download do áudio falhou: {resultado}")
+
+    def _iniciar_download_video(self):
+        """
+        Inicia, em uma thread, o download do vídeo sem áudio, se ainda não
+        começou. As etapas de áudio seguem enquanto ele baixa.
+        """
+        if self._video_em_andamento is not None:
+            return
+        from concurrent.futures import ThreadPoolExecutor
+        
+        executor = ThreadPoolExecutor(max_workers=1)
+        self._video_em_andamento = executor.submit(self.download, "video")
+        executor.shutdown(wait=False)
+
+    def _aguardar_video_ou_falhar(self):
+        """
+        Espera o download do vídeo sem áudio (ou o faz agora, se não começou).
+        
+        Raises:
+            ErroEtapa: Se o download do vídeo falhar
+        """
+        self._iniciar_download_video()
+        resultado = self._video_em_andamento.result()
+        self._video_em_andamento = None
+        if not (resultado and os.path.exists(resultado)):
+            raise ErroEtapa(f"Download do vídeo falhou: {resultado}")
+
+    def executar(self, forcar=False, progresso=None):
+        """
+        Executa o fluxo completo do job e registra um resumo em workspace/resumo.json.
+        Etapas cujas entradas e parâmetros não mudaram desde a última execução são puladas.
+        Com o rastreio ativo (--profile), grava também workspace/perfil.json e
+        workspace/perfil.trace.json.
+        
+        Args:
+            forcar (bool): Se True, executa todas as etapas
+            progresso (callable, optional): Recebe um dicionário a cada evento de
+                                            etapa e de trecho dublado
+        
+        Returns:
+            dict: Resumo do job (status, etapas executadas/puladas, saída ou erro)
+        """
+        resumo = {
+            "url": self.url,
+            "video_id": self.get_video_id(),
+            "workspace": os.path.abspath(self.workspace),
+            "status": "ok",
+            "etapas": {},
+            "saida": None,
+            "erro": None,
+        }
+        
+        os.makedirs(self.downloads_dir, exist_ok=True)
+        inicio_job = time.perf_counter()
+        if self.audio_primeiro:
+            # Começa já, mesmo que o download do áudio esteja em cache
+            self._iniciar_download_video()
+        self._progresso = progresso
+        try:
+            with rastrear("job", "job", video_id=self.get_video_id()):
+                resumo["etapas"] = self.pipeline().executar(forcar, progresso)
+            resumo["saida"] = self.get_saida_final()
+        except Exception as e:
+            resumo["status"] = "erro"
+            resumo["erro"] = f"{type(e).__name__}: {e}"
+        finally:
+            self._progresso = None
+        resumo["duracao"] = round(time.perf_counter() - inicio_job, 3)
+        
+        if rastreio_ativo():
+            caminho_json, caminho_trace = exportar(self.workspace)
+            resumo["perfil"] = {"json": caminho_json, "trace": caminho_trace}
+            print(f"Perfil salvo em: {caminho_json} e {caminho_trace}")
+        
+        with open(os.path.join(self.workspace, "resumo.json"), "w", encoding="utf-8") as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+        
+        return resumo
+
+
+def video_id_da_url(url):
+    """
+    Extrai o ID do vídeo de uma URL do YouTube Shorts.
+    
+    Args:
+        url (str): URL do vídeo YouTube Shorts
+        
+    Returns:
+        str: ID do vídeo ou "video" se não encontrado
+    """
+    match = re.search(r"shorts/([\w-]+)", url)
+    return match.group(1) if match else "video"
+
+
+def _executar_job(url, pasta_jobs, forcar=False, streaming=True, **opcoes):
+    """
+    Executa um job isolado em pasta_jobs/<video_id>. Usado pelos processos do lote.
+    
+    Args:
+        url (str): URL do vídeo YouTube Shorts
+        pasta_jobs (str): Diretório raiz dos workspaces
+        forcar (bool): Se True, executa todas as etapas
+        streaming (bool): Se True, processa os trechos em fluxo contínuo
+        **opcoes: Demais opções de Shortstranslate (audio_primeiro, codec_final, asr_unico,
+                  idiomas)
+        
+    Returns:
+        dict: Resumo do job
+    """
+    workspace = os.path.join(pasta_jobs, video_id_da_url(url))
+    job = Shortstranslate(url, workspace, streaming, _caminho_registro(pasta_jobs), **opcoes)
+    return job.executar(forcar)
+
+
+def _caminho_registro(pasta_jobs):
+    """
+    Caminho do registro de downloads compartilhado pelos jobs de pasta_jobs.
+    
+    Args:
+        pasta_jobs (str): Diretório raiz dos workspaces
+        
+    Returns:
+        str: Caminho de pasta_jobs/downloads_registro.txt
+    """
+    return os.path.join(pasta_jobs, "downloads_registro.txt")
+
+
+def processar_lote(urls, pasta_jobs="jobs", max_workers=None, forcar=False, streaming=True,
+                   max_downloads=4, **opcoes):
+    """
+    Processa vários Shorts em paralelo, cada um em seu próprio workspace.
+    Os downloads rodam em um pool de threads próprio e cada job entra no pool
+    de processos assim que seu vídeo termina de baixar. Os jobs compartilham um
+    agendador (utils.agendador): as etapas de CPU nunca ocupam mais vagas que o
+    número de núcleos, enquanto os jobs que esperam a rede seguem em paralelo.
+    
+    Args:
+        urls (list): Lista de URLs do YouTube Shorts
+        pasta_jobs (str): Diretório raiz onde cada job cria sua pasta
+        max_workers (int, optional): Número de processos. Padrão: o dobro dos
+                                     núcleos da máquina, para que jobs esperando
+                                     a rede não deixem núcleos ociosos
+        forcar (bool): Se True, executa todas as etapas de todos os jobs
+        streaming (bool): Se True, processa os trechos de cada job em fluxo contínuo
+        max_downloads (int): Número máximo de downloads simultâneos
+        **opcoes: Demais opções de Shortstranslate, iguais para todos os jobs.
+                  Com audio_primeiro, o lote baixa antes só o áudio de cada job;
+                  com codec_final, jobs já montados só recodificam o final,
+                  vários ao mesmo tempo
+        
+    Returns:
+        list: Resumos dos jobs, na ordem das URLs
+    """
+    # Remove duplicatas mantendo a ordem, já que o workspace é definido pelo ID
+    urls = list(dict.fromkeys(u.strip() for u in urls if u.strip()))
+    if not urls:
+        return []
+    
+    os.makedirs(pasta_jobs, exist_ok=True)
+    max_workers = max_workers or 2 * (os.cpu_count() or 1)
+    
+    if len(urls) == 1 or max_workers == 1:
+        # Sem paralelismo, roda no próprio processo e evita o custo de criar workers
+        resumos = [_executar_job(url, pasta_jobs, forcar, streaming, **opcoes) for url in urls]
+    else:
+        resumos = _executar_em_processos(urls, pasta_jobs, max_workers, forcar, streaming,
+                                         max_downloads, **opcoes)
+    
+    caminho_resumo = os.path.join(pasta_jobs, "resumo_lote.json")
+    with open(caminho_resumo, "w", encoding="utf-8") as f:
+        json.dump(resumos, f, ensure_ascii=False, indent=2)
+    print(f"Resumo do lote salvo em: {caminho_resumo}")
+    
+    return resumos
+
+
+def _executar_em_processos(urls, pasta_jobs, max_workers, forcar, streaming, max_downloads=4,
+                           **opcoes):
+    """
+    Executa os jobs em um pool de processos. Os vídeos são baixados antes, em
+    threads (no máximo max_downloads ao mesmo tempo), e cada job é enviado ao
+    pool assim que seu download termina; se o download falhar, a etapa de
+    download do próprio job tenta de novo e registra o erro. Um único agendador
+    é criado aqui e instalado em cada processo, então vagas de CPU e limites de
+    rede valem para o lote inteiro.
+    
+    Args:
+        urls (list): URLs únicas
+        pasta_jobs (str): Diretório raiz dos workspaces
+        max_workers (int): Número de processos
+        forcar (bool): Se True, executa todas as etapas
+        streaming (bool): Se True, processa os trechos em fluxo contínuo
+        max_downloads (int): Número máximo de downloads simultâneos
+        **opcoes: Demais opções de Shortstranslate
+        
+    Returns:
+        list: Resumos dos jobs, na ordem das URLs
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+    from utils.agendador import Agendador, instalar_agendador, servicos_configurados
+    
+    servicos = servicos_configurados()
+    servicos["download"] = (max_downloads, servicos["download"][1])
+    agendador = Agendador(servicos=servicos, jobs=min(max_workers, len(urls)))
+    instalar_agendador(agendador)
+    
+    download_mod = carregar_modulo("download")
+    registro = download_mod.RegistroDownloads(_caminho_registro(pasta_jobs))
+    
+    def baixar(url):
+        pasta = os.path.join(pasta_jobs, video_id_da_url(url), "downloads")
+        return download_mod.download_shorts(url, pasta, registro,
+                                            "audio" if opcoes.get("audio_primeiro") else "completo")
+    
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(urls)),
+                             initializer=instalar_agendador, initargs=(agendador,)) as executor, \
+            ThreadPoolExecutor(max_workers=max(1, min(max_downloads, len(urls)))) as downloads:
+        pendentes = {downloads.submit(baixar, url): url for url in urls}
+        futuros = {}
+        for feito in as_completed(pendentes):
+            url = pendentes[feito]
+            futuros[url] = executor.submit(_executar_job, url, pasta_jobs, forcar, streaming,
+                                           **opcoes)
+        futuros = [futuros[url] for url in urls]
+        resumos = []
+        for url, futuro in zip(urls, futuros):
+            try:
+                resumos.append(futuro.result())
+            except Exception as e:
+                resumos.append({"url": url, "status": "erro", "erro": f"{type(e).__name__}: {e}"})
+    return resumos
+
+
+def enfileirar_jobs(caminho_fila, urls, streaming=True, **opcoes):
+    """
+    Adiciona jobs à fila persistente (ver utils.fila). URLs já concluídas ou
+    em erro voltam a pendentes; as etapas em cache fazem a nova execução barata.
+
+    Args:
+        caminho_fila (str): Banco SQLite da fila
+        urls (list): URLs do YouTube Shorts
+        streaming (bool): Se True, processa os trechos em fluxo contínuo
+        **opcoes: Demais opções de Shortstranslate, serializáveis em JSON
+
+    Returns:
+        list: IDs dos jobs na fila
+    """
+    from utils.fila import FilaJobs
+
+    fila = FilaJobs(caminho_fila)
+    try:
+        ids = [fila.enfileirar(url, {"streaming": streaming, **opcoes}, reabrir=True)
+               for url in dict.fromkeys(u.strip() for u in urls if u.strip())]
+    finally:
+        fila.fechar()
+    print(f"{len(ids)} job(s) na fila {caminho_fila}")
+    return ids
+
+
+def trabalhar_fila(caminho_fila, pasta_jobs="jobs", processos=1, continuar=False, forcar=False):
+    """
+    Executa os jobs da fila persistente até ela esvaziar (ou para sempre, com
+    continuar). Cada processo é um trabalhador independente: outros hosts que
+    compartilham pasta_jobs e o banco podem rodar trabalhadores ao mesmo tempo.
+
+    Args:
+        caminho_fila (str): Banco SQLite da fila
+        pasta_jobs (str): Diretório raiz dos workspaces
+        processos (int): Número de trabalhadores neste host
+        continuar (bool): Se True, espera novos jobs em vez de sair com a fila vazia
+        forcar (bool): Se True, a primeira tentativa de cada job executa todas as etapas
+
+    Returns:
+        list: Resumos dos jobs executados por este host
+    """
+    if processos <= 1:
+        return _trabalhador_fila(caminho_fila, pasta_jobs, continuar, forcar)
+
+    from concurrent.futures import ProcessPoolExecutor
+    from utils.agendador import Agendador, instalar_agendador
+
+    agendador = Agendador(jobs=processos)
+    with ProcessPoolExecutor(max_workers=processos, initializer=instalar_agendador,
+                             initargs=(agendador,)) as executor:
+        futuros = [executor.submit(_trabalhador_fila, caminho_fila, pasta_jobs, continuar, forcar)
+                   for _ in range(processos)]
+        return [resumo for futuro in futuros for resumo in futuro.result()]
+
+
+def _trabalhador_fila(caminho_fila, pasta_jobs, continuar=False, forcar=False):
+    """
+    Laço de um trabalhador: reivindica um job, executa e registra o resultado.
+    Sai quando não há jobs pendentes nem em execução por outros trabalhadores
+    (um deles pode cair e o job voltar à fila).
+
+    Args:
+        caminho_fila (str): Banco SQLite da fila
+        pasta_jobs (str): Diretório raiz dos workspaces
+        continuar (bool): Se True, nunca sai
+        forcar (bool): Se True, a primeira tentativa de cada job executa todas as etapas
+
+    Returns:
+        list: Resumos dos jobs executados por este trabalhador
+    """
+    from utils.fila import FilaJobs, identificar_trabalhador
+
+    fila = FilaJobs(caminho_fila)
+    trabalhador = identificar_trabalhador()
+    resumos = []
+    try:
+        while True:
+            job = fila.reivindicar(trabalhador)
+            if job is not None:
+                resumos.append(_executar_job_da_fila(fila, job, trabalhador, pasta_jobs, forcar))
+            elif continuar or fila.pendentes():
+                time.sleep(ESPERA_FILA_S)
+            else:
+                return resumos
+    finally:
+        fila.fechar()
+
+
+def _executar_job_da_fila(fila, job, trabalhador, pasta_jobs, forcar=False):
+    """
+    Executa um job reivindicado, renovando seu prazo e registrando cada etapa
+    e cada trecho dublado como unidade do job na fila.
+
+    Args:
+        fila (FilaJobs): Fila do job
+        job (dict): Job retornado por FilaJobs.reivindicar
+        trabalhador (str): Identificador deste trabalhador
+        pasta_jobs (str): Diretório raiz dos workspaces
+        forcar (bool): Se True e for a primeira tentativa, executa todas as etapas
+
+    Returns:
+        dict: Resumo do job
+    """
+    from utils.fila import Renovador
+
+    opcoes = dict(job["opcoes"])
+    streaming = opcoes.pop("streaming", True)
+    if "idiomas" in opcoes:
+        # JSON não tem tuplas
+        opcoes["idiomas"] = [tuple(par) for par in opcoes["idiomas"]]
+    url = job["url"]
+    instancia = Shortstranslate(url, os.path.join(pasta_jobs, video_id_da_url(url)), streaming,
+                                _caminho_registro(pasta_jobs), **opcoes)
+
+    print(f"Job {job['id']} ({url}), tentativa {job['tentativas']}")
+    with Renovador(fila, job["id"], trabalhador):
+        resumo = instancia.executar(forcar and job["tentativas"] == 1,
+                                    lambda evento: _registrar_unidade(fila, job["id"], evento))
+
+    if resumo["status"] == "ok":
+        fila.concluir(job["id"], trabalhador, resumo)
+    else:
+        espera = fila.falhar(job["id"], trabalhador, resumo["erro"], resumo)
+        if espera is not None:
+            print(f"Job {job['id']} falhou; nova tentativa em {espera:.0f}s: {resumo['erro']}")
+        else:
+            print(f"Job {job['id']} falhou sem novas tentativas: {resumo['erro']}")
+    return resumo
+
+
+def _registrar_unidade(fila, job_id, evento):
+    """
+    Converte um evento de progresso do job em unidade da fila. Falhas ao gravar
+    não interrompem o job.
+
+    Args:
+        fila (FilaJobs): Fila do job
+        job_id (int): ID do job
+        evento (dict): Evento 'etapa' (inicio, fim, pular) ou 'trecho' (fim, erro)
+    """
+    import sqlite3
+    from utils.fila import CONCLUIDO, ERRO, EXECUTANDO
+
+    acao = evento["acao"]
+    if evento["evento"] == "etapa":
+        unidade = f"etapa:{evento['etapa']}"
+        estado = EXECUTANDO if acao == "inicio" else CONCLUIDO
+        nova_tentativa = acao == "inicio"
+    else:
+        unidade = f"{evento['etapa']}:{evento['idioma']}:{evento['trecho']}"
+        estado = ERRO if acao == "erro" else CONCLUIDO
+        nova_tentativa = True
+    try:
+        fila.registrar_unidade(job_id, unidade, estado, evento.get("duracao"), evento.get("erro"),
+                               nova_tentativa)
+    except sqlite3.Error as e:
+        print(f"Erro ao registrar {unidade} do job {job_id}: {e}")
+
+
+def _mostrar_fila(caminho_fila):
+    """
+    Mostra o estado de cada job da fila persistente e suas unidades com erro.
+
+    Args:
+        caminho_fila (str): Banco SQLite da fila
+    """
+    from utils.fila import CONCLUIDO, ERRO, FilaJobs
+
+    fila = FilaJobs(caminho_fila)
+    try:
+        for job in fila.listar():
+            cor = {CONCLUIDO: Fore.GREEN, ERRO: Fore.RED}.get(job["estado"], Fore.YELLOW)
+            detalhe = f" {job['erro']}" if job["erro"] else ""
+            print(cor + f"[{job['estado']}] #{job['id']} {job['url']} "
+                  f"(tentativas: {job['tentativas']}){detalhe}" + Style.RESET_ALL)
+            for unidade, dados in fila.unidades(job["id"]).items():
+                if dados["estado"] == ERRO:
+                    print(f"    {unidade}: {dados['erro']}")
+    finally:
+        fila.fechar()
+
+
+def aquecer():
+    """
+    Carrega de antemão o que todo job usa: módulos de áudio, pool de ASR com o
+    motor configurado, tradutor com o cache aberto e sessão HTTP da ElevenLabs.
+    Usado pelo modo servidor, para que cada job pague só o trabalho real.
+    """
+    job = Shortstranslate("")
+    man_aud = job._modulo_man_aud()
+    job._modulo_json_form()
+    
+    transcribe = man_aud._carregar_elabs('transcribe')
+    if job.config_asr.motor != "vosk" or os.path.isdir(job.config_asr.modelo):
+        transcribe.obter_pool(job.config_asr)
+    else:
+        print(f"Modelo Vosk não encontrado em {job.config_asr.modelo}; o ASR carregará no primeiro job.")
+    
+    man_aud._carregar_elabs('traduct').obter_tradutor()
+    
+    labs = man_aud._carregar_elabs('labs')
+    if labs.ELEVENLABS_API_KEY:
+        labs.obter_cliente(labs.ELEVENLABS_API_KEY)
+
+
+def servir_jobs(pasta_jobs="jobs", host="127.0.0.1", porta=8765, socket_unix=None):
+    """
+    Inicia o modo servidor: aquece o processo e atende jobs enviados por HTTP
+    (TCP ou socket Unix), transmitindo o progresso de cada etapa.
+    
+    Args:
+        pasta_jobs (str): Diretório raiz dos workspaces
+        host (str): Endereço TCP
+        porta (int): Porta TCP
+        socket_unix (str, optional): Caminho do socket Unix, em vez de TCP
+    """
+    inicio = time.perf_counter()
+    aquecer()
+    print(f"Processo aquecido em {time.perf_counter() - inicio:.2f}s")
+    
+    def executar_job(pedido, progresso):
+        url = pedido["url"]
+        workspace = os.path.join(pasta_jobs, video_id_da_url(url))
+        job = Shortstranslate(url, workspace, not pedido.get("etapas_separadas", False),
+                              _caminho_registro(pasta_jobs), bool(pedido.get("audio_primeiro", False)),
+                              pedido.get("codec_final", "pcm"), bool(pedido.get("asr_unico", False)),
+                              interpretar_idiomas(pedido.get("idiomas", IDIOMA_PADRAO)))
+        return job.executar(bool(pedido.get("forcar", False)), progresso)
+    
+    carregar_modulo("servidor").servir(executar_job, host, porta, socket_unix)
+
+
+def _mostrar_status(urls, pasta_jobs):
+    """
+    Mostra o resumo da última execução dos jobs, sem carregar nenhuma etapa.
+    
+    Args:
+        urls (list): URLs dos jobs. Se vazia, lista todos os jobs de pasta_jobs
+        pasta_jobs (str): Diretório raiz dos workspaces
+    """
+    if urls:
+        workspaces = [os.path.join(pasta_jobs, video_id_da_url(url)) for url in urls]
+    elif os.path.isdir(pasta_jobs):
+        workspaces = sorted(os.path.join(pasta_jobs, nome) for nome in os.listdir(pasta_jobs)
+                            if os.path.isdir(os.path.join(pasta_jobs, nome)))
+    else:
+        workspaces = []
+    
+    for workspace in workspaces:
+        try:
+            with open(os.path.join(workspace, "resumo.json"), "r", encoding="utf-8") as f:
+                resumo = json.load(f)
+        except (OSError, ValueError):
+            print(Fore.YELLOW + f"[nunca executado] {workspace}" + Style.RESET_ALL)
+            continue
+        cor = Fore.GREEN if resumo["status"] == "ok" else Fore.RED
+        detalhe = resumo.get("saida") if resumo["status"] == "ok" else resumo.get("erro")
+        print(cor + f"[{resumo['status']}] {resumo['url']} ({resumo.get('duracao', 0):.1f}s) {detalhe}"
+              + Style.RESET_ALL)
+
+
+def _ler_urls_arquivo(caminho):
+    """
+    Lê URLs de um arquivo texto (uma por linha, linhas com # são ignoradas).
+    
+    Args:
+        caminho (str): Caminho do arquivo de URLs
+        
+    Returns:
+        list: Lista de URLs
+    """
+    with open(caminho, "r", encoding="utf-8") as f:
+        return [linha.strip() for linha in f
+                if linha.strip() and not linha.lstrip().startswith("#")]
+
 
 def main():
     """
     Função principal que executa o fluxo completo de processamento.
+    Com URLs ou --arquivo, processa todas em lote; sem argumentos, pede uma URL
+    apenas se estiver em um terminal interativo. Sai com código 1 se algum job falhar.
+    
+    Dependências pesadas (yt_dlp, pydub, vosk, numpy) só são importadas pelas
+    etapas que as usam, então --status, --dry-run e execuções em que todas as
+    etapas estão em cache iniciam rápido (ver benchmarks/inicializacao.py).
     """
-    url = input("Digite a URL do YouTube Shorts: ")
-    checker = Shortstranslate(url)
+    parser = argparse.ArgumentParser(description="Processador de vídeos YouTube Shorts")
+    parser.add_argument("urls", nargs="*",
+                        help="URLs do YouTube Shorts, de canais (aba Shorts) ou de playlists")
+    parser.add_argument("-a", "--arquivo", help="Arquivo com uma URL por linha")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Número de jobs em paralelo (padrão: o dobro dos núcleos; "
+                             "as etapas de CPU nunca passam do número de núcleos)")
+    parser.add_argument("--downloads", type=int, default=4,
+                        help="Número máximo de downloads simultâneos no lote")
+    parser.add_argument("--pasta-jobs", default="jobs",
+                        help="Diretório dos workspaces de cada job")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Mostra quais etapas rodariam, sem executar nada")
+    parser.add_argument("--status", action="store_true",
+                        help="Mostra o resultado da última execução de cada job em --pasta-jobs")
+    parser.add_argument("--forcar", action="store_true",
+                        help="Executa todas as etapas, mesmo as que não mudaram")
+    parser.add_argument("--etapas-separadas", action="store_true",
+                        help="Recorte, ASR, tradução e TTS em etapas separadas, sem streaming")
+    parser.add_argument("--audio-primeiro", action="store_true",
+                        help="Baixa só o áudio para começar o processamento e o vídeo em paralelo")
+    parser.add_argument("--codec-final", choices=["pcm", "aac", "opus"], default="pcm",
+                        help="Áudio do vídeo final: pcm (AVI) ou aac/opus (MP4 com faststart, "
+                             "sem WAV intermediário)")
+    parser.add_argument("--asr-unico", action="store_true",
+                        help="Uma passada de ASR na trilha inteira gera intervalos e transcrições "
+                             "juntos, sem detecção de intervalos separada")
+    parser.add_argument("--idiomas", default=IDIOMA_PADRAO,
+                        help="Idiomas de destino separados por vírgula, com voz opcional "
+                             "(ex.: en,es:VOICE_ID,fr). Com mais de um, gera um MP4 com uma "
+                             "trilha de áudio por idioma")
+    parser.add_argument("--memoria-mb", type=float,
+                        help="Teto de memória (MB) de cada buffer das etapas de áudio; o áudio "
+                             "é processado em blocos, então vídeos longos cabem no mesmo teto")
+    parser.add_argument("--profile", action="store_true",
+                        help="Mede cada etapa e grava perfil.json e perfil.trace.json (Chrome) no workspace")
+    parser.add_argument("--serve", action="store_true",
+                        help="Mantém o processo aquecido e recebe jobs por HTTP (POST /jobs)")
+    parser.add_argument("--porta", type=int, default=8765, help="Porta do modo --serve")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço do modo --serve")
+    parser.add_argument("--socket", help="Socket Unix do modo --serve, em vez de host/porta")
+    parser.add_argument("--fila",
+                        help="Fila persistente (SQLite): as URLs informadas são enfileiradas em vez "
+                             "de executadas; --status mostra a fila")
+    parser.add_argument("--trabalhar", action="store_true",
+                        help="Executa os jobs de --fila com -j trabalhadores (padrão: 1), retomando "
+                             "jobs de trabalhadores que caíram; outros hosts podem usar a mesma fila")
+    parser.add_argument("--continuar", action="store_true",
+                        help="Com --trabalhar, espera novos jobs em vez de sair com a fila vazia")
+    args = parser.parse_args()
+    
+    if args.profile:
+        ativar_rastreio()
+    if args.memoria_mb:
+        definir_limite_memoria(args.memoria_mb)
+    
+    if args.serve:
+        servir_jobs(args.pasta_jobs, args.host, args.porta, args.socket)
+        return
     
-    checker.download()
-    checker.extcaud()
-    checker.mostrar_intervalos()
-    checker.gerar_video_final()
+    urls = list(args.urls)
+    if args.arquivo:
+        urls.extend(_ler_urls_arquivo(args.arquivo))
+    if any(not re.search(r"shorts/[\w-]+", url) for url in urls):
+        # Canais e playlists viram um job por Short; fora do --status, os Shorts
+        # já registrados como baixados não viram jobs de novo
+        download_mod = carregar_modulo("download")
+        registro = None if args.status else download_mod.RegistroDownloads(
+            _caminho_registro(args.pasta_jobs))
+        urls = download_mod.expandir_urls(urls, registro)
+    
+    if args.status:
+        if args.fila:
+            _mostrar_fila(args.fila)
+        else:
+            _mostrar_status(urls, args.pasta_jobs)
+        return
+    if args.trabalhar and not args.fila:
+        parser.error("--trabalhar exige --fila")
+    
+    try:
+        idiomas = interpretar_idiomas(args.idiomas)
+    except ValueError as e:
+        parser.error(str(e))
+    opcoes = {"audio_primeiro": args.audio_primeiro, "codec_final": args.codec_final,
+              "asr_unico": args.asr_unico, "idiomas": idiomas}
+    if args.fila:
+        if urls:
+            enfileirar_jobs(args.fila, urls, not args.etapas_separadas, **opcoes)
+        if args.trabalhar:
+            trabalhar_fila(args.fila, args.pasta_jobs, args.jobs or 1, args.continuar, args.forcar)
+            _mostrar_fila(args.fila)
+        elif not urls:
+            parser.error("informe URLs para enfileirar ou --trabalhar")
+        return
+    if not urls:
+        if not sys.stdin.isatty():
+            parser.error("informe ao menos uma URL ou --arquivo")
+        url = input("Digite a URL do YouTube Shorts: ")
+        jobs = [Shortstranslate(url, streaming=not args.etapas_separadas, **opcoes)]
+    else:
+        jobs = [Shortstranslate(url, os.path.join(args.pasta_jobs, video_id_da_url(url)),
+                                not args.etapas_separadas, _caminho_registro(args.pasta_jobs),
+                                **opcoes)
+                for url in urls]
+    
+    if args.dry_run:
+        for job in jobs:
+            print(f"{job.url} ({job.workspace}):")
+            for nome, acao, motivo in job.planejar():
+                cor = Fore.YELLOW if acao == "executar" else Fore.GREEN
+                print(cor + f"  {nome:<12} {acao:<9} {motivo}" + Style.RESET_ALL)
+        return
+    
+    if not urls:
+        resumos = [jobs[0].executar(args.forcar)]
+    else:
+        resumos = processar_lote(urls, args.pasta_jobs, args.jobs, args.forcar,
+                                 not args.etapas_separadas, args.downloads, **opcoes)
+    for resumo in resumos:
+        cor = Fore.GREEN if resumo["status"] == "ok" else Fore.RED
+        print(cor + f"[{resumo['status']}] {resumo['url']}" + Style.RESET_ALL)
+    
+    if any(resumo["status"] != "ok" for resumo in resumos):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
     main()
-
-
-
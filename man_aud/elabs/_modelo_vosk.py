@@ -0,0 +1,21 @@
+"""
+Módulo de Pré-carregamento do Modelo Vosk
+Este módulo é importado pelo fork server do pool de ASR antes de criar os workers.
+O modelo indicado em POLIGLOTA_VOSK_MODEL é carregado uma única vez aqui e
+compartilhado copy-on-write por todos os processos filhos.
+"""
+
+import os
+
+CAMINHO = os.environ.get("POLIGLOTA_VOSK_MODEL")
+MODELO = None
+
+if CAMINHO:
+    try:
+        from vosk import Model, SetLogLevel
+
+        SetLogLevel(-1)
+        MODELO = Model(CAMINHO)
+    except Exception as e:
+        print(f"Não foi possível pré-carregar o modelo Vosk: {e}")
+        MODELO = None
@@ -0,0 +1,293 @@
+"""
+Módulo de Pool de Workers de ASR
+Este módulo mantém um pool persistente de processos de reconhecimento de fala.
+Cada worker cria o motor de ASR configurado (ver motores_asr) uma única vez; em
+sistemas com fork server o modelo Vosk é pré-carregado no servidor e herdado
+copy-on-write pelos workers.
+"""
+
+import asyncio
+import atexit
+import multiprocessing
+import os
+
+from man_aud.elabs.motores_asr import configuracao_asr
+from utils.agendador import obter_agendador
+from utils.rastreio import drenar_eventos, incorporar_eventos, rastrear
+
+# Motor de ASR do processo worker (definido pelo inicializador)
+_MOTOR = None
+# Erro ao criar o motor no worker; devolvido como erro de cada tarefa
+_ERRO_MOTOR = None
+
+# Pools ativos no processo atual, indexados por (configuração, processos)
+_POOLS = {}
+
+
+class PoolASR:
+    """
+    Pool de processos que transcrevem arquivos WAV com um motor de ASR residente.
+    """
+
+    def __init__(self, config, processos=None):
+        """
+        Cria o pool e dispara o carregamento do modelo nos workers.
+        
+        Args:
+            config (ConfigASR): Motor, modelo, quadros por bloco e threads por worker
+            processos (int, optional): Número de workers. Padrão: vagas de CPU do
+                                       job no agendador (ver
+                                       Agendador.vagas_por_job) divididas pelas
+                                       threads de cada worker
+        """
+        self.config = config
+        self.processos = processos or max(1, obter_agendador().vagas_por_job() // config.threads)
+        
+        ctx = _criar_contexto(config)
+        self._pool = ctx.Pool(
+            self.processos,
+            initializer=_inicializar_worker,
+            initargs=(config,),
+        )
+
+    def transcrever(self, caminhos):
+        """
+        Distribui os arquivos entre os workers e coleta as transcrições.
+        
+        Args:
+            caminhos (list): Caminhos dos arquivos WAV
+            
+        Returns:
+            dict: Nome do arquivo -> lista de resultados de transcrição (JSON)
+        """
+        resultados = {}
+        # chunksize=1: recortes têm durações muito diferentes, então cada worker
+        # pega o próximo arquivo assim que termina o anterior
+        for caminho, resultado, eventos in self._pool.imap_unordered(_transcrever_no_worker, caminhos, chunksize=1):
+            resultados[os.path.basename(caminho)] = resultado
+            incorporar_eventos(eventos)
+        return resultados
+
+    def transcrever_com_intervalos(self, caminho, gap, min_duration, padding):
+        """
+        Reconhece um arquivo inteiro em um worker, com tempo por palavra,
+        devolvendo intervalos de fala e textos (ver transcribe.transcrever_com_intervalos).
+        
+        Args:
+            caminho (str): Caminho do WAV mono 16 kHz
+            gap (float): Pausa (s) que separa dois intervalos
+            min_duration (float): Duração mínima (s) de um intervalo
+            padding (float): Margem (s) em volta de cada intervalo
+            
+        Returns:
+            dict: {'intervalos', 'textos'} ou {'erro'}
+        """
+        resultado, eventos = self._pool.apply(
+            _transcrever_com_intervalos_no_worker, (caminho, gap, min_duration, padding))
+        incorporar_eventos(eventos)
+        return resultado
+
+    def transcrever_async(self, item):
+        """
+        Envia um arquivo ou trecho ao pool sem bloquear o loop asyncio atual.
+        
+        Args:
+            item (str | Segmento): Caminho do arquivo WAV ou trecho do PCM
+                                   compartilhado (ver utils.pcm)
+            
+        Returns:
+            asyncio.Future: Resolve para a lista de resultados de transcrição
+        """
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        
+        def concluir(resultado):
+            incorporar_eventos(resultado[2])
+            loop.call_soon_threadsafe(_resolver, futuro, resultado[1], None)
+        
+        def falhar(erro):
+            loop.call_soon_threadsafe(_resolver, futuro, None, erro)
+        
+        self._pool.apply_async(_transcrever_no_worker, (item,),
+                               callback=concluir, error_callback=falhar)
+        return futuro
+
+    def fechar(self):
+        """
+        Encerra os workers do pool.
+        """
+        self._pool.close()
+        self._pool.join()
+
+
+def obter_pool(config=None, processos=None):
+    """
+    Retorna o pool persistente para a configuração, criando-o na primeira chamada.
+    
+    Args:
+        config (ConfigASR, optional): Configuração do ASR. Padrão: configuracao_asr()
+        processos (int, optional): Número de workers. Padrão: vagas de CPU do job
+                                   divididas pelas threads de cada worker
+        
+    Returns:
+        PoolASR: Pool reutilizado entre chamadas no mesmo processo
+    """
+    if config is None:
+        config = configuracao_asr()
+    chave = (config, processos)
+    if chave not in _POOLS:
+        _POOLS[chave] = PoolASR(config, processos)
+    return _POOLS[chave]
+
+
+def encerrar_pools():
+    """
+    Encerra todos os pools criados no processo atual.
+    """
+    while _POOLS:
+        _, pool = _POOLS.popitem()
+        pool.fechar()
+
+
+atexit.register(encerrar_pools)
+
+
+def _resolver(futuro, resultado, erro):
+    """
+    Conclui um futuro asyncio com resultado ou erro, se ainda estiver pendente.
+    
+    Args:
+        futuro (asyncio.Future): Futuro a concluir
+        resultado: Valor do resultado
+        erro (BaseException): Exceção ocorrida ou None
+    """
+    if futuro.done():
+        return
+    if erro is not None:
+        futuro.set_exception(erro)
+    else:
+        futuro.set_result(resultado)
+
+
+def _criar_contexto(config):
+    """
+    Escolhe o contexto de multiprocessing para o pool.
+    
+    Com fork server disponível, o modelo Vosk é pré-carregado no servidor para
+    que todos os workers compartilhem suas páginas de memória. Caso contrário
+    (ex.: Windows), usa spawn e cada worker carrega o modelo uma vez. Os demais
+    motores são sempre carregados pelo próprio worker.
+    
+    Args:
+        config (ConfigASR): Configuração do ASR
+        
+    Returns:
+        multiprocessing.context.BaseContext: Contexto escolhido
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    
+    ctx = multiprocessing.get_context("forkserver")
+    if config.motor == "vosk":
+        # O fork server lê o ambiente na primeira inicialização; depois disso
+        # modelos diferentes são carregados pelo próprio worker
+        os.environ.setdefault("POLIGLOTA_VOSK_MODEL", os.path.abspath(config.modelo))
+        ctx.set_forkserver_preload(["man_aud.elabs._modelo_vosk"])
+    return ctx
+
+
+def _inicializar_worker(config):
+    """
+    Inicializa o worker criando o motor de ASR, reaproveitando o modelo Vosk
+    pré-carregado quando possível.
+    
+    Uma falha aqui não pode escapar: o multiprocessing.Pool recriaria o worker
+    sem parar e as tarefas nunca terminariam. O erro fica guardado e cada
+    tarefa o devolve (ver _motor).
+    
+    Args:
+        config (ConfigASR): Configuração do ASR
+    """
+    global _MOTOR, _ERRO_MOTOR
+    
+    from man_aud.elabs import motores_asr
+    
+    try:
+        if config.motor == "vosk":
+            from man_aud.elabs import _modelo_vosk
+            
+            modelo = None
+            if (_modelo_vosk.MODELO is not None
+                    and os.path.abspath(_modelo_vosk.CAMINHO) == os.path.abspath(config.modelo)):
+                modelo = _modelo_vosk.MODELO
+            _MOTOR = motores_asr.MotorVosk(config, modelo)
+        else:
+            _MOTOR = motores_asr.criar_motor(config)
+    except Exception as e:
+        _MOTOR = None
+        _ERRO_MOTOR = f"Não foi possível carregar o motor {config.motor} ({config.modelo}): {e}"
+
+
+def _motor():
+    """
+    Retorna o motor do worker.
+    
+    Returns:
+        MotorASR: Motor criado pelo inicializador
+        
+    Raises:
+        RuntimeError: Se o motor não pôde ser criado
+    """
+    if _MOTOR is None:
+        raise RuntimeError(_ERRO_MOTOR or "Motor de ASR não inicializado")
+    return _MOTOR
+
+
+def _transcrever_no_worker(item):
+    """
+    Transcreve um arquivo ou um trecho mapeado em memória no worker,
+    usando o motor residente.
+    
+    Args:
+        item (str | Segmento): Caminho do arquivo WAV ou trecho do PCM compartilhado
+        
+    Returns:
+        tuple: (item, lista de resultados de transcrição, eventos de rastreio do worker)
+    """
+    from man_aud.elabs.transcribe import _transcrever_arquivo, _transcrever_segmento
+    
+    try:
+        motor = _motor()
+        if isinstance(item, str):
+            with rastrear(motor.config.motor, "asr", arquivo=os.path.basename(item)):
+                resultado = _transcrever_arquivo(item, motor)
+        else:
+            with rastrear(motor.config.motor, "asr", bytes_pcm=item.tamanho):
+                resultado = _transcrever_segmento(item, motor)
+    except Exception as e:
+        resultado = [f"Erro: {str(e)}"]
+    return item, resultado, drenar_eventos()
+
+
+def _transcrever_com_intervalos_no_worker(caminho, gap, min_duration, padding):
+    """
+    Executa a passada única de ASR com tempo por palavra no worker.
+    
+    Args:
+        caminho (str): Caminho do WAV mono 16 kHz
+        gap (float): Pausa (s) que separa dois intervalos
+        min_duration (float): Duração mínima (s) de um intervalo
+        padding (float): Margem (s) em volta de cada intervalo
+        
+    Returns:
+        tuple: (resultado, eventos de rastreio do worker)
+    """
+    from man_aud.elabs.transcribe import _transcrever_com_palavras
+    
+    try:
+        motor = _motor()
+        with rastrear(motor.config.motor, "asr", arquivo=os.path.basename(caminho), palavras=True):
+            resultado = _transcrever_com_palavras(caminho, motor, gap, min_duration, padding)
+    except Exception as e:
+        resultado = {"erro": str(e)}
+    return resultado, drenar_eventos()
@@ -0,0 +1,219 @@
+"""
+Módulo de Cache de Traduções
+Este módulo fornece um cache persistente em SQLite para traduções, endereçado pelo
+conteúdo (backend, idioma de origem, idioma de destino e texto normalizado), com
+remoção das entradas menos usadas quando o tamanho total ultrapassa o limite
+configurado.
+
+O backend faz parte da chave para que traduções de um backend de teste (ex.:
+'stub') nunca sejam servidas como traduções de outro.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+CAMINHO_PADRAO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'cache', 'traducoes.sqlite3'
+)
+LIMITE_PADRAO_BYTES = 64 * 1024 * 1024
+# Gravações entre duas somas do tamanho real da tabela (outros processos também gravam)
+GRAVACOES_POR_VERIFICACAO = 100
+
+
+def normalizar_texto(texto):
+    """
+    Normaliza o texto para uso como chave do cache.
+    
+    Args:
+        texto (str): Texto original
+        
+    Returns:
+        str: Texto em NFC, sem espaços repetidos ou nas pontas
+    """
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', texto)).strip()
+
+
+def chave_traducao(backend, source, target, texto_normalizado):
+    """
+    Gera a chave de conteúdo de uma tradução.
+    
+    Args:
+        backend (str): Nome do backend que traduziu (ex.: 'google')
+        source (str): Idioma de origem
+        target (str): Idioma de destino
+        texto_normalizado (str): Texto já normalizado
+        
+    Returns:
+        str: Hash SHA-256 em hexadecimal
+    """
+    conteudo = f'{backend}\0{source}\0{target}\0{texto_normalizado}'
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+class CacheTraducao:
+    """
+    Cache de traduções em SQLite, seguro para várias threads e processos.
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO, limite_bytes=LIMITE_PADRAO_BYTES):
+        """
+        Abre (ou cria) o banco de cache.
+        
+        Args:
+            caminho (str): Caminho do arquivo SQLite
+            limite_bytes (int): Tamanho máximo somado de textos e traduções
+        """
+        self.caminho = caminho
+        self.limite_bytes = limite_bytes
+        self._lock = threading.Lock()
+        
+        if caminho != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conn = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        colunas = [linha[1] for linha in self._conn.execute('PRAGMA table_info(traducoes)')]
+        if colunas and 'backend' not in colunas:
+            # Cache antigo, sem o backend na chave: as entradas não seriam mais
+            # encontradas e podem ter vindo de um backend de teste
+            self._conn.execute('DROP TABLE traducoes')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS traducoes ('
+            ' chave TEXT PRIMARY KEY,'
+            ' backend TEXT NOT NULL,'
+            ' source TEXT NOT NULL,'
+            ' target TEXT NOT NULL,'
+            ' texto TEXT NOT NULL,'
+            ' traducao TEXT NOT NULL,'
+            ' tamanho INTEGER NOT NULL,'
+            ' acesso REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_traducoes_acesso ON traducoes(acesso)')
+        self._conn.commit()
+        # Tamanho estimado da tabela: somado a cada gravação e corrigido pela soma
+        # real ao aplicar o limite ou a cada GRAVACOES_POR_VERIFICACAO gravações
+        self._tamanho = self._somar_tamanho()
+        self._gravacoes = 0
+
+    def buscar(self, backend, source, target, textos):
+        """
+        Busca traduções já conhecidas.
+        
+        Args:
+            backend (str): Nome do backend
+            source (str): Idioma de origem
+            target (str): Idioma de destino
+            textos (list): Textos normalizados
+            
+        Returns:
+            dict: Texto normalizado -> tradução, apenas para os encontrados
+        """
+        chaves = {chave_traducao(backend, source, target, t): t for t in textos}
+        encontrados = {}
+        agora = time.time()
+        
+        with self._lock:
+            lista = list(chaves)
+            # SQLite limita o número de parâmetros por consulta
+            for i in range(0, len(lista), 500):
+                parte = lista[i:i + 500]
+                marcadores = ','.join('?' * len(parte))
+                linhas = self._conn.execute(
+                    f'SELECT chave, traducao FROM traducoes WHERE chave IN ({marcadores})', parte
+                ).fetchall()
+                for chave, traducao in linhas:
+                    encontrados[chaves[chave]] = traducao
+                self._conn.executemany(
+                    'UPDATE traducoes SET acesso = ? WHERE chave = ?',
+                    [(agora, chave) for chave, _ in linhas]
+                )
+            self._conn.commit()
+        
+        return encontrados
+
+    def salvar(self, backend, source, target, traducoes):
+        """
+        Grava novas traduções e aplica o limite de tamanho.
+        
+        Args:
+            backend (str): Nome do backend que traduziu
+            source (str): Idioma de origem
+            target (str): Idioma de destino
+            traducoes (dict): Texto normalizado -> tradução
+        """
+        if not traducoes:
+            return
+        agora = time.time()
+        linhas = [
+            (chave_traducao(backend, source, target, texto), backend, source, target, texto,
+             traducao, len(texto.encode('utf-8')) + len(traducao.encode('utf-8')), agora)
+            for texto, traducao in traducoes.items()
+        ]
+        
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO traducoes VALUES (?, ?, ?, ?, ?, ?, ?, ?)', linhas
+            )
+            self._conn.commit()
+            # Substituir uma entrada conta em dobro; a estimativa só erra para mais
+            self._tamanho += sum(linha[6] for linha in linhas)
+            self._gravacoes += 1
+            if self._gravacoes >= GRAVACOES_POR_VERIFICACAO:
+                self._tamanho = self._somar_tamanho()
+                self._gravacoes = 0
+            if self._tamanho > self.limite_bytes:
+                self._aplicar_limite()
+
+    def tamanho_total(self):
+        """
+        Retorna o tamanho somado das entradas do cache.
+        
+        Returns:
+            int: Total em bytes
+        """
+        with self._lock:
+            return self._somar_tamanho()
+
+    def fechar(self):
+        """
+        Fecha a conexão com o banco.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def _somar_tamanho(self):
+        """
+        Soma o tamanho real das entradas (percorre a tabela inteira).
+        
+        Returns:
+            int: Total em bytes
+        """
+        return self._conn.execute('SELECT COALESCE(SUM(tamanho), 0) FROM traducoes').fetchone()[0]
+
+    def _aplicar_limite(self):
+        """
+        Remove as entradas acessadas há mais tempo até ficar em 90% do limite.
+        Deve ser chamado com o lock adquirido.
+        """
+        total = self._somar_tamanho()
+        self._tamanho = total
+        self._gravacoes = 0
+        if total <= self.limite_bytes:
+            return
+        
+        alvo = int(self.limite_bytes * 0.9)
+        remover = []
+        for chave, tamanho in self._conn.execute('SELECT chave, tamanho FROM traducoes ORDER BY acesso'):
+            if total <= alvo:
+                break
+            remover.append((chave,))
+            total -= tamanho
+        
+        self._conn.executemany('DELETE FROM traducoes WHERE chave = ?', remover)
+        self._conn.commit()
+        self._tamanho = total
@@ -2,58 +2,379 @@
 Módulo de Geração de Áudio ElevenLabs
 Este módulo fornece funcionalidades para gerar áudios em inglês usando a API ElevenLabs,
 convertendo textos traduzidos em arquivos de áudio de alta qualidade.
+
+As requisições passam por um ClienteTTS com sessão HTTP reutilizada, concorrência
+limitada, novas tentativas com backoff exponencial (respeitando Retry-After) e
+cache em disco endereçado por (voice_id, modelo, texto, formato).
 """
 
+import hashlib
 import json
 import os
+import random
 import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from dotenv import load_dotenv
 
+from utils.agendador import obter_agendador
+from utils.rastreio import rastrear
+
 # Carrega variáveis de ambiente
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env'))
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+# Permite apontar para um servidor local (mock) em testes
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+
+PASTA_CACHE_PADRAO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'cache', 'tts'
+)
+# Formato padrão da API; o campo "output_format" no corpo era ignorado por ela
+FORMATO_PADRAO = "mp3_44100_128"
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+# Locks das entradas do cache: cada chave usa um deles, pelo hash do caminho
+LOCKS_CACHE = 64
+
+# Clientes reutilizados no processo, indexados por (api_key, base_url)
+_CLIENTES = {}
+_CLIENTES_LOCK = threading.Lock()
+
+
+class ErroTTS(Exception):
+    """
+    Erro definitivo ao sintetizar um texto (após esgotar as tentativas).
+    """
+
+
+class ClienteTTS:
+    """
+    Cliente HTTP da ElevenLabs com pool de conexões, concorrência limitada,
+    backoff exponencial e cache de resultados em disco.
+    """
+
+    def __init__(self, api_key, base_url=ELEVENLABS_BASE_URL, max_concorrencia=4,
+                 max_tentativas=5, espera_base=1.0, timeout=(5, 120),
+                 pasta_cache=PASTA_CACHE_PADRAO):
+        """
+        Args:
+            api_key (str): Chave da API ElevenLabs
+            base_url (str): URL base da API (ou de um servidor mock)
+            max_concorrencia (int): Número máximo de requisições simultâneas
+            max_tentativas (int): Tentativas por texto antes de desistir
+            espera_base (float): Espera inicial do backoff em segundos
+            timeout (tuple): Timeouts de conexão e leitura em segundos
+            pasta_cache (str): Pasta do cache de áudios sintetizados
+        """
+        self.base_url = base_url.rstrip("/")
+        self.max_concorrencia = max_concorrencia
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.timeout = timeout
+        self.pasta_cache = pasta_cache
+        os.makedirs(pasta_cache, exist_ok=True)
+        # Um lock por chave de cache evita sintetizar o mesmo texto duas vezes ao mesmo
+        # tempo; o conjunto é fixo para não crescer com os recortes (modo servidor)
+        self._locks = [threading.Lock() for _ in range(LOCKS_CACHE)]
+        
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max_concorrencia)
+        self.session.mount("http://", adaptador)
+        self.session.mount("https://", adaptador)
+        self.session.headers.update({
+            "xi-api-key": api_key,
+            "Content-Type": "application/json",
+        })
+
+    def sintetizar(self, texto, voice_id, caminho_saida, modelo="eleven_multilingual_v2",
+                   formato=FORMATO_PADRAO):
+        """
+        Gera o áudio de um texto, usando o cache quando possível.
+        
+        Args:
+            texto (str): Texto a sintetizar
+            voice_id (str): ID da voz
+            caminho_saida (str): Onde gravar o áudio
+            modelo (str): Modelo de voz ElevenLabs
+            formato (str): Formato de saída da API (ex.: mp3_44100_128)
+            
+        Returns:
+            tuple: (caminho_saida, veio_do_cache)
+            
+        Raises:
+            ErroTTS: Se a API recusar o texto ou as tentativas se esgotarem
+        """
+        caminho_cache = self._caminho_cache(texto, voice_id, modelo, formato)
+        with self._lock_da_chave(caminho_cache):
+            veio_do_cache = os.path.exists(caminho_cache)
+            if not veio_do_cache:
+                self._baixar(texto, voice_id, modelo, formato, caminho_cache)
+        
+        shutil.copyfile(caminho_cache, caminho_saida)
+        return caminho_saida, veio_do_cache
+
+    def sintetizar_varios(self, tarefas, voice_id, modelo="eleven_multilingual_v2",
+                          formato=FORMATO_PADRAO):
+        """
+        Sintetiza vários textos em paralelo, limitado a max_concorrencia.
+        
+        Args:
+            tarefas (list): Lista de tuplas (texto, caminho_saida)
+            voice_id (str): ID da voz
+            modelo (str): Modelo de voz ElevenLabs
+            formato (str): Formato de saída da API
+            
+        Returns:
+            list: Para cada tarefa, (caminho_saida, veio_do_cache) ou a exceção ocorrida
+        """
+        def executar(tarefa):
+            texto, caminho_saida = tarefa
+            try:
+                return self.sintetizar(texto, voice_id, caminho_saida, modelo, formato)
+            except Exception as e:
+                return e
+        
+        if not tarefas:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_concorrencia, len(tarefas))) as executor:
+            return list(executor.map(executar, tarefas))
+
+    def fechar(self):
+        """
+        Fecha a sessão HTTP e suas conexões.
+        """
+        self.session.close()
+
+    def _lock_da_chave(self, caminho_cache):
+        """
+        Retorna o lock associado a uma entrada do cache. Chaves diferentes podem
+        dividir o mesmo lock; isso só as serializa.
+        
+        Args:
+            caminho_cache (str): Caminho da entrada no cache
+            
+        Returns:
+            threading.Lock: Lock da entrada
+        """
+        return self._locks[hash(caminho_cache) % len(self._locks)]
+
+    def _caminho_cache(self, texto, voice_id, modelo, formato):
+        """
+        Calcula o caminho do cache para uma síntese.
+        
+        Args:
+            texto (str): Texto a sintetizar
+            voice_id (str): ID da voz
+            modelo (str): Modelo de voz
+            formato (str): Formato de saída
+            
+        Returns:
+            str: Caminho do arquivo em cache
+        """
+        chave = hashlib.sha256(
+            json.dumps([voice_id, modelo, texto, formato], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        extensao = formato.split("_")[0]
+        return os.path.join(self.pasta_cache, chave[:2], f"{chave}.{extensao}")
+
+    def _baixar(self, texto, voice_id, modelo, formato, caminho_cache):
+        """
+        Faz a requisição com novas tentativas e grava a resposta em streaming.
+        Cada tentativa passa pelo agendador (vaga e taxa do serviço 'tts'); a cota
+        de caracteres é descontada só na primeira, e a espera entre tentativas
+        não ocupa vaga.
+        
+        Args:
+            texto (str): Texto a sintetizar
+            voice_id (str): ID da voz
+            modelo (str): Modelo de voz
+            formato (str): Formato de saída
+            caminho_cache (str): Destino final no cache
+            
+        Raises:
+            ErroTTS: Se a API recusar o texto ou as tentativas se esgotarem
+        """
+        url = f"{self.base_url}/v1/text-to-speech/{voice_id}"
+        dados = {"text": texto, "model_id": modelo}
+        os.makedirs(os.path.dirname(caminho_cache), exist_ok=True)
+        tmp = f"{caminho_cache}.{os.getpid()}.{threading.get_ident()}.part"
+        
+        agendador = obter_agendador()
+        ultimo_erro = None
+        for tentativa in range(self.max_tentativas):
+            try:
+                with agendador.servico("tts", caracteres=0 if tentativa else len(texto)), \
+                        rastrear("tts", "rede", tentativa=tentativa + 1, caracteres=len(texto)):
+                    with self.session.post(url, params={"output_format": formato}, json=dados,
+                                           stream=True, timeout=self.timeout) as resposta:
+                        if resposta.status_code == 200:
+                            with open(tmp, "wb") as f:
+                                for bloco in resposta.iter_content(chunk_size=64 * 1024):
+                                    f.write(bloco)
+                            os.replace(tmp, caminho_cache)
+                            return
+                    
+                        ultimo_erro = f"{resposta.status_code} - {resposta.text[:200]}"
+                        if resposta.status_code not in STATUS_REPETIVEIS:
+                            raise ErroTTS(ultimo_erro)
+                        espera = _espera_retry_after(resposta.headers.get("Retry-After"))
+            except requests.RequestException as e:
+                ultimo_erro = str(e)
+                espera = None
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            
+            if espera is None:
+                espera = self.espera_base * (2 ** tentativa) * (1 + random.random() * 0.25)
+            if tentativa + 1 < self.max_tentativas:
+                time.sleep(espera)
+        
+        raise ErroTTS(f"Tentativas esgotadas: {ultimo_erro}")
+
+
+def obter_cliente(api_key, base_url=ELEVENLABS_BASE_URL, **kwargs):
+    """
+    Retorna um ClienteTTS reutilizado no processo para a mesma chave e URL.
+    
+    Args:
+        api_key (str): Chave da API ElevenLabs
+        base_url (str): URL base da API
+        **kwargs: Demais opções repassadas ao ClienteTTS na criação
+        
+    Returns:
+        ClienteTTS: Cliente com a sessão HTTP já aberta
+    """
+    chave = (api_key, base_url)
+    with _CLIENTES_LOCK:
+        if chave not in _CLIENTES:
+            _CLIENTES[chave] = ClienteTTS(api_key, base_url, **kwargs)
+        return _CLIENTES[chave]
 
 
-def gerar_audios_ingles_elevenlabs(api_key=None, voice_id=None, modelo="eleven_multilingual_v2"):
+def gerar_audios_ingles_elevenlabs(api_key=None, voice_id=None, modelo="eleven_multilingual_v2",
+                                   pasta_recortes=None, cliente=None, pasta_saida=None,
+                                   caminho_json=None, idioma="en", progresso=None, traducoes=None):
     """
-    Lê arquivo de traduções em inglês e gera áudios com ElevenLabs, sobrescrevendo os recortes.
+    Lê arquivo de traduções em inglês e gera com ElevenLabs um áudio por recorte.
+    Com caminho_json e idioma, gera do mesmo modo os áudios de outro idioma.
+    Com traducoes, usa as frases já carregadas (ex.: do manifesto de trechos, ver
+    utils.manifesto) em vez de ler um JSON.
     
     Args:
         api_key (str, optional): Chave da API ElevenLabs
         voice_id (str): ID da voz (narrador)
         modelo (str): Modelo de voz ElevenLabs
+        pasta_recortes (str, optional): Pasta com os recortes e transcricoes_traduzido.json.
+                                       Se não informada, usa downloads/aud_recort.
+        cliente (ClienteTTS, optional): Cliente a usar. Se None, usa obter_cliente(api_key)
+        pasta_saida (str, optional): Onde gravar os áudios gerados, com o mesmo nome
+                                    do recorte. Se None, usa pasta_recortes/tts
+        caminho_json (str, optional): JSON de traduções. Se None, usa
+                                     pasta_recortes/transcricoes_traduzido.json
+        idioma (str): Idioma das traduções (ver _filtrar_frases)
+        progresso (callable, optional): Recebe um evento 'trecho' por recorte
+                                        sintetizado ou que falhou
+        traducoes (dict, optional): Nome do recorte -> frases traduzidas
+        
+    Returns:
+        dict: Nome do recorte -> caminho do áudio gerado, ou None se o recorte não
+              tem frase válida. Recortes cuja síntese falhou ficam de fora
         
     Raises:
         ValueError: Se API key ou voice_id não forem fornecidos
     """
-    caminho_json = r"C:\Users\Gabriel\Documents\pydub\downloads\aud_recort\transcricoes_traduzido.json"
-    pasta_recortes = r"C:\Users\Gabriel\Documents\pydub\downloads\aud_recort"
+    if pasta_recortes is None:
+        pasta_recortes = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            'downloads', 'aud_recort'
+        )
+    if caminho_json is None:
+        caminho_json = os.path.join(pasta_recortes, "transcricoes_traduzido.json")
+    if pasta_saida is None:
+        pasta_saida = os.path.join(pasta_recortes, "tts")
+    os.makedirs(pasta_saida, exist_ok=True)
     
     # Valida parâmetros obrigatórios
-    if api_key is None:
-        api_key = ELEVENLABS_API_KEY
-    if not api_key:
-        raise ValueError("API key da ElevenLabs não encontrada no .env!")
+    if cliente is None:
+        if api_key is None:
+            api_key = ELEVENLABS_API_KEY
+        if not api_key:
+            raise ValueError("API key da ElevenLabs não encontrada no .env!")
     if not voice_id:
         raise ValueError("Informe o voice_id de um narrador da ElevenLabs!")
     
     # Carrega dados de tradução
-    dados = _carregar_dados_traducao(caminho_json)
+    dados = traducoes if traducoes is not None else _carregar_dados_traducao(caminho_json)
+    if cliente is None:
+        cliente = obter_cliente(api_key)
     
-    # Configura API ElevenLabs
-    url_base = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-    headers = {
-        "xi-api-key": api_key,
-        "Content-Type": "application/json"
-    }
-    
-    # Processa cada arquivo
+    # Monta uma tarefa por arquivo com texto válido
+    tarefas = []
+    gerados = {}
     for nome_arquivo, textos in dados.items():
-        _processar_arquivo_audio(
-            nome_arquivo, textos, pasta_recortes, url_base, headers, modelo
-        )
+        texto = " ".join(_filtrar_frases(textos or [], idioma))
+        if not texto:
+            print(f"Nenhuma frase válida ({idioma}) para {nome_arquivo}, ignorando.")
+            gerados[nome_arquivo] = None
+            continue
+        tarefas.append((texto, os.path.join(pasta_saida, nome_arquivo)))
+    
+    resultados = cliente.sintetizar_varios(tarefas, voice_id, modelo)
+    for (_, caminho_saida), resultado in zip(tarefas, resultados):
+        nome = os.path.basename(caminho_saida)
+        if isinstance(resultado, Exception):
+            print(f"Erro ao gerar {nome}: {resultado}")
+            evento = {"acao": "erro", "erro": str(resultado)}
+        else:
+            origem = "cache" if resultado[1] else "ElevenLabs"
+            print(f"Áudio gerado e salvo ({origem}): {caminho_saida}")
+            evento = {"acao": "fim", "cache": resultado[1]}
+            gerados[nome] = caminho_saida
+        if progresso is not None:
+            progresso({"evento": "trecho", "etapa": "tts", "idioma": idioma, "trecho": nome, **evento})
+    return gerados
+
+
+def sintetizar_textos(textos, caminho_saida, voice_id, api_key=None, modelo="eleven_multilingual_v2",
+                      cliente=None, idioma="en"):
+    """
+    Gera o áudio de um único recorte a partir das suas frases traduzidas.
+    
+    Args:
+        textos (list): Frases traduzidas do recorte
+        caminho_saida (str): Onde gravar o áudio
+        voice_id (str): ID da voz (narrador)
+        api_key (str, optional): Chave da API ElevenLabs
+        modelo (str): Modelo de voz ElevenLabs
+        cliente (ClienteTTS, optional): Cliente a usar. Se None, usa obter_cliente(api_key)
+        idioma (str): Idioma das frases (ver _filtrar_frases)
+        
+    Returns:
+        str: Caminho do áudio gerado ou None se não houver frase válida
+        
+    Raises:
+        ValueError: Se a API key não for encontrada
+        ErroTTS: Se a síntese falhar
+    """
+    texto = " ".join(_filtrar_frases(textos, idioma))
+    if not texto:
+        return None
+    
+    if cliente is None:
+        api_key = api_key or ELEVENLABS_API_KEY
+        if not api_key:
+            raise ValueError("API key da ElevenLabs não encontrada no .env!")
+        cliente = obter_cliente(api_key)
+    
+    caminho, _ = cliente.sintetizar(texto, voice_id, caminho_saida, modelo)
+    return caminho
 
 
 def _carregar_dados_traducao(caminho_json):
@@ -70,51 +391,18 @@ def _carregar_dados_traducao(caminho_json):
         return json.load(f)
 
 
-def _processar_arquivo_audio(nome_arquivo, textos, pasta_recortes, url_base, headers, modelo):
-    """
-    Processa um arquivo individual para geração de áudio.
-    
-    Args:
-        nome_arquivo (str): Nome do arquivo a ser processado
-        textos (list): Lista de textos traduzidos
-        pasta_recortes (str): Pasta onde salvar o áudio gerado
-        url_base (str): URL base da API ElevenLabs
-        headers (dict): Headers da requisição HTTP
-        modelo (str): Modelo de voz a ser usado
-    """
-    frases_ingles = _filtrar_frase_ingles(textos)
-    texto = " ".join(frases_ingles)
-    
-    if not texto:
-        print(f"Nenhuma frase em inglês válida para {nome_arquivo}, ignorando.")
-        return
-    
-    # Prepara dados para API
-    data = {
-        "text": texto,
-        "model_id": modelo,
-        "output_format": "wav"
-    }
-    
-    # Faz requisição para ElevenLabs
-    response = requests.post(url_base, headers=headers, json=data)
-    caminho_saida = os.path.join(pasta_recortes, nome_arquivo)
-    
-    if response.status_code == 200:
-        _salvar_audio_gerado(response.content, caminho_saida)
-    else:
-        print(f"Erro ao gerar {nome_arquivo}: {response.status_code} - {response.text}")
-
-
-def _filtrar_frase_ingles(frases):
+def _filtrar_frases(frases, idioma="en"):
     """
-    Filtra frases que parecem ser traduções em inglês válidas.
+    Filtra frases que parecem ser traduções válidas no idioma de destino.
     
     Args:
         frases (list): Lista de frases a serem filtradas
+        idioma (str): Idioma de destino. Só no inglês frases com acentos são
+                      tratadas como português não traduzido; em espanhol, francês
+                      etc. os acentos fazem parte do texto
         
     Returns:
-        list: Lista de frases em inglês válidas
+        list: Lista de frases válidas
     """
     resultado = []
     
@@ -128,7 +416,11 @@ def _filtrar_frase_ingles(frases):
             continue
         
         # Ignora frases em português (com acentos)
-        if re.search(r'[áéíóúãõâêôç]', frase):
+        if idioma == "en" and re.search(r'[áéíóúãõâêôç]', frase):
+            continue
+        
+        # Ignora erros de tradução repassados como texto
+        if frase.startswith("Erro na tradução:"):
             continue
         
         resultado.append(frase)
@@ -136,14 +428,17 @@ def _filtrar_frase_ingles(frases):
     return resultado
 
 
-def _salvar_audio_gerado(content, caminho_saida):
+def _espera_retry_after(valor):
     """
-    Salva áudio gerado pela API ElevenLabs.
+    Converte o cabeçalho Retry-After (em segundos) em tempo de espera.
     
     Args:
-        content (bytes): Conteúdo binário do áudio
-        caminho_saida (str): Caminho onde salvar o arquivo
+        valor (str): Valor do cabeçalho ou None
+        
+    Returns:
+        float: Segundos a esperar ou None se ausente/inválido
     """
-    with open(caminho_saida, "wb") as f:
-        f.write(content)
-    print(f"Áudio gerado e salvo: {caminho_saida}")
+    try:
+        return max(0.0, float(valor))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,257 @@
+"""
+Módulo de Motores de ASR
+Este módulo fornece uma interface comum aos motores de reconhecimento de fala usados
+pelo pool de ASR (ver asr_pool) e dois motores:
+
+- 'vosk': Kaldi/Vosk com o modelo pequeno de português do projeto (padrão);
+- 'whisper': Whisper via faster-whisper (CTranslate2), quantizado em int8 na CPU.
+
+Cada motor carrega o modelo uma vez e reaproveita seus reconhecedores entre
+recortes, reiniciando o estado em vez de recriá-los. Os resultados seguem o
+formato JSON do Vosk ({'text', 'result': [palavras]}), então o restante do
+pipeline não depende do motor.
+
+A configuração vem de variáveis de ambiente: POLIGLOTA_ASR_MOTOR ('vosk' ou
+'whisper'), POLIGLOTA_ASR_MODELO (pasta do modelo Vosk ou nome/pasta do modelo
+Whisper), POLIGLOTA_ASR_QUADROS (quadros por bloco enviado ao reconhecedor) e
+POLIGLOTA_ASR_THREADS (threads por worker; o pool divide os núcleos por elas).
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+from utils.idiomas import IDIOMA_ORIGEM
+
+
+# Motor, modelo, quadros por bloco e threads por worker
+ConfigASR = namedtuple("ConfigASR", "motor modelo quadros threads")
+
+MOTOR_PADRAO = "vosk"
+# Quadros de áudio enviados ao reconhecedor por chamada
+QUADROS_POR_BLOCO = 4000
+MODELO_VOSK_PADRAO = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "vosk-model-small-pt-0.3"))
+MODELO_WHISPER_PADRAO = "small"
+# Taxa de amostragem exigida pelo Whisper
+TAXA_WHISPER = 16000
+
+
+class MotorASR(ABC):
+    """
+    Interface dos motores de ASR: recebe blocos de PCM 16 bits mono e devolve
+    os resultados no formato JSON do Vosk.
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config (ConfigASR): Configuração do motor
+        """
+        self.config = config
+
+    @abstractmethod
+    def reconhecer(self, blocos, taxa, palavras=False):
+        """
+        Reconhece um recorte e deixa o motor pronto para o próximo.
+
+        Args:
+            blocos (iterable): Blocos de bytes PCM 16 bits mono
+            taxa (int): Taxa de amostragem
+            palavras (bool): Se True, inclui o tempo de cada palavra em 'result'
+
+        Returns:
+            list: Resultados em JSON ({'text', 'result'}), em ordem
+        """
+
+
+class MotorVosk(MotorASR):
+    """
+    Motor Vosk. Um KaldiRecognizer por taxa de amostragem (e com ou sem tempo por
+    palavra) é criado uma vez e reiniciado com Reset() ao fim de cada recorte.
+    """
+
+    def __init__(self, config, modelo=None):
+        """
+        Args:
+            config (ConfigASR): Configuração do motor
+            modelo (vosk.Model, optional): Modelo já carregado (ex.: pré-carregado
+                                           no fork server). Se None, carrega config.modelo
+        """
+        super().__init__(config)
+        if modelo is None:
+            from vosk import Model, SetLogLevel
+
+            SetLogLevel(-1)
+            modelo = Model(config.modelo)
+        self.modelo = modelo
+        self._reconhecedores = {}
+
+    def reconhecer(self, blocos, taxa, palavras=False):
+        """
+        Ver MotorASR.reconhecer. Resultados parciais não são usados, então
+        PartialResult() não é chamado.
+        """
+        rec = self._reconhecedor(taxa, palavras)
+        try:
+            resultados = []
+            for data in blocos:
+                if rec.AcceptWaveform(data):
+                    resultados.append(rec.Result())
+            resultados.append(rec.FinalResult())
+            return resultados
+        finally:
+            rec.Reset()
+
+    def _reconhecedor(self, taxa, palavras):
+        """
+        Retorna o reconhecedor da taxa, criando-o no primeiro uso.
+
+        Args:
+            taxa (int): Taxa de amostragem
+            palavras (bool): Se o reconhecedor marca o tempo das palavras
+
+        Returns:
+            KaldiRecognizer: Reconhecedor reutilizável
+        """
+        chave = (taxa, palavras)
+        if chave not in self._reconhecedores:
+            from vosk import KaldiRecognizer
+
+            rec = KaldiRecognizer(self.modelo, taxa)
+            if palavras:
+                rec.SetWords(True)
+            self._reconhecedores[chave] = rec
+        return self._reconhecedores[chave]
+
+
+class MotorWhisper(MotorASR):
+    """
+    Motor Whisper do faster-whisper (CTranslate2) com pesos int8 na CPU. O modelo
+    não guarda estado entre chamadas, então é o próprio modelo que é reutilizado.
+    O recorte é decodificado inteiro de uma vez (o Whisper trabalha em janelas
+    de 30 s), então a memória cresce com a duração do recorte.
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config (ConfigASR): Configuração do motor
+
+        Raises:
+            ImportError: Se o faster-whisper não estiver instalado
+        """
+        super().__init__(config)
+        from faster_whisper import WhisperModel
+
+        self.modelo = WhisperModel(config.modelo, device="cpu", compute_type="int8",
+                                   cpu_threads=config.threads)
+
+    def reconhecer(self, blocos, taxa, palavras=False):
+        """
+        Ver MotorASR.reconhecer. Cada segmento do Whisper vira um resultado.
+
+        Raises:
+            ValueError: Se a taxa não for 16 kHz
+        """
+        import numpy as np
+
+        if taxa != TAXA_WHISPER:
+            raise ValueError(f"O Whisper exige áudio a {TAXA_WHISPER} Hz (recebido {taxa} Hz)")
+        audio = np.frombuffer(b"".join(blocos), dtype="<i2").astype(np.float32) / 32768.0
+        segmentos, _ = self.modelo.transcribe(audio, language=IDIOMA_ORIGEM,
+                                              word_timestamps=palavras,
+                                              condition_on_previous_text=False)
+
+        resultados = []
+        for segmento in segmentos:
+            resultado = {"text": segmento.text.strip()}
+            if palavras:
+                resultado["result"] = [
+                    {"word": p.word.strip(), "start": p.start, "end": p.end, "conf": p.probability}
+                    for p in segmento.words or []
+                ]
+            resultados.append(json.dumps(resultado, ensure_ascii=False))
+        return resultados or [json.dumps({"text": ""})]
+
+
+# Nome do motor -> (classe, modelo padrão)
+MOTORES = {
+    "vosk": (MotorVosk, MODELO_VOSK_PADRAO),
+    "whisper": (MotorWhisper, MODELO_WHISPER_PADRAO),
+}
+
+
+def configuracao_asr(motor=None, modelo=None):
+    """
+    Monta a configuração do ASR a partir das variáveis de ambiente. Valores
+    inválidos de POLIGLOTA_ASR_QUADROS e POLIGLOTA_ASR_THREADS são trocados
+    pelo padrão, com um aviso.
+
+    Args:
+        motor (str, optional): Motor a usar, no lugar de POLIGLOTA_ASR_MOTOR
+        modelo (str, optional): Modelo a usar, no lugar de POLIGLOTA_ASR_MODELO
+
+    Returns:
+        ConfigASR: Configuração com os padrões aplicados
+
+    Raises:
+        ValueError: Se o motor não existir
+    """
+    motor = (motor or os.getenv("POLIGLOTA_ASR_MOTOR", MOTOR_PADRAO)).strip().lower()
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de ASR desconhecido: {motor} (use {', '.join(MOTORES)})")
+    modelo = modelo or os.getenv("POLIGLOTA_ASR_MODELO") or MOTORES[motor][1]
+    return ConfigASR(motor, modelo,
+                     _inteiro_ambiente("POLIGLOTA_ASR_QUADROS", QUADROS_POR_BLOCO),
+                     _inteiro_ambiente("POLIGLOTA_ASR_THREADS", 1))
+
+
+def _inteiro_ambiente(variavel, padrao):
+    """
+    Lê um inteiro positivo de uma variável de ambiente.
+
+    Args:
+        variavel (str): Nome da variável
+        padrao (int): Valor usado se a variável não existir ou for inválida
+
+    Returns:
+        int: Valor da variável (ao menos 1) ou o padrão
+    """
+    valor = os.getenv(variavel)
+    if valor is None or not valor.strip():
+        return padrao
+    try:
+        return max(1, int(valor))
+    except ValueError:
+        print(f"Aviso: {variavel}={valor!r} não é um número inteiro; usando {padrao}.")
+        return padrao
+
+
+def parametros_asr(config):
+    """
+    Parâmetros do ASR que afetam as transcrições, para a impressão digital das
+    etapas. As threads só mudam a velocidade e ficam de fora.
+
+    Args:
+        config (ConfigASR): Configuração do ASR
+
+    Returns:
+        dict: Motor, nome do modelo e quadros por bloco
+    """
+    return {"motor": config.motor, "modelo": os.path.basename(os.path.normpath(config.modelo)),
+            "quadros": config.quadros}
+
+
+def criar_motor(config):
+    """
+    Cria o motor descrito pela configuração, carregando o modelo.
+
+    Args:
+        config (ConfigASR): Configuração do ASR
+
+    Returns:
+        MotorASR: Motor pronto para reconhecer
+    """
+    return MOTORES[config.motor][0](config)
@@ -2,54 +2,320 @@
 Módulo de Tradução de Texto
 Este módulo fornece funcionalidades para traduzir textos de português para inglês
 utilizando o Google Translator através da biblioteca deep_translator.
+
+As traduções passam por uma camada com backends plugáveis, cache persistente
+(ver cache_traducao), remoção de frases repetidas, envio em lotes e um pool
+limitado de threads para requisições concorrentes.
 """
 
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from deep_translator import GoogleTranslator
+from man_aud.elabs.cache_traducao import CacheTraducao, normalizar_texto
+from utils.agendador import obter_agendador
+from utils.rastreio import rastrear
 
 
-def traduzir_json_google(input_json, output_json=None):
+class BackendGoogle:
+    """
+    Backend que usa o GoogleTranslator do deep_translator.
+    Lotes são enviados em uma única requisição, com uma frase por linha.
+    """
+
+    nome = "google"
+    limite_caracteres = 4500
+
+    def __init__(self, source="pt", target="en"):
+        """
+        Args:
+            source (str): Idioma de origem
+            target (str): Idioma de destino
+        """
+        self.source = source
+        self.target = target
+        self._local = threading.local()
+
+    def traduzir_lote(self, textos):
+        """
+        Traduz uma lista de textos.
+
+        Args:
+            textos (list): Textos normalizados (sem quebras de linha)
+
+        Returns:
+            list: Traduções, na mesma ordem
+        """
+        tradutor = self._tradutor()
+        if len(textos) == 1:
+            return [tradutor.translate(textos[0])]
+
+        traduzido = tradutor.translate("\n".join(textos)) or ""
+        linhas = traduzido.split("\n")
+        if len(linhas) == len(textos):
+            return [linha.strip() for linha in linhas]
+
+        # O serviço juntou ou separou linhas: recorre a uma requisição por frase
+        return [tradutor.translate(texto) for texto in textos]
+
+    def _tradutor(self):
+        """
+        Retorna a instância do GoogleTranslator da thread atual.
+
+        Returns:
+            GoogleTranslator: Cliente reutilizado pela thread
+        """
+        if not hasattr(self._local, "tradutor"):
+            from deep_translator import GoogleTranslator
+
+            self._local.tradutor = GoogleTranslator(source=self.source, target=self.target)
+        return self._local.tradutor
+
+
+class BackendStub:
+    """
+    Backend local e determinístico, para testes sem rede.
+    """
+
+    nome = "stub"
+    limite_caracteres = 4500
+
+    def __init__(self, source="pt", target="en"):
+        """
+        Args:
+            source (str): Idioma de origem
+            target (str): Idioma de destino
+        """
+        self.source = source
+        self.target = target
+        self.chamadas = 0
+
+    def traduzir_lote(self, textos):
+        """
+        Devolve cada texto marcado com o idioma de destino.
+
+        Args:
+            textos (list): Textos normalizados
+
+        Returns:
+            list: Traduções simuladas, na mesma ordem
+        """
+        self.chamadas += 1
+        return [f"[{self.target}] {texto}" for texto in textos]
+
+
+BACKENDS = {
+    BackendGoogle.nome: BackendGoogle,
+    BackendStub.nome: BackendStub,
+}
+
+# Tradutores reutilizados no processo, indexados por (backend, source, target)
+_TRADUTORES = {}
+_TRADUTORES_LOCK = threading.Lock()
+
+
+class Tradutor:
+    """
+    Traduz listas de frases combinando cache, deduplicação, lotes e concorrência.
+    """
+
+    def __init__(self, backend, cache=None, max_workers=4):
+        """
+        Args:
+            backend: Objeto com nome, source, target, limite_caracteres e traduzir_lote(textos)
+            cache (CacheTraducao, optional): Cache persistente. Se None, não usa cache
+            max_workers (int): Número máximo de requisições simultâneas
+        """
+        self.backend = backend
+        self.cache = cache
+        self.max_workers = max_workers
+
+    def traduzir(self, textos):
+        """
+        Traduz uma lista de textos preservando ordem e posições vazias.
+
+        Args:
+            textos (list): Textos no idioma de origem
+
+        Returns:
+            list: Traduções (ou "Erro na tradução: ..." para frases que falharam)
+        """
+        normalizados = [normalizar_texto(t) for t in textos]
+        unicos = list(dict.fromkeys(t for t in normalizados if t))
+
+        traducoes = {}
+        if self.cache is not None and unicos:
+            traducoes.update(self.cache.buscar(self.backend.nome, self.backend.source,
+                                               self.backend.target, unicos))
+
+        pendentes = [t for t in unicos if t not in traducoes]
+        novas = self._traduzir_pendentes(pendentes)
+        traducoes.update(novas)
+
+        if self.cache is not None:
+            validas = {t: tr for t, tr in novas.items() if not tr.startswith("Erro na tradução:")}
+            self.cache.salvar(self.backend.nome, self.backend.source, self.backend.target, validas)
+
+        return [traducoes.get(t, "") if t else "" for t in normalizados]
+
+    def _traduzir_pendentes(self, pendentes):
+        """
+        Envia os textos ausentes do cache em lotes concorrentes.
+
+        Args:
+            pendentes (list): Textos normalizados e únicos
+
+        Returns:
+            dict: Texto -> tradução
+        """
+        lotes = _dividir_em_lotes(pendentes, self.backend.limite_caracteres)
+        if not lotes:
+            return {}
+
+        resultado = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(lotes))) as executor:
+            for lote, traducoes in zip(lotes, executor.map(self._traduzir_lote_seguro, lotes)):
+                resultado.update(zip(lote, traducoes))
+        return resultado
+
+    def _traduzir_lote_seguro(self, lote):
+        """
+        Traduz um lote, convertendo falhas em mensagens de erro por frase.
+
+        Args:
+            lote (list): Textos do lote
+
+        Returns:
+            list: Traduções do lote
+        """
+        try:
+            with obter_agendador().servico("traducao"), \
+                    rastrear("traducao", "rede", backend=self.backend.nome, frases=len(lote)):
+                return self.backend.traduzir_lote(lote)
+        except Exception as e:
+            return [f"Erro na tradução: {e}"] * len(lote)
+
+
+def criar_tradutor(backend=None, source="pt", target="en", caminho_cache=None, max_workers=4):
+    """
+    Cria um Tradutor com o backend escolhido e o cache persistente.
+
+    Args:
+        backend (str, optional): Nome do backend ('google', 'stub').
+                                Se None, usa POLIGLOTA_TRADUTOR ou 'google'
+        source (str): Idioma de origem
+        target (str): Idioma de destino
+        caminho_cache (str, optional): Caminho do cache SQLite. Se None, usa o padrão
+        max_workers (int): Número máximo de requisições simultâneas
+
+    Returns:
+        Tradutor: Tradutor configurado
+    """
+    nome = backend or os.getenv("POLIGLOTA_TRADUTOR", BackendGoogle.nome)
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend de tradução desconhecido: {nome}")
+
+    cache = CacheTraducao(caminho_cache) if caminho_cache else CacheTraducao()
+    return Tradutor(BACKENDS[nome](source, target), cache, max_workers)
+
+
+def obter_tradutor(backend=None, source="pt", target="en"):
+    """
+    Retorna um Tradutor reutilizado no processo para o mesmo backend e idiomas,
+    mantendo o cache SQLite aberto e os clientes de tradução já criados.
+
+    Args:
+        backend (str, optional): Nome do backend. Se None, usa POLIGLOTA_TRADUTOR ou 'google'
+        source (str): Idioma de origem
+        target (str): Idioma de destino
+
+    Returns:
+        Tradutor: Tradutor compartilhado
+    """
+    chave = (backend or os.getenv("POLIGLOTA_TRADUTOR", BackendGoogle.nome), source, target)
+    with _TRADUTORES_LOCK:
+        if chave not in _TRADUTORES:
+            _TRADUTORES[chave] = criar_tradutor(*chave)
+        return _TRADUTORES[chave]
+
+
+def traduzir_dicionario(dados, tradutor=None):
+    """
+    Traduz as frases de cada recorte, mantendo as chaves e a ordem das frases.
+
+    Args:
+        dados (dict): Nome do recorte -> lista de frases
+        tradutor (Tradutor, optional): Tradutor a usar. Se None, usa obter_tradutor()
+
+    Returns:
+        dict: Nome do recorte -> lista de frases traduzidas
+    """
+    if tradutor is None:
+        tradutor = obter_tradutor()
+
+    # Traduz todas as frases do job de uma vez para deduplicar entre arquivos
+    todos = [texto for textos in dados.values() for texto in textos]
+    traduzidos_lista = iter(tradutor.traduzir(todos))
+    return {
+        chave: [next(traduzidos_lista) for _ in textos]
+        for chave, textos in dados.items()
+    }
+
+
+def traduzir_json_google(input_json, output_json=None, tradutor=None):
     """
     Traduz todas as frases do arquivo JSON de português para inglês usando GoogleTranslator.
-    
+
     Args:
         input_json (str): Caminho do arquivo JSON de entrada
-        output_json (str, optional): Caminho do arquivo JSON de saída. 
+        output_json (str, optional): Caminho do arquivo JSON de saída.
                                    Se None, adiciona '_traduzido' ao nome
+        tradutor (Tradutor, optional): Tradutor a usar. Se None, usa obter_tradutor()
     """
     with open(input_json, 'r', encoding='utf-8') as f:
         dados = json.load(f)
-    
-    traduzidos = {}
-    
-    for chave, textos in dados.items():
-        traduzidos[chave] = []
-        
-        for texto in textos:
-            if texto.strip():
-                try:
-                    traduzido = GoogleTranslator(source="pt", target="en").translate(texto)
-                except Exception as e:
-                    traduzido = f"Erro na tradução: {e}"
-            else:
-                traduzido = ""
-            
-            traduzidos[chave].append(traduzido)
-    
+
+    traduzidos = traduzir_dicionario(dados, tradutor)
+
     # Define caminho de saída se não especificado
     if output_json is None:
         base, ext = os.path.splitext(input_json)
         output_json = f"{base}_traduzido{ext}"
-    
+
     # Salva arquivo traduzido
     with open(output_json, 'w', encoding='utf-8') as f:
         json.dump(traduzidos, f, ensure_ascii=False, indent=2)
-    
+
     print(f"Tradução salva em: {output_json}")
 
 
+def _dividir_em_lotes(textos, limite_caracteres):
+    """
+    Agrupa textos em lotes cujo tamanho somado não passa do limite.
+
+    Args:
+        textos (list): Textos a agrupar
+        limite_caracteres (int): Tamanho máximo de cada lote
+
+    Returns:
+        list: Lista de lotes (listas de textos)
+    """
+    lotes = []
+    atual = []
+    tamanho = 0
+    for texto in textos:
+        if atual and tamanho + len(texto) + 1 > limite_caracteres:
+            lotes.append(atual)
+            atual = []
+            tamanho = 0
+        atual.append(texto)
+        tamanho += len(texto) + 1
+    if atual:
+        lotes.append(atual)
+    return lotes
+
+
 if __name__ == "__main__":
     # Exemplo de uso
     traduzir_json_google("C:/Users/Gabriel/Documents/pydub/downloads/aud_recort/transcricoes.json")
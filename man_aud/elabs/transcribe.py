@@ -1,63 +1,102 @@
 """
 Módulo de Transcrição de Áudio
-Este módulo fornece funcionalidades para transcrever arquivos de áudio WAV
-utilizando o modelo Vosk para reconhecimento de fala em português.
+Este módulo fornece funcionalidades para transcrever arquivos de áudio WAV em
+português com o motor de ASR configurado (Vosk por padrão; ver motores_asr).
+
+Também oferece uma passada única de ASR sobre a trilha inteira, com marcação de
+tempo por palavra, que gera ao mesmo tempo os intervalos de fala (a partir das
+pausas entre palavras) e a transcrição de cada intervalo.
 """
 
+import json
 import os
 import wave
 
-from vosk import Model, KaldiRecognizer
+from man_aud.elabs.asr_pool import obter_pool
+from man_aud.elabs.motores_asr import MODELO_VOSK_PADRAO, configuracao_asr
+from utils.pcm import obter_mapa
 
 
-def transcrever_audios_pasta(model_path=None):
+def transcrever_audios_pasta(model_path=None, pasta_audios=None, processos=None, arquivos=None):
     """
-    Transcreve todos os arquivos de áudio WAV da pasta downloads/aud_recort usando Vosk.
+    Transcreve os recortes (recorte_*.wav) de uma pasta com o motor de ASR configurado.
+    
+    Os arquivos são distribuídos entre os workers de um pool persistente
+    (ver asr_pool), que carrega o modelo uma vez por worker e é reutilizado
+    nas chamadas seguintes do mesmo processo.
     
     Args:
-        model_path (str, optional): Caminho para o modelo Vosk. 
-                                   Se não informado, usa o modelo padrão da pasta.
+        model_path (str, optional): Modelo do motor, no lugar do configurado
+                                   (POLIGLOTA_ASR_MODELO ou o padrão do motor)
+        pasta_audios (str, optional): Pasta com os recortes. 
+                                     Se não informada, usa downloads/aud_recort.
+        processos (int, optional): Número de workers de ASR. Padrão: vagas de CPU do
+                                   job divididas pelas threads de cada worker
+        arquivos (list, optional): Nomes dos recortes a transcrever, em ordem (ex.: os
+                                   do manifesto de trechos). Se None, lista a pasta
         
     Returns:
         dict: Dicionário com nome do arquivo e lista de resultados de transcrição (JSON).
     """
-    # Caminho fixo para a pasta de áudios
-    pasta_audios = os.path.normpath(os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), 
-        '..', '..', 'downloads', 'aud_recort'
-    ))
+    if pasta_audios is None:
+        pasta_audios = os.path.normpath(os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 
+            '..', '..', 'downloads', 'aud_recort'
+        ))
     
-    if model_path is None:
-        pasta_atual = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(pasta_atual, '..', 'vosk-model-small-pt-0.3')
-        model_path = os.path.normpath(model_path)
+    if arquivos is None:
+        arquivos = sorted(nome for nome in os.listdir(pasta_audios)
+                          if nome.startswith('recorte_') and nome.lower().endswith('.wav'))
+    caminhos = [os.path.join(pasta_audios, nome_arquivo) for nome_arquivo in arquivos]
+    if not caminhos:
+        return {}
     
-    model = Model(model_path)
-    resultados_por_arquivo = {}
+    pool = obter_pool(configuracao_asr(modelo=model_path), processos)
+    resultados = pool.transcrever(caminhos)
     
-    for nome_arquivo in os.listdir(pasta_audios):
-        caminho_arquivo = os.path.join(pasta_audios, nome_arquivo)
-        
-        if not nome_arquivo.lower().endswith('.wav'):
-            continue
+    # Mantém a ordem de listagem dos arquivos
+    return {os.path.basename(c): resultados[os.path.basename(c)] for c in caminhos}
+
+
+def transcrever_com_intervalos(audio_path, model_path=None, gap=0.5, min_duration=0.1, padding=0.1):
+    """
+    Reconhece a trilha inteira de uma vez e deriva os intervalos de fala do
+    tempo das palavras, devolvendo intervalos e transcrições juntos. Substitui
+    a detecção de intervalos seguida do ASR por trecho (o áudio é decodificado
+    uma vez só). Roda em um worker do pool de ASR.
+    
+    Args:
+        audio_path (str): Caminho do WAV mono 16 kHz (ex.: *_vosk.wav)
+        model_path (str, optional): Modelo do motor, no lugar do configurado
+        gap (float): Pausa entre palavras (s) a partir da qual começa outro intervalo
+        min_duration (float): Duração mínima (s) de um intervalo de fala
+        padding (float): Margem (s) adicionada antes e depois de cada intervalo
         
-        try:
-            resultados_por_arquivo[nome_arquivo] = _transcrever_arquivo(
-                caminho_arquivo, model
-            )
-        except Exception as e:
-            resultados_por_arquivo[nome_arquivo] = [f"Erro: {str(e)}"]
+    Returns:
+        dict: {'intervalos': [{'start', 'end'}], 'textos': [str]} na mesma ordem,
+              ou {'erro': str} se o áudio não puder ser reconhecido
+    """
+    pool = obter_pool(configuracao_asr(modelo=model_path))
+    return pool.transcrever_com_intervalos(audio_path, gap, min_duration, padding)
+
+
+def caminho_modelo_padrao():
+    """
+    Retorna o caminho do modelo Vosk distribuído junto ao projeto.
     
-    return resultados_por_arquivo
+    Returns:
+        str: Caminho de man_aud/vosk-model-small-pt-0.3
+    """
+    return MODELO_VOSK_PADRAO
 
 
-def _transcrever_arquivo(caminho_arquivo, model):
+def _transcrever_arquivo(caminho_arquivo, motor):
     """
-    Transcreve um arquivo de áudio individual usando o modelo Vosk.
+    Transcreve um arquivo de áudio individual com o motor de ASR.
     
     Args:
         caminho_arquivo (str): Caminho completo do arquivo de áudio
-        model (Model): Modelo Vosk carregado
+        motor (MotorASR): Motor de ASR já carregado
         
     Returns:
         list: Lista de resultados de transcrição
@@ -67,24 +106,91 @@ def _transcrever_arquivo(caminho_arquivo, model):
         if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() not in [16000, 8000]:
             return ["Formato inválido"]
         
-        rec = KaldiRecognizer(model, wf.getframerate())
-        resultados = []
+        quadros = motor.config.quadros
+        blocos = iter(lambda: wf.readframes(quadros), b"")
+        return motor.reconhecer(blocos, wf.getframerate())
+
+
+def _transcrever_com_palavras(caminho_arquivo, motor, gap, min_duration, padding):
+    """
+    Passada única de ASR com tempo por palavra sobre um arquivo inteiro.
+    
+    Args:
+        caminho_arquivo (str): Caminho do WAV mono 16 kHz
+        motor (MotorASR): Motor de ASR já carregado
+        gap (float): Pausa (s) que separa dois intervalos
+        min_duration (float): Duração mínima (s) de um intervalo
+        padding (float): Margem (s) em volta de cada intervalo
+        
+    Returns:
+        dict: Ver transcrever_com_intervalos
+    """
+    with wave.open(caminho_arquivo, "rb") as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() not in [16000, 8000]:
+            return {"erro": "Formato inválido"}
+        duracao = wf.getnframes() / wf.getframerate()
         
-        # Processa frames do áudio
-        while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
-                break
-            
-            if rec.AcceptWaveform(data):
-                res = rec.Result()
-                resultados.append(res)
-            else:
-                res = rec.PartialResult()
+        quadros = motor.config.quadros
+        blocos = iter(lambda: wf.readframes(quadros), b"")
+        resultados = motor.reconhecer(blocos, wf.getframerate(), palavras=True)
+    
+    palavras = []
+    for resultado in resultados:
+        palavras.extend(json.loads(resultado).get("result", []))
+    return _palavras_para_intervalos(palavras, gap, min_duration, padding, duracao)
+
+
+def _palavras_para_intervalos(palavras, gap, min_duration, padding, duracao):
+    """
+    Agrupa palavras em intervalos de fala separados por pausas de pelo menos gap.
+    
+    Args:
+        palavras (list): Dicionários do Vosk {'word', 'start', 'end', 'conf'}
+        gap (float): Pausa (s) que separa dois intervalos
+        min_duration (float): Duração mínima (s) de um intervalo
+        padding (float): Margem (s) em volta de cada intervalo
+        duracao (float): Duração total do áudio (s)
         
-        # Adiciona resultado final
-        final = rec.FinalResult()
-        resultados.append(final)
+    Returns:
+        dict: {'intervalos': [{'start', 'end'}], 'textos': [str]}
+    """
+    grupos = []
+    for palavra in palavras:
+        if grupos and palavra["start"] - grupos[-1][-1]["end"] < gap:
+            grupos[-1].append(palavra)
+        else:
+            grupos.append([palavra])
+    grupos = [g for g in grupos if g[-1]["end"] - g[0]["start"] >= min_duration]
+    
+    intervalos = []
+    textos = []
+    for grupo in grupos:
+        # A margem não invade o intervalo anterior, para manter um texto por intervalo
+        inicio = max(0.0, grupo[0]["start"] - padding,
+                     intervalos[-1]["end"] if intervalos else 0.0)
+        fim = min(duracao, grupo[-1]["end"] + padding)
+        intervalos.append({"start": round(inicio, 3), "end": round(fim, 3)})
+        textos.append(" ".join(p["word"] for p in grupo))
+    return {"intervalos": intervalos, "textos": textos}
+
+
+def _transcrever_segmento(segmento, motor):
+    """
+    Transcreve um trecho do PCM mapeado em memória, sem arquivo intermediário.
+    
+    Args:
+        segmento (Segmento): Trecho (arquivo, deslocamento, tamanho) do WAV 16 kHz
+        motor (MotorASR): Motor de ASR já carregado
         
-        return resultados
+    Returns:
+        list: Lista de resultados de transcrição
+    """
+    if segmento.canais != 1 or segmento.largura != 2 or segmento.taxa not in [16000, 8000]:
+        return ["Formato inválido"]
+    
+    tam_bloco = motor.config.quadros * segmento.largura
+    
+    with obter_mapa(segmento.caminho).trecho(segmento) as visao:
+        blocos = (bytes(visao[i:i + tam_bloco]) for i in range(0, len(visao), tam_bloco))
+        return motor.reconhecer(blocos, segmento.taxa)
 
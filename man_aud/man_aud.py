@@ -2,134 +2,483 @@
 Módulo de Manipulação de Áudio
 Este módulo fornece funcionalidades para recortar áudio em intervalos específicos,
 transcrever trechos, traduzir conteúdo e gerar áudios em inglês usando ElevenLabs.
+
+Um job pode dublar para vários idiomas: recorte e ASR rodam uma vez e tradução e
+TTS se dividem por idioma, em paralelo (ver utils.idiomas para os nomes das pastas).
+Os trechos e os resultados de cada etapa ficam no manifesto de trechos do job
+(ver utils.manifesto).
 """
 
+import asyncio
 import os
 import json
-import importlib.util
-import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from utils.agendador import obter_agendador
+from utils.idiomas import IDIOMA_ORIGEM, IDIOMA_PADRAO, VOZ_PADRAO, pasta_tts
+from utils.manifesto import Manifesto
+from utils.modulos import carregar_modulo
+from utils.pcm import copiar_trecho_wav
 
-from pydub import AudioSegment
+VOICE_ID_PADRAO = VOZ_PADRAO
+# Prefixo das frases que o Tradutor devolve no lugar de um lote que falhou
+PREFIXO_ERRO_TRADUCAO = 'Erro na tradução:'
 
 
-def recortar_audio(audio_file, json_file):
+def recortar_audio(audio_file, manifesto, streaming=True, voice_id=VOICE_ID_PADRAO):
     """
-    Recorta áudio em trechos baseados em intervalos JSON e processa cada trecho.
+    Recorta áudio nos trechos do manifesto e processa cada trecho.
     
     Args:
         audio_file (str): Caminho do arquivo de áudio de entrada
-        json_file (str): Caminho do arquivo JSON com intervalos de tempo
+        manifesto (str): Caminho do manifesto de trechos (ver utils.manifesto)
+        streaming (bool): Se True, cada trecho segue sozinho por ASR, tradução e TTS
+                          (ver processar_segmentos_streaming); se False, cada etapa
+                          espera a anterior terminar todos os trechos
+        voice_id (str): ID da voz ElevenLabs
+    """
+    if streaming:
+        processar_segmentos_streaming(audio_file, manifesto, voice_id)
+        return
+    
+    exportar_recortes(audio_file, manifesto)
+
+    # Executa transcrição dos áudios recortados
+    transcrever_recortes(manifesto)
+    
+    # Executa tradução das transcrições
+    traduzir_recortes(manifesto)
+    
+    # Gera áudios em inglês com ElevenLabs
+    sintetizar_recortes(manifesto, voice_id)
+
+
+def pasta_recortes(manifesto):
+    """
+    Retorna a pasta de recortes associada ao manifesto de trechos.
+    
+    Args:
+        manifesto (str): Caminho do manifesto de trechos
+        
+    Returns:
+        str: Caminho da pasta aud_recort
+    """
+    return os.path.join(os.path.dirname(manifesto), 'aud_recort')
+
+
+def exportar_recortes(audio_file, manifesto):
+    """
+    Salva cada trecho do manifesto em aud_recort/recorte_N.wav, copiando do WAV
+    em blocos (ver utils.memoria) a partir das amostras registradas, sem carregar
+    a trilha inteira.
+    
+    Args:
+        audio_file (str): Caminho do arquivo WAV PCM de entrada
+        manifesto (str): Caminho do manifesto de trechos
+        
+    Returns:
+        str: Caminho da pasta com os recortes
     """
     # Cria pasta de saída para os recortes
-    base_dir = os.path.dirname(json_file)
-    pasta_saida = os.path.join(base_dir, 'aud_recort')
+    pasta_saida = pasta_recortes(manifesto)
     os.makedirs(pasta_saida, exist_ok=True)
 
-    # Carrega áudio e intervalos
-    audio = AudioSegment.from_file(audio_file)
-    
-    with open(json_file, 'r', encoding='utf-8') as f:
-        intervals = json.load(f)
-
-    # Salva áudio original como base
-    caminho_base = os.path.join(pasta_saida, 'base.wav')
-    audio.export(caminho_base, format='wav')
-    print(f'Áudio original salvo: {caminho_base}')
-
-    # Recorta e salva cada trecho
-    for idx, intervalo in enumerate(intervals, 1):
-        start_ms = int(intervalo['start'] * 1000)
-        end_ms = int(intervalo['end'] * 1000)
-        trecho = audio[start_ms:end_ms]
-        nome_saida = f'recorte_{idx}.wav'
-        caminho_saida = os.path.join(pasta_saida, nome_saida)
-        trecho.export(caminho_saida, format='wav')
+    for trecho in Manifesto.carregar(manifesto).trechos:
+        caminho_saida = os.path.join(pasta_saida, trecho['nome'])
+        copiar_trecho_wav(audio_file, caminho_saida, trecho['inicio'],
+                          trecho['fim'] - trecho['inicio'])
         print(f'Recorte salvo: {caminho_saida}')
+    
+    return pasta_saida
 
-    # Executa transcrição dos áudios recortados
-    _executar_transcricao(pasta_saida)
+def transcrever_recortes(manifesto):
+    """
+    Executa transcrição dos áudios recortados e grava os textos no manifesto.
     
-    # Executa tradução das transcrições
-    caminho_json = os.path.join(pasta_saida, 'transcricoes.json')
-    _executar_traducao(caminho_json)
+    Args:
+        manifesto (str): Caminho do manifesto de trechos
+    """
+    _executar_transcricao(manifesto)
+
+def traduzir_recortes(manifesto, idiomas=None):
+    """
+    Traduz as transcrições do manifesto, um idioma de destino por thread, e grava
+    as traduções de todos os idiomas no manifesto.
     
-    # Gera áudios em inglês com ElevenLabs
-    _executar_geracao_audio()
+    Args:
+        manifesto (str): Caminho do manifesto de trechos
+        idiomas (list, optional): Códigos dos idiomas de destino. Padrão: ['en']
+    """
+    idiomas = idiomas or [IDIOMA_PADRAO]
+    dados = Manifesto.carregar(manifesto)
+    textos = dados.textos()
+    with ThreadPoolExecutor(max_workers=len(idiomas)) as executor:
+        traducoes = list(executor.map(lambda idioma: _executar_traducao(textos, idioma), idiomas))
+    for idioma, traduzidos in zip(idiomas, traducoes):
+        dados.definir_traducoes(idioma, traduzidos)
+    dados.salvar()
+    print(f'Traduções salvas em: {manifesto}')
+
+def sintetizar_recortes(manifesto, voice_id=VOICE_ID_PADRAO, idiomas=None, progresso=None):
+    """
+    Gera os áudios traduzidos de cada recorte em aud_recort/tts (e tts_<idioma>
+    para os demais idiomas), um idioma por thread, e registra no manifesto os
+    áudios gerados com o hash de cada um.
+    
+    Args:
+        manifesto (str): Caminho do manifesto de trechos
+        voice_id (str): ID da voz ElevenLabs, usada quando idiomas não é informado
+        idiomas (list, optional): Pares (idioma, voice_id). Padrão: [('en', voice_id)]
+        progresso (callable, optional): Recebe um evento 'trecho' por recorte
+                                        sintetizado ou que falhou (de várias threads)
+    """
+    idiomas = idiomas or [(IDIOMA_PADRAO, voice_id)]
+    dados = Manifesto.carregar(manifesto)
+    pasta_saida = pasta_recortes(manifesto)
+    # Descarta áudios de uma execução anterior (o cache torna a regeração barata)
+    for idioma, _ in idiomas:
+        dados.limpar_tts(idioma)
+    with ThreadPoolExecutor(max_workers=len(idiomas)) as executor:
+        gerados = list(executor.map(
+            lambda par: _executar_geracao_audio(pasta_saida, dados.traducoes(par[0]), par[1],
+                                                par[0], progresso),
+            idiomas
+        ))
+    for (idioma, _), artefatos in zip(idiomas, gerados):
+        dados.definir_tts(idioma, artefatos)
+    dados.salvar()
+
+def processar_segmentos_streaming(audio_file, manifesto, voice_id=VOICE_ID_PADRAO, capacidade=4,
+                                  reconhecer=True, idiomas=None, progresso=None):
+    """
+    Processa os trechos em fluxo: cada um é transcrito, traduzido e sintetizado
+    assim que a etapa anterior termina com ele, sem esperar os demais.
+    
+    As etapas são ligadas por filas limitadas (asyncio.Queue). O ASR roda no pool
+    de processos do Vosk e tradução/TTS em threads, de modo que as chamadas de rede
+    de um trecho se sobrepõem ao reconhecimento local dos seguintes.
+    
+    Os trechos não são gravados em disco: o ASR lê cada trecho direto do WAV
+    de 16 kHz mapeado em memória (ver utils.pcm), recebendo apenas o
+    deslocamento e o tamanho guardados no manifesto. Transcrições, traduções
+    e áudios dublados (tts/recorte_N.wav) são gravados no manifesto ao final,
+    como no modo por etapas.
+    
+    Sem reconhecer (passada única de ASR, ver
+    transcribe.transcrever_com_intervalos), os textos já estão no manifesto, o
+    ASR por trecho é pulado e os trechos entram direto na tradução.
+    
+    Com vários idiomas, cada trecho reconhecido é traduzido e sintetizado para
+    todos eles, cada idioma com sua pasta de TTS.
+    
+    Args:
+        audio_file (str): Caminho do arquivo de áudio de entrada (16 kHz)
+        manifesto (str): Caminho do manifesto de trechos
+        voice_id (str): ID da voz ElevenLabs
+        capacidade (int): Tamanho máximo de cada fila entre etapas
+        reconhecer (bool): Se False, usa as transcrições já gravadas no manifesto
+        idiomas (list, optional): Pares (idioma, voice_id). Padrão: [('en', voice_id)]
+        progresso (callable, optional): Recebe um evento 'trecho' por recorte
+                                        sintetizado ou que falhou em qualquer
+                                        etapa ('asr', 'traducao' ou 'tts')
+        
+    Returns:
+        str: Caminho da pasta com os recortes
+    """
+    idiomas = idiomas or [(IDIOMA_PADRAO, voice_id)]
+    return asyncio.run(_fluxo_segmentos(audio_file, manifesto, idiomas, capacidade, reconhecer,
+                                        progresso))
 
-def _executar_transcricao(pasta_saida):
+async def _fluxo_segmentos(audio_file, manifesto, idiomas, capacidade, reconhecer=True,
+                           progresso=None):
     """
-    Executa transcrição dos áudios recortados.
+    Implementação assíncrona de processar_segmentos_streaming.
     
     Args:
-        pasta_saida (str): Pasta onde estão os recortes de áudio
+        audio_file (str): Caminho do arquivo de áudio de entrada
+        manifesto (str): Caminho do manifesto de trechos
+        idiomas (list): Pares (idioma, voice_id)
+        capacidade (int): Tamanho máximo de cada fila entre etapas
+        reconhecer (bool): Se False, usa as transcrições do manifesto e não há ASR
+        progresso (callable, optional): Recebe os eventos 'trecho' de fim do TTS
+                                        e de erro de qualquer etapa
+        
+    Returns:
+        str: Caminho da pasta com os recortes
     """
-    caminho_transcribe = os.path.join(os.path.dirname(__file__), 'elabs', 'transcribe.py')
-    spec = importlib.util.spec_from_file_location('transcribe', caminho_transcribe)
-    transcribe = importlib.util.module_from_spec(spec)
-    sys.modules['transcribe'] = transcribe
-    spec.loader.exec_module(transcribe)
+    transcribe = _carregar_elabs('transcribe')
+    traduct = _carregar_elabs('traduct')
+    labs = _carregar_elabs('labs')
     
-    resultados = transcribe.transcrever_audios_pasta()
+    pasta_saida = pasta_recortes(manifesto)
+    dados = Manifesto.carregar(manifesto)
+    vozes = dict(idiomas)
+    pastas_tts = {idioma: pasta_tts(pasta_saida, idioma) for idioma in vozes}
+    for idioma, pasta in pastas_tts.items():
+        os.makedirs(pasta, exist_ok=True)
+        dados.limpar_tts(idioma)
     
-    # Salva transcrições em JSON
-    caminho_json = os.path.join(pasta_saida, 'transcricoes.json')
-    transcricoes = {}
+    loop = asyncio.get_running_loop()
+    agendador = obter_agendador()
+    if reconhecer:
+        segmentos = dados.segmentos(audio_file)
+        pool = transcribe.obter_pool()
+    tradutores = {idioma: traduct.obter_tradutor(source=IDIOMA_ORIGEM, target=idioma)
+                  for idioma in vozes}
+    n_traducao = max(t.max_workers for t in tradutores.values())
+    n_tts = agendador.servicos["tts"][0]
+    executor_rede = ThreadPoolExecutor(max_workers=n_traducao + n_tts)
     
-    for arquivo, transcricao in resultados.items():
-        # Extrai apenas o texto dos resultados JSON
-        textos = []
-        for trecho in transcricao:
+    fila_asr = asyncio.Queue(capacidade)
+    fila_traducao = asyncio.Queue(capacidade)
+    fila_tts = asyncio.Queue(capacidade)
+    nomes = dados.nomes()
+    transcricoes = {} if reconhecer else dados.textos()
+    traducoes = {idioma: {} for idioma in vozes}
+    dublados = {idioma: {} for idioma in vozes}
+    inicio = time.perf_counter()
+    primeiro = []
+
+    def notificar(nome, idioma, acao, etapa='tts', **extras):
+        if progresso is not None:
+            progresso({'evento': 'trecho', 'etapa': etapa, 'idioma': idioma, 'trecho': nome,
+                       'acao': acao, **extras})
+    
+    async def repassar_para_traducao(nome):
+        for idioma in vozes:
+            await fila_traducao.put((nome, idioma))
+    
+    async def produzir():
+        if not reconhecer:
+            for nome in nomes:
+                await repassar_para_traducao(nome)
+            return
+        for nome, segmento in zip(nomes, segmentos):
+            await fila_asr.put((nome, segmento))
+    
+    async def transcrever():
+        while True:
+            nome, segmento = await fila_asr.get()
             try:
-                obj = json.loads(trecho)
-                textos.append(obj.get('text', ''))
-            except Exception:
-                textos.append(str(trecho))
-        transcricoes[arquivo] = textos
+                # O Vosk disputa os núcleos com as etapas de CPU dos outros jobs
+                async with agendador.cpu_async():
+                    resultado = await pool.transcrever_async(segmento)
+                # O worker devolve falhas como texto em vez de levantar a exceção
+                erro = _erro_da_transcricao(resultado)
+                if erro:
+                    raise RuntimeError(erro)
+                transcricoes[nome] = _textos_da_transcricao(resultado)
+                await repassar_para_traducao(nome)
+            except Exception as e:
+                transcricoes[nome] = [f'Erro: {e}']
+                print(f'Erro ao transcrever {nome}: {e}')
+                # Sem transcrição, nenhum idioma recebe o trecho
+                notificar(nome, IDIOMA_ORIGEM, 'erro', etapa='asr', erro=str(e))
+            finally:
+                fila_asr.task_done()
     
-    with open(caminho_json, 'w', encoding='utf-8') as f:
-        json.dump(transcricoes, f, ensure_ascii=False, indent=2)
+    async def traduzir():
+        while True:
+            nome, idioma = await fila_traducao.get()
+            try:
+                traducao = await loop.run_in_executor(
+                    executor_rede, tradutores[idioma].traduzir, transcricoes[nome]
+                )
+                # O Tradutor devolve falhas como texto, que o TTS descartaria em silêncio
+                erro = _erro_da_traducao(traducao)
+                if erro:
+                    raise RuntimeError(erro)
+                traducoes[idioma][nome] = traducao
+                await fila_tts.put((nome, idioma))
+            except Exception as e:
+                traducoes[idioma][nome] = [f'{PREFIXO_ERRO_TRADUCAO} {e}']
+                print(f'Erro ao traduzir {nome} ({idioma}): {e}')
+                notificar(nome, idioma, 'erro', etapa='traducao', erro=str(e))
+            finally:
+                fila_traducao.task_done()
     
-    print(f'Transcrições salvas em: {caminho_json}')
+    async def sintetizar():
+        while True:
+            nome, idioma = await fila_tts.get()
+            try:
+                caminho = await loop.run_in_executor(
+                    executor_rede, partial(labs.sintetizar_textos, idioma=idioma),
+                    traducoes[idioma][nome], os.path.join(pastas_tts[idioma], nome), vozes[idioma]
+                )
+                dublados[idioma][nome] = caminho
+                if caminho and not primeiro:
+                    primeiro.append(time.perf_counter() - inicio)
+                    print(f'Primeiro trecho dublado em {primeiro[0]:.2f}s: {caminho}')
+                if caminho:
+                    notificar(nome, idioma, 'fim')
+            except Exception as e:
+                print(f'Erro ao gerar {nome} ({idioma}): {e}')
+                notificar(nome, idioma, 'erro', erro=str(e))
+            finally:
+                fila_tts.task_done()
+    
+    n_asr = pool.processos if reconhecer else 0
+    trabalhadores = (
+        [asyncio.create_task(transcrever()) for _ in range(n_asr)]
+        + [asyncio.create_task(traduzir()) for _ in range(n_traducao)]
+        + [asyncio.create_task(sintetizar()) for _ in range(n_tts)]
+    )
+    try:
+        await produzir()
+        # Cada fila só esvazia depois que seus itens foram repassados à seguinte
+        await fila_asr.join()
+        await fila_traducao.join()
+        await fila_tts.join()
+    finally:
+        for trabalhador in trabalhadores:
+            trabalhador.cancel()
+        await asyncio.gather(*trabalhadores, return_exceptions=True)
+        executor_rede.shutdown(wait=False)
+    
+    if reconhecer:
+        dados.definir_textos({nome: transcricoes.get(nome, []) for nome in nomes})
+    for idioma in vozes:
+        dados.definir_traducoes(idioma, {nome: traducoes[idioma].get(nome, []) for nome in nomes})
+        # Trechos cujo TTS falhou ficam sem registro e a seção do idioma, incompleta
+        dados.definir_tts(idioma, dublados[idioma])
+    dados.salvar()
+    print(f'{len(nomes)} trechos processados em {time.perf_counter() - inicio:.2f}s')
+    return pasta_saida
 
-def _executar_traducao(caminho_json):
+def _textos_da_transcricao(transcricao):
     """
-    Executa tradução das transcrições para inglês.
+    Extrai apenas o texto dos resultados JSON do Vosk.
     
     Args:
-        caminho_json (str): Caminho do arquivo JSON com transcrições
+        transcricao (list): Resultados de transcrição (strings JSON)
+        
+    Returns:
+        list: Textos reconhecidos
+    """
+    textos = []
+    for trecho in transcricao:
+        try:
+            obj = json.loads(trecho)
+            textos.append(obj.get('text', ''))
+        except Exception:
+            textos.append(str(trecho))
+    return textos
+
+def _erro_da_transcricao(transcricao):
     """
-    caminho_traduct = os.path.join(os.path.dirname(__file__), 'elabs', 'traduct.py')
-    spec_traduct = importlib.util.spec_from_file_location('traduct', caminho_traduct)
-    traduct = importlib.util.module_from_spec(spec_traduct)
-    sys.modules['traduct'] = traduct
-    spec_traduct.loader.exec_module(traduct)
+    Identifica uma transcrição que falhou no worker de ASR, que devolve o erro
+    como texto ('Erro: ...', 'Formato inválido') no lugar dos resultados JSON.
     
-    traduct.traduzir_json_google(caminho_json)
+    Args:
+        transcricao (list): Resultados de transcrição
+        
+    Returns:
+        str: Mensagem do erro, ou None se a transcrição é válida
+    """
+    for trecho in transcricao:
+        try:
+            json.loads(trecho)
+        except (TypeError, ValueError):
+            return str(trecho)
+    return None
 
-def _executar_geracao_audio():
+def _erro_da_traducao(traducao):
     """
-    Executa geração de áudios em inglês usando ElevenLabs.
+    Identifica uma tradução que falhou: o Tradutor (ver traduct) não levanta a
+    exceção, e devolve 'Erro na tradução: ...' no lugar das frases do lote.
+    
+    Args:
+        traducao (list): Frases traduzidas
+        
+    Returns:
+        str: Mensagem do erro (sem o prefixo), ou None se a tradução é válida
     """
-    caminho_labs = os.path.join(os.path.dirname(__file__), 'elabs', 'labs.py')
-    spec_labs = importlib.util.spec_from_file_location('labs', caminho_labs)
-    labs = importlib.util.module_from_spec(spec_labs)
-    sys.modules['labs'] = labs
-    spec_labs.loader.exec_module(labs)
+    for frase in traducao:
+        if isinstance(frase, str) and frase.startswith(PREFIXO_ERRO_TRADUCAO):
+            return frase[len(PREFIXO_ERRO_TRADUCAO):].strip()
+    return None
+
+def _carregar_elabs(nome):
+    """
+    Retorna um módulo de man_aud/elabs pelo registro de módulos (importado uma vez).
+    
+    Args:
+        nome (str): Nome do módulo ('transcribe', 'traduct' ou 'labs')
+        
+    Returns:
+        module: Módulo carregado
+    """
+    return carregar_modulo(nome)
+
+def _executar_transcricao(manifesto):
+    """
+    Executa transcrição dos áudios recortados e grava os textos no manifesto.
+    
+    Args:
+        manifesto (str): Caminho do manifesto de trechos
+    """
+    transcribe = _carregar_elabs('transcribe')
+    dados = Manifesto.carregar(manifesto)
+    resultados = transcribe.transcrever_audios_pasta(pasta_audios=pasta_recortes(manifesto),
+                                                     arquivos=dados.nomes())
+    
+    dados.definir_textos({
+        arquivo: _textos_da_transcricao(transcricao)
+        for arquivo, transcricao in resultados.items()
+    })
+    dados.salvar()
     
-    # Usa voz padrão "EXAVITQu4vr4xnSDxMaL" (Rachel, narradora padrão da ElevenLabs)
-    voice_id_padrao = "EXAVITQu4vr4xnSDxMaL"
-    labs.gerar_audios_ingles_elevenlabs(voice_id=voice_id_padrao)
+    print(f'Transcrições salvas em: {manifesto}')
+
+def _executar_traducao(textos, idioma=IDIOMA_PADRAO):
+    """
+    Executa tradução das transcrições para um idioma (inglês por padrão).
+    
+    Args:
+        textos (dict): Nome do recorte -> frases transcritas
+        idioma (str): Idioma de destino
+        
+    Returns:
+        dict: Nome do recorte -> frases traduzidas
+    """
+    traduct = _carregar_elabs('traduct')
+    return traduct.traduzir_dicionario(
+        textos, traduct.obter_tradutor(source=IDIOMA_ORIGEM, target=idioma)
+    )
+
+def _executar_geracao_audio(pasta_saida, traducoes, voice_id=VOICE_ID_PADRAO,
+                            idioma=IDIOMA_PADRAO, progresso=None):
+    """
+    Executa geração de áudios de um idioma (inglês por padrão) usando ElevenLabs.
+    
+    Args:
+        pasta_saida (str): Pasta onde estão os recortes
+        traducoes (dict): Nome do recorte -> frases traduzidas
+        voice_id (str): ID da voz ElevenLabs
+        idioma (str): Idioma das traduções
+        progresso (callable, optional): Recebe os eventos 'trecho' do TTS
+        
+    Returns:
+        dict: Nome do recorte -> áudio gerado ou None (ver labs.gerar_audios_ingles_elevenlabs)
+    """
+    labs = _carregar_elabs('labs')
+    return labs.gerar_audios_ingles_elevenlabs(voice_id=voice_id, pasta_recortes=pasta_saida,
+                                               pasta_saida=pasta_tts(pasta_saida, idioma),
+                                               traducoes=traducoes, idioma=idioma,
+                                               progresso=progresso)
 
-def man_aud(audio_file, json_file):
+def man_aud(audio_file, manifesto):
     """
     Função principal para manipulação de áudio.
     
     Args:
         audio_file (str): Caminho do arquivo de áudio
-        json_file (str): Caminho do arquivo JSON com intervalos
+        manifesto (str): Caminho do manifesto de trechos
     """
-    recortar_audio(audio_file, json_file)
+    recortar_audio(audio_file, manifesto)
 
 
 if __name__ == '__main__':
-    man_aud()
\ No newline at end of file
+    man_aud()
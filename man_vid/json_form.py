@@ -1,268 +1,234 @@
 """
 Módulo de Formatação JSON e Processamento de Áudio
-Este módulo fornece funcionalidades para processar arquivos JSON de intervalos,
-gerar estrutura de recortes e preparar ambiente para processamento de áudio.
+Este módulo fornece funcionalidades para montar a linha do tempo dos recortes a
+partir do manifesto de trechos do job (ver utils.manifesto) e preparar o ambiente
+para processamento de áudio.
+
+Cada idioma de destino usa seus próprios áudios dublados (tts{sufixo}, ver
+utils.idiomas); intervalos e recortes originais são comuns.
 """
 
-import json
 import os
 
-from pydub import AudioSegment
-from pydub.utils import mediainfo
-
-
-def json_form():
-    """
-    Processa arquivo de intervalos e gera JSON de recortes organizados.
-    Busca por arquivo *_vosk_intervals.json e cria estrutura de recortes.
-    """
-    # Caminho absoluto para downloads
-    downloads_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'downloads')
-
-    # Procura arquivo *_vosk_intervals.json em downloads
-    intervals_json = _encontrar_arquivo_intervalos(downloads_path)
-    if not intervals_json:
-        print('Arquivo *_vosk_intervals.json não encontrado.')
-        return
-
-    # Lê intervalos e processa recortes
-    intervals = _ler_intervalos(intervals_json)
-    recortes = _listar_recortes(downloads_path)
-    resultado = _montar_estrutura_recortes(intervals, recortes, downloads_path)
-    
-    # Salva JSON final
-    _salvar_json_recortes(resultado, downloads_path)
+from man_vid.timeline import duracao_wav, para_pcm16, renderizar_timeline, timeline_em_blocos
+from utils.idiomas import IDIOMA_PADRAO, sufixo_idioma
+from utils.manifesto import Manifesto, caminho_manifesto
+from utils.pcm import copiar_trecho_wav, ler_info_wav
 
 
-def preparar_ambiente():
+def preparar_ambiente(downloads_path=None, man_vid_path='man_vid', video_id=None,
+                      idioma=IDIOMA_PADRAO):
     """
     Prepara ambiente de trabalho criando diretórios necessários
     e processando áudio base para colagem de recortes.
     
+    Args:
+        downloads_path (str, optional): Diretório de downloads do job.
+                                       Se None, usa a pasta downloads do projeto
+        man_vid_path (str): Diretório de trabalho de vídeo (ambiente.wav, base*.wav)
+        video_id (str, optional): ID do vídeo; se informado, usa {video_id}_master.wav
+        idioma (str): Idioma dos recortes colados (base_finalizado{sufixo}.wav)
+    
     Returns:
         str: Caminho do arquivo de áudio base processado
     """
-    _criar_diretorios()
+    if downloads_path is None:
+        downloads_path = _downloads_padrao()
+    _criar_diretorios(downloads_path, man_vid_path)
     
     # Busca arquivo de áudio em downloads
-    downloads_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'downloads')
-    audio_path = _encontrar_arquivo_audio(downloads_path)
+    audio_path = _encontrar_arquivo_audio(downloads_path, video_id)
     if not audio_path:
         print("Nenhum arquivo .wav encontrado na pasta downloads.")
         return None
     
     print(f"Usando arquivo de áudio: {audio_path}")
-    audio = AudioSegment.from_file(audio_path)
-    print(f"Duração do áudio: {len(audio) / 1000} segundos")
+    duracao = duracao_wav(audio_path)
+    print(f"Duração do áudio: {duracao} segundos")
 
-    # Cria áudio base para colagem
-    audio_base = _criar_audio_base(audio)
+    # Cria áudio base para colagem; sobre o ambiente separado, os recortes são mixados
+    audio_base = _criar_audio_base(duracao, man_vid_path, audio_path)
+    sobrepor = os.path.exists(os.path.join(man_vid_path, 'ambiente.wav'))
     
     # Processa colagem de recortes
-    _colar_recortes_no_audio(audio_base, downloads_path)
+    _colar_recortes_no_audio(audio_base, downloads_path, duracao * 1000, man_vid_path, idioma,
+                             sobrepor)
     
     return audio_base
 
 
-def _encontrar_arquivo_intervalos(downloads_path):
+def fluxo_audio_final(downloads_path, man_vid_path, video_id, idioma=IDIOMA_PADRAO):
     """
-    Encontra arquivo de intervalos no diretório de downloads.
+    Monta o áudio final sem gravar base.wav nem base_finalizado.wav, entregando-o
+    em blocos PCM 16 bits gerados sob demanda, com memória limitada ao bloco (ver
+    utils.memoria). Usado para enviar o áudio ao ffmpeg sem materializar a trilha
+    inteira. A base é o ambiente.wav (se existir) ou o master, e a duração é a do
+    master. Requer o manifesto de trechos do job.
     
     Args:
-        downloads_path (str): Caminho do diretório de downloads
-        
+        downloads_path (str): Diretório de downloads do job
+        man_vid_path (str): Diretório de trabalho de vídeo (ambiente.wav)
+        video_id (str): ID do vídeo, para achar {video_id}_master.wav
+        idioma (str): Idioma cujos áudios dublados são colados
+    
     Returns:
-        str: Caminho do arquivo de intervalos ou None
+        tuple: (blocos, taxa, canais), onde blocos gera bytes PCM s16le
+               intercalados, ou None
     """
-    for item in os.listdir(downloads_path):
-        if item.endswith('_vosk_intervals.json'):
-            return os.path.join(downloads_path, item)
-    return None
+    entrada = _entrada_audio_final(downloads_path, man_vid_path, video_id, idioma)
+    if entrada is None:
+        return None
+    blocos, taxa, canais = timeline_em_blocos(*entrada)
+    return (para_pcm16(bloco).tobytes() for bloco in blocos), taxa, canais
 
 
-def _ler_intervalos(intervals_json):
+def _entrada_audio_final(downloads_path, man_vid_path, video_id, idioma):
     """
-    Lê arquivo JSON de intervalos.
+    Reúne base, recortes e duração do áudio final de um idioma.
     
     Args:
-        intervals_json (str): Caminho do arquivo JSON
-        
+        downloads_path (str): Diretório de downloads do job
+        man_vid_path (str): Diretório de trabalho de vídeo (ambiente.wav)
+        video_id (str): ID do vídeo
+        idioma (str): Idioma dos recortes
+    
     Returns:
-        list: Lista de intervalos de tempo
+        tuple: (base_path, recortes, duracao, sobrepor) ou None se faltar master ou
+               manifesto; sobrepor é True quando a base é o ambiente.wav
     """
-    with open(intervals_json, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    audio_path = _encontrar_arquivo_audio(downloads_path, video_id)
+    recortes_info = _recortes_do_manifesto(downloads_path, idioma)
+    if not audio_path or recortes_info is None:
+        print('Não foi possível montar o áudio: master ou manifesto de trechos não encontrado.')
+        return None
+    
+    ambiente_path = os.path.join(man_vid_path, 'ambiente.wav')
+    if os.path.exists(ambiente_path):
+        return ambiente_path, recortes_info, duracao_wav(audio_path), True
+    return audio_path, recortes_info, duracao_wav(audio_path), False
 
 
-def _listar_recortes(downloads_path):
+def _downloads_padrao():
     """
-    Lista arquivos de recortes na pasta aud_recort.
+    Retorna a pasta downloads do projeto, usada quando nenhum workspace é informado.
     
-    Args:
-        downloads_path (str): Caminho do diretório de downloads
-        
     Returns:
-        list: Lista ordenada de arquivos de recortes
+        str: Caminho absoluto da pasta downloads
     """
-    aud_recort_path = os.path.join(downloads_path, 'aud_recort')
-    recortes = [f for f in os.listdir(aud_recort_path) 
-                if f.startswith('recorte_') and f.endswith('.wav')]
-    recortes.sort()  # Garante ordem recorte_1, recorte_2, ...
-    return recortes
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'downloads')
 
 
-def _montar_estrutura_recortes(intervals, recortes, downloads_path):
+def _recortes_do_manifesto(downloads_path, idioma=IDIOMA_PADRAO):
     """
-    Monta estrutura final de recortes combinando intervalos e arquivos.
+    Lê do manifesto de trechos os recortes a colar na linha do tempo de um idioma.
     
     Args:
-        intervals (list): Lista de intervalos de tempo
-        recortes (list): Lista de arquivos de recortes
         downloads_path (str): Caminho do diretório de downloads
+        idioma (str): Idioma cujos áudios dublados são usados
         
     Returns:
-        list: Estrutura de recortes organizada
+        list: Recortes {'start', 'end', 'file'} ou None se não houver manifesto
     """
-    aud_recort_path = os.path.join(downloads_path, 'aud_recort')
-    resultado = []
-    
-    for idx, intervalo in enumerate(intervals):
-        # Garante que só pega o número de recortes disponíveis
-        if idx < len(recortes):
-            recorte_abspath = os.path.join(aud_recort_path, recortes[idx])
-            resultado.append({
-                'start': intervalo['start'],
-                'end': intervalo['end'],
-                'file': recorte_abspath
-            })
-    
-    return resultado
+    try:
+        manifesto = Manifesto.carregar(caminho_manifesto(downloads_path))
+    except (OSError, ValueError, KeyError):
+        return None
+    return manifesto.recortes(idioma, os.path.join(downloads_path, 'aud_recort'))
 
 
-def _salvar_json_recortes(resultado, downloads_path):
+def _criar_diretorios(downloads_path, man_vid_path):
     """
-    Salva JSON final de recortes.
+    Cria diretórios necessários para o processamento.
     
     Args:
-        resultado (list): Estrutura de recortes organizada
         downloads_path (str): Caminho do diretório de downloads
+        man_vid_path (str): Caminho do diretório de trabalho de vídeo
     """
-    output_path = os.path.join(downloads_path, 'recortes.json')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(resultado, f, ensure_ascii=False, indent=2)
-    print(f'JSON de recortes gerado em {output_path}')
-
-
-def _criar_diretorios():
-    """
-    Cria diretórios necessários para o processamento.
-    """
-    os.makedirs('downloads', exist_ok=True)
-    os.makedirs('spleeter_temp', exist_ok=True)
+    os.makedirs(downloads_path, exist_ok=True)
+    os.makedirs(man_vid_path, exist_ok=True)
     print("Ambiente preparado.")
 
 
-def _encontrar_arquivo_audio(downloads_path):
+def _encontrar_arquivo_audio(downloads_path, video_id=None):
     """
-    Encontra primeiro arquivo .wav no diretório de downloads.
+    Encontra o áudio master (*_master.wav) no diretório de downloads.
+    Se não houver master, usa o primeiro arquivo .wav encontrado.
     
     Args:
         downloads_path (str): Caminho do diretório de downloads
+        video_id (str, optional): ID do vídeo cujo master deve ser usado
         
     Returns:
         str: Caminho do arquivo de áudio ou None
     """
-    wav_files = [f for f in os.listdir(downloads_path) 
-                 if f.lower().endswith('.wav')]
+    if video_id is not None:
+        caminho = os.path.join(downloads_path, f'{video_id}_master.wav')
+        return caminho if os.path.exists(caminho) else None
+    
+    wav_files = sorted(f for f in os.listdir(downloads_path) 
+                       if f.lower().endswith('.wav'))
     if not wav_files:
         return None
-    return os.path.join(downloads_path, wav_files[0])
+    masters = [f for f in wav_files if f.endswith('_master.wav')]
+    return os.path.join(downloads_path, (masters or wav_files)[0])
 
 
-def _criar_audio_base(audio):
+def _criar_audio_base(duracao, man_vid_path, audio_path):
     """
-    Cria arquivo de áudio base para colagem de recortes.
+    Cria arquivo de áudio base para colagem de recortes, copiando em blocos.
     
     Args:
-        audio (AudioSegment): Áudio de referência para duração
+        duracao (float): Duração do áudio original em segundos
+        man_vid_path (str): Diretório de trabalho de vídeo
+        audio_path (str): WAV original, usado se não houver ambiente.wav
         
     Returns:
         str: Caminho do arquivo de áudio base criado
     """
-    ambiente_path = os.path.join('man_vid', 'ambiente.wav')
-    base_path = os.path.join('man_vid', 'base.wav')
-    os.makedirs('man_vid', exist_ok=True)
+    ambiente_path = os.path.join(man_vid_path, 'ambiente.wav')
+    base_path = os.path.join(man_vid_path, 'base.wav')
+    os.makedirs(man_vid_path, exist_ok=True)
     
     if os.path.exists(ambiente_path):
-        ambiente_audio = AudioSegment.from_file(ambiente_path)
-        ambiente_audio = ambiente_audio[:len(audio)]  # Garante mesma duração
-        ambiente_audio.export(base_path, format="wav")
-        print(f"Cópia criada: {base_path}")
+        origem = ambiente_path
     else:
         # Se ambiente.wav não existe, usa o .wav encontrado em downloads
         print(f"Arquivo ambiente.wav não encontrado em {ambiente_path}, usando o .wav encontrado em downloads.")
-        ambiente_audio = audio[:len(audio)]
-        ambiente_audio.export(base_path, format="wav")
-        print(f"Cópia criada: {base_path}")
+        origem = audio_path
+    # Garante mesma duração do original
+    quadros = int(round(duracao * ler_info_wav(origem).taxa))
+    copiar_trecho_wav(origem, base_path, 0, quadros)
+    print(f"Cópia criada: {base_path}")
     
     return base_path
 
 
-def _colar_recortes_no_audio(audio_base, downloads_path):
+def _colar_recortes_no_audio(audio_base, downloads_path, duracao_ms, man_vid_path,
+                             idioma=IDIOMA_PADRAO, sobrepor=False):
     """
-    Cola recortes no áudio base conforme informações do JSON.
+    Cola recortes no áudio base conforme o manifesto de trechos.
     
     Args:
         audio_base (str): Caminho do arquivo de áudio base
         downloads_path (str): Caminho do diretório de downloads
+        duracao_ms (int): Duração do áudio original em milissegundos
+        man_vid_path (str): Diretório de trabalho de vídeo
+        idioma (str): Idioma dos recortes
+        sobrepor (bool): Se True (base vinda do ambiente.wav), mistura os recortes
+                         sobre a base em vez de silenciar o trecho original
     """
-    recortes_json_path = os.path.join(downloads_path, 'recortes.json')
+    recortes_info = _recortes_do_manifesto(downloads_path, idioma)
     
-    if not audio_base or not os.path.exists(recortes_json_path):
-        print('Não foi possível colar recortes: base.wav ou recortes.json não encontrado.')
+    if not audio_base or recortes_info is None:
+        print('Não foi possível colar recortes: base.wav ou manifesto de trechos não encontrado.')
         return
     
-    with open(recortes_json_path, 'r', encoding='utf-8') as f:
-        recortes_info = json.load(f)
-    
-    base_audio = AudioSegment.from_file(audio_base)
-    
-    # Cola cada recorte no tempo especificado
-    for recorte in recortes_info:
-        start_ms = int(recorte['start'] * 1000)
-        end_ms = int(recorte['end'] * 1000)
-        recorte_audio = AudioSegment.from_file(recorte['file'])
-        # Substitui o trecho no áudio base pelo recorte
-        base_audio = base_audio[:start_ms] + recorte_audio + base_audio[end_ms:]
-    
-    # Ajusta duração final e salva resultado
-    _ajustar_duracao_final(base_audio, downloads_path)
-
-
-def _ajustar_duracao_final(base_audio, downloads_path):
-    """
-    Ajusta duração final do áudio e salva resultado.
-    
-    Args:
-        base_audio (AudioSegment): Áudio processado com recortes
-        downloads_path (str): Caminho do diretório de downloads
-    """
-    final_path = os.path.join('man_vid', 'base_finalizado.wav')
-    
-    # Busca arquivo MP3 original para referência de duração
-    mp3_files = [f for f in os.listdir(downloads_path) 
-                 if f.lower().endswith('.mp3')]
-    
-    if mp3_files:
-        mp3_path = os.path.join(downloads_path, mp3_files[0])
-        info = mediainfo(mp3_path)
-        duracao_ms = int(float(info['duration']) * 1000)
-        base_audio = base_audio[:duracao_ms]
-        print(f'Áudio final cortado para {duracao_ms/1000:.2f} segundos (igual ao original mp3)')
-    
-    base_audio.export(final_path, format='wav')
-    print(f'Recortes colados conforme JSON em {final_path}')
+    # Renderiza a linha do tempo uma única vez, já com a duração do original
+    final_path = os.path.join(man_vid_path, f'base_finalizado{sufixo_idioma(idioma)}.wav')
+    renderizar_timeline(audio_base, recortes_info, final_path, duracao_ms / 1000, sobrepor)
+    print(f'Áudio final com {duracao_ms/1000:.2f} segundos (igual ao original)')
+    print(f'Recortes colados conforme o manifesto em {final_path}')
 
 
 if __name__ == '__main__':
-    json_form()
\ No newline at end of file
+    preparar_ambiente()
\ No newline at end of file
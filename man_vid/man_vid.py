@@ -4,22 +4,26 @@ Este módulo fornece o fluxo principal simplificado para processamento de vídeo
 chamando as funcionalidades do json_form.py para formatação e preparação de ambiente.
 """
 
-import importlib.util
 import os
+import sys
+
+# Permite rodar como script (python man_vid/man_vid.py), com a raiz do projeto no path
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from utils.modulos import carregar_modulo
 
 
 def main():
     """
     Função principal que executa o fluxo de processamento de vídeo.
-    Carrega e executa o módulo json_form para processar intervalos e preparar ambiente.
+    Carrega o módulo json_form para colar os recortes do manifesto de trechos
+    no áudio base.
     """
-    caminho_json_form = os.path.join(os.path.dirname(__file__), 'json_form.py')
-    spec_json = importlib.util.spec_from_file_location('json_form', caminho_json_form)
-    json_form_mod = importlib.util.module_from_spec(spec_json)
-    spec_json.loader.exec_module(json_form_mod)
+    json_form_mod = carregar_modulo("json_form")
     
-    # Executa formatação JSON e preparação de ambiente
-    json_form_mod.json_form()
+    # Prepara o ambiente e cola os recortes
     json_form_mod.preparar_ambiente()
 
 
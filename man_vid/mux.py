@@ -0,0 +1,179 @@
+"""
+Módulo de Mux Final em MP4
+Este módulo fornece funcionalidades para gerar o vídeo final sem WAV intermediário:
+o áudio montado em memória é enviado como PCM cru pela entrada padrão do ffmpeg,
+codificado em AAC ou Opus e multiplexado com o vídeo original (copiado, sem
+recodificar) em um MP4 com faststart, pronto para publicação.
+
+Um job com vários idiomas gera um único MP4 com uma trilha de áudio por idioma:
+a primeira trilha vai pelo stdin e as demais por pipes extras herdados pelo ffmpeg.
+Cada trilha pode ser um bytes ou um iterável de blocos de bytes, gerados à medida
+que o ffmpeg consome (vídeos longos sem a trilha inteira em memória).
+"""
+
+import os
+import subprocess
+import threading
+
+from utils.rastreio import rastrear
+
+
+# Codec -> (encoder do ffmpeg, bitrate padrão)
+CODECS = {
+    "aac": ("aac", "128k"),
+    "opus": ("libopus", "96k"),
+}
+
+# Idioma (ISO 639-1) -> código ISO 639-2 gravado nos metadados da trilha
+IDIOMAS_ISO639_2 = {
+    "en": "eng", "pt": "por", "es": "spa", "fr": "fra", "de": "deu",
+    "it": "ita", "ja": "jpn", "ko": "kor", "zh": "zho", "ru": "rus",
+    "ar": "ara", "hi": "hin",
+}
+
+
+def codificar_mp4(video_path, pcm, taxa, canais, saida_path, codec="aac", bitrate=None):
+    """
+    Multiplexa o vídeo com o áudio PCM recebido em memória.
+
+    O PCM vai pelo stdin do ffmpeg (s16le), então o áudio final nunca é gravado
+    em disco. A saída é gravada em um arquivo temporário e renomeada ao final.
+
+    Args:
+        video_path (str): Arquivo de onde a trilha de vídeo é copiada
+        pcm (bytes | iterable): Amostras PCM 16 bits intercaladas (little-endian),
+                                inteiras ou em blocos
+        taxa (int): Taxa de amostragem do PCM
+        canais (int): Número de canais do PCM
+        saida_path (str): Caminho do MP4 final
+        codec (str): Chave de CODECS ('aac' ou 'opus')
+        bitrate (str, optional): Bitrate do áudio (ex.: '128k'). Padrão: o do codec
+
+    Returns:
+        str: Caminho do MP4 final
+
+    Raises:
+        subprocess.CalledProcessError: Se o ffmpeg falhar
+    """
+    return codificar_mp4_faixas(video_path, [(pcm, taxa, canais, None)], saida_path, codec, bitrate)
+
+
+def codificar_mp4_faixas(video_path, faixas, saida_path, codec="aac", bitrate=None):
+    """
+    Multiplexa o vídeo com uma trilha de áudio por idioma, sem gravar o áudio em disco.
+
+    A primeira trilha é a padrão do player. Cada PCM é escrito por uma thread
+    no seu pipe, para que o ffmpeg leia as entradas intercaladas sem travar; uma
+    trilha em blocos é produzida na própria thread, conforme o pipe esvazia.
+
+    Args:
+        video_path (str): Arquivo de onde a trilha de vídeo é copiada
+        faixas (list): Tuplas (pcm, taxa, canais, idioma); pcm é bytes ou um
+                       iterável de blocos de bytes e idioma pode ser None
+        saida_path (str): Caminho do MP4 final
+        codec (str): Chave de CODECS ('aac' ou 'opus')
+        bitrate (str, optional): Bitrate de cada trilha. Padrão: o do codec
+
+    Returns:
+        str: Caminho do MP4 final
+
+    Raises:
+        subprocess.CalledProcessError: Se o ffmpeg falhar
+    """
+    encoder, bitrate_padrao = CODECS[codec]
+    tmp = saida_path + ".part"
+
+    # Pipes extras: o ffmpeg lê pipe:<fd> do descritor herdado
+    pipes = [os.pipe() for _ in faixas[1:]]
+    descritores = ["0"] + [str(leitura) for leitura, _ in pipes]
+
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-i", video_path]
+    for (_, taxa, canais, _), fd in zip(faixas, descritores):
+        cmd += ["-f", "s16le", "-ar", str(taxa), "-ac", str(canais), "-i", f"pipe:{fd}"]
+    cmd += ["-map", "0:v:0"]
+    for i in range(len(faixas)):
+        cmd += ["-map", f"{i + 1}:a:0"]
+    cmd += ["-c:v", "copy", "-c:a", encoder, "-b:a", bitrate or bitrate_padrao]
+    for i, (_, _, _, idioma) in enumerate(faixas):
+        if idioma:
+            cmd += [f"-metadata:s:a:{i}", f"language={IDIOMAS_ISO639_2.get(idioma, idioma)}"]
+        cmd += [f"-disposition:a:{i}", "default" if i == 0 else "0"]
+    cmd += ["-movflags", "+faststart", "-shortest", "-f", "mp4", tmp]
+
+    try:
+        with rastrear("ffmpeg", "subprocesso", acao="mux_mp4", codec=codec, arquivo=saida_path,
+                      faixas=len(faixas)):
+            _executar_com_pipes(cmd, faixas, pipes)
+        os.replace(tmp, saida_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return saida_path
+
+
+def _executar_com_pipes(cmd, faixas, pipes):
+    """
+    Executa o ffmpeg escrevendo a primeira trilha no stdin e as demais nos pipes extras.
+
+    Args:
+        cmd (list): Comando do ffmpeg
+        faixas (list): Tuplas (pcm, taxa, canais, idioma)
+        pipes (list): Pares (leitura, escrita) das trilhas a partir da segunda
+
+    Raises:
+        subprocess.CalledProcessError: Se o ffmpeg falhar
+        Exception: O erro de uma trilha em blocos que falhou ao ser gerada
+    """
+    leituras = [leitura for leitura, _ in pipes]
+    try:
+        processo = subprocess.Popen(cmd, stdin=subprocess.PIPE, pass_fds=leituras)
+    except OSError:
+        for leitura, escrita in pipes:
+            os.close(leitura)
+            os.close(escrita)
+        raise
+    # O processo pai só escreve; fechar as leituras garante EPIPE se o ffmpeg sair
+    for leitura in leituras:
+        os.close(leitura)
+
+    erros = []
+    escritores = [threading.Thread(target=_escrever_pipe, args=(processo.stdin, faixas[0][0], erros))]
+    for (_, escrita), faixa in zip(pipes, faixas[1:]):
+        escritores.append(threading.Thread(
+            target=_escrever_pipe, args=(os.fdopen(escrita, "wb"), faixa[0], erros)
+        ))
+    for escritor in escritores:
+        escritor.start()
+    for escritor in escritores:
+        escritor.join()
+
+    if processo.wait() != 0:
+        raise subprocess.CalledProcessError(processo.returncode, cmd)
+    if erros:
+        # A trilha ficou incompleta, mesmo que o ffmpeg tenha terminado sem erro
+        raise erros[0]
+
+
+def _escrever_pipe(arquivo, dados, erros):
+    """
+    Escreve os dados no pipe e o fecha, sinalizando fim da trilha ao ffmpeg.
+
+    Args:
+        arquivo: Arquivo binário aberto sobre o pipe
+        dados (bytes | iterable): PCM da trilha, inteiro ou em blocos
+        erros (list): Recebe o erro se a geração dos blocos falhar
+    """
+    blocos = [dados] if isinstance(dados, (bytes, bytearray, memoryview)) else dados
+    try:
+        for bloco in blocos:
+            arquivo.write(bloco)
+    except BrokenPipeError:
+        # O ffmpeg saiu antes de ler tudo; o código de saída indica o erro
+        pass
+    except Exception as e:
+        erros.append(e)
+    finally:
+        try:
+            arquivo.close()
+        except BrokenPipeError:
+            pass
@@ -0,0 +1,234 @@
+"""
+Módulo de Separação de Voz e Ambiente
+Este módulo fornece funcionalidades para gerar o áudio de ambiente (ambiente.wav) a
+partir do master, atenuando a voz original por máscara espectral, para que ela não
+fique por baixo da dublagem.
+
+A separação roda no próprio processo, só com NumPy: o master é lido em blocos de
+tamanho limitado (ver utils.memoria), a STFT de cada bloco é calculada de uma vez
+(janela raiz de Hann com 75% de sobreposição, reconstrução exata por soma com
+sobreposição) e cada ponto tempo-frequência recebe um ganho entre GANHO_MINIMO e 1.
+
+A voz é estimada como a energia que está, ao mesmo tempo:
+- na faixa da fala (BANDA_VOZ_HZ);
+- no centro do estéreo (mesmo nível e fase nos dois canais; em mono vale sempre);
+- acima do fundo estacionário, medido pelo percentil PERCENTIL_FUNDO da potência
+  em janelas de CONTEXTO_FUNDO_S segundos.
+
+Fora dos intervalos de fala do manifesto o ganho é 1, e o ambiente é o próprio master.
+"""
+
+import wave
+
+import numpy as np
+
+from man_vid.timeline import para_pcm16, pcm_para_float
+from utils.memoria import quadros_por_bloco
+
+
+JANELA = 2048
+SALTO = 512
+# Pontos (Hz) da faixa da fala: ganho da voz sobe de 0 a 1 e volta a 0
+BANDA_VOZ_HZ = (80.0, 150.0, 4000.0, 8000.0)
+PERCENTIL_FUNDO = 20
+CONTEXTO_FUNDO_S = 3.0
+# Atenuação máxima da voz (-20 dB); ganhos menores deixam buracos audíveis no ambiente
+GANHO_MINIMO = 0.1
+# Bloco float32, quadros da STFT e espectro complexo (com ~4x de sobreposição)
+# convivem durante o processamento de um bloco
+COPIAS_BLOCO = 24
+EPS = 1e-10
+
+
+def separar_ambiente(master_path, saida_path, intervalos=None, janela=JANELA, salto=SALTO):
+    """
+    Gera o WAV de ambiente (PCM 16 bits, mesma taxa e canais do master) em blocos.
+
+    Args:
+        master_path (str): WAV master na taxa original
+        saida_path (str): Caminho do WAV de ambiente
+        intervalos (list, optional): Intervalos de fala {'start', 'end'} em segundos.
+                                     Se None, a máscara vale no áudio inteiro
+        janela (int): Tamanho da janela da STFT, em amostras
+        salto (int): Salto entre janelas; janela deve ser múltiplo dele
+
+    Returns:
+        str: Caminho do WAV de ambiente
+    """
+    with wave.open(master_path, "rb") as entrada:
+        taxa = entrada.getframerate()
+        canais = entrada.getnchannels()
+        largura = entrada.getsampwidth()
+        total = entrada.getnframes()
+
+        contexto = max(1, int(round(CONTEXTO_FUNDO_S * taxa / salto)))
+        # Blocos com número inteiro de contextos, para o fundo não depender do tamanho do bloco
+        unidade = salto * contexto
+        tam_bloco = max(1, quadros_por_bloco(canais * 4, copias=COPIAS_BLOCO) // unidade) * unidade
+        blocos = _blocos_ambiente(entrada, total, tam_bloco, taxa, canais, largura,
+                                  _intervalos_ordenados(intervalos), janela, salto, contexto)
+
+        with wave.open(saida_path, "wb") as saida:
+            saida.setnchannels(canais)
+            saida.setsampwidth(2)
+            saida.setframerate(taxa)
+            for bloco in blocos:
+                saida.writeframes(para_pcm16(bloco).tobytes())
+    return saida_path
+
+
+def _blocos_ambiente(entrada, total, tam_bloco, taxa, canais, largura, intervalos,
+                     janela, salto, contexto):
+    """
+    Lê o master em blocos e gera o ambiente correspondente, com o mesmo número
+    de quadros. Entre blocos só ficam guardados o fim da entrada ainda não
+    analisado e a cauda da soma com sobreposição.
+
+    Args:
+        entrada (wave.Wave_read): Master aberto
+        total (int): Quadros do master
+        tam_bloco (int): Quadros lidos por bloco (múltiplo de salto)
+        taxa (int): Taxa de amostragem
+        canais (int): Número de canais
+        largura (int): Bytes por amostra
+        intervalos (tuple): (inícios, fins) dos intervalos de fala, ordenados
+        janela (int): Tamanho da janela da STFT
+        salto (int): Salto entre janelas
+        contexto (int): Quadros da STFT por estimativa do fundo
+
+    Yields:
+        np.ndarray: Bloco float32 (quadros x canais)
+    """
+    sobra = janela - salto
+    analise = np.sqrt(np.hanning(janela + 1)[:-1]).astype(np.float32)
+    # A soma das janelas de Hann (análise x síntese) sobrepostas vale janela / (2 * salto)
+    sintese = analise / (janela / (2 * salto))
+    banda = np.interp(np.fft.rfftfreq(janela, 1.0 / taxa), BANDA_VOZ_HZ,
+                      (0.0, 1.0, 1.0, 0.0)).astype(np.float32)
+
+    # A primeira janela começa sobra quadros antes do início do áudio
+    resto = np.zeros((sobra, canais), dtype=np.float32)
+    cauda = np.zeros((sobra, canais), dtype=np.float32)
+    descartar = sobra
+    primeiro_quadro = 0
+    fundo = None
+    escritos = 0
+    fim = False
+
+    while not fim:
+        bloco = pcm_para_float(entrada.readframes(tam_bloco), largura, canais)
+        if len(bloco) < tam_bloco:
+            # Completa até um salto inteiro e esvazia as janelas que ainda cobrem o fim
+            fim = True
+            bloco = np.concatenate([bloco, np.zeros((sobra + (-len(bloco)) % salto, canais),
+                                                    dtype=np.float32)])
+        sinal = np.concatenate([resto, bloco])
+        n_quadros = (len(sinal) - janela) // salto + 1
+
+        quadros = np.lib.stride_tricks.sliding_window_view(sinal, janela, axis=0)[::salto][:n_quadros]
+        espectro = np.fft.rfft(quadros * analise, axis=-1)
+        del quadros
+
+        centros = ((primeiro_quadro + np.arange(n_quadros)) * salto - sobra + janela / 2) / taxa
+        ganho, fundo = _ganho_ambiente(espectro, _em_fala(centros, intervalos), fundo, banda, contexto)
+        espectro *= ganho[:, None, :]
+        quadros_saida = np.fft.irfft(espectro, n=janela, axis=-1).astype(np.float32) * sintese
+        del espectro
+
+        acumulado = np.zeros(((n_quadros - 1) * salto + janela, canais), dtype=np.float32)
+        acumulado[:sobra] += cauda
+        partes = quadros_saida.reshape(n_quadros, canais, janela // salto, salto)
+        for r in range(janela // salto):
+            acumulado[r * salto:r * salto + n_quadros * salto] += (
+                partes[:, :, r, :].transpose(0, 2, 1).reshape(n_quadros * salto, canais))
+        del quadros_saida, partes
+
+        pronto = acumulado[:n_quadros * salto]
+        cauda = acumulado[n_quadros * salto:].copy()
+        resto = sinal[n_quadros * salto:].copy()
+        primeiro_quadro += n_quadros
+
+        if descartar:
+            pular = min(descartar, len(pronto))
+            pronto = pronto[pular:]
+            descartar -= pular
+        pronto = pronto[:total - escritos]
+        escritos += len(pronto)
+        if len(pronto):
+            yield pronto
+
+
+def _ganho_ambiente(espectro, fala, fundo, banda, contexto):
+    """
+    Calcula o ganho do ambiente de cada ponto tempo-frequência (comum a todos os
+    canais, para manter a imagem estéreo).
+
+    Args:
+        espectro (np.ndarray): STFT (quadros x canais x frequências)
+        fala (np.ndarray): Se cada quadro está em um intervalo de fala
+        fundo (np.ndarray): Potência de fundo do contexto anterior, ou None
+        banda (np.ndarray): Peso da faixa da fala por frequência
+        contexto (int): Quadros por estimativa do fundo
+
+    Returns:
+        tuple: (ganho float32 quadros x frequências, fundo do último contexto)
+    """
+    potencias = espectro.real ** 2 + espectro.imag ** 2
+    potencia = potencias.mean(axis=1)
+
+    if espectro.shape[1] >= 2:
+        # 1 quando os dois canais têm o mesmo nível e fase (voz no centro)
+        cruzado = (espectro[:, 0] * np.conj(espectro[:, 1])).real
+        centro = np.clip(2.0 * cruzado / (potencias[:, 0] + potencias[:, 1] + EPS), 0.0, 1.0)
+    else:
+        centro = 1.0
+    del potencias
+
+    piso = np.empty_like(potencia)
+    for inicio in range(0, len(potencia), contexto):
+        nivel = np.percentile(potencia[inicio:inicio + contexto], PERCENTIL_FUNDO, axis=0)
+        # Suaviza entre contextos, para o fundo não saltar de um para o outro
+        fundo = nivel if fundo is None else 0.5 * (fundo + nivel)
+        piso[inicio:inicio + contexto] = fundo
+
+    voz = banda * centro ** 2 * np.maximum(potencia - piso, 0.0)
+    ganho = np.clip(1.0 - voz / (potencia + EPS), GANHO_MINIMO, 1.0).astype(np.float32)
+    ganho[~fala] = 1.0
+    return ganho, fundo
+
+
+def _intervalos_ordenados(intervalos):
+    """
+    Converte os intervalos de fala em vetores de início e fim ordenados.
+
+    Args:
+        intervalos (list): Intervalos {'start', 'end'} em segundos, ou None
+
+    Returns:
+        tuple: (inícios, fins) em segundos, ou None para o áudio inteiro
+    """
+    if intervalos is None:
+        return None
+    ordenados = sorted((i["start"], i["end"]) for i in intervalos)
+    return (np.array([a for a, _ in ordenados], dtype=np.float64),
+            np.array([b for _, b in ordenados], dtype=np.float64))
+
+
+def _em_fala(tempos, intervalos):
+    """
+    Indica quais instantes caem em algum intervalo de fala.
+
+    Args:
+        tempos (np.ndarray): Instantes em segundos
+        intervalos (tuple): Saída de _intervalos_ordenados
+
+    Returns:
+        np.ndarray: Vetor booleano
+    """
+    if intervalos is None:
+        return np.ones(len(tempos), dtype=bool)
+    inicios, fins = intervalos
+    if not len(inicios):
+        return np.zeros(len(tempos), dtype=bool)
+    indice = np.searchsorted(inicios, tempos, side="right") - 1
+    return (indice >= 0) & (tempos < fins[np.maximum(indice, 0)])
@@ -0,0 +1,297 @@
+"""
+Módulo de Renderização da Linha do Tempo de Áudio
+Este módulo fornece funcionalidades para montar o áudio final com NumPy: o buffer de
+saída é alocado uma única vez e cada recorte é escrito diretamente na sua posição em
+amostras, com reamostragem e ajuste de canais vetorizados.
+
+Para vídeos longos a linha do tempo também é gerada em blocos de tamanho fixo (ver
+utils.memoria): a base é lida bloco a bloco e só os recortes que cruzam o bloco
+atual ficam carregados, então a memória não cresce com a duração.
+"""
+
+import wave
+
+import numpy as np
+
+from utils.memoria import quadros_por_bloco
+
+
+def ler_audio(caminho):
+    """
+    Lê um arquivo de áudio como matriz float32 (amostras x canais).
+
+    Arquivos WAV PCM são lidos diretamente; outros formatos (ex.: MP3 vindo da
+    ElevenLabs) são decodificados com pydub/ffmpeg.
+
+    Args:
+        caminho (str): Caminho do arquivo de áudio
+
+    Returns:
+        tuple: (amostras, taxa) com amostras em float32 no intervalo [-1, 1]
+    """
+    try:
+        with wave.open(caminho, "rb") as wf:
+            largura = wf.getsampwidth()
+            canais = wf.getnchannels()
+            taxa = wf.getframerate()
+            dados = wf.readframes(wf.getnframes())
+        return pcm_para_float(dados, largura, canais), taxa
+    except (wave.Error, EOFError):
+        return _ler_com_pydub(caminho)
+
+
+def duracao_wav(caminho):
+    """
+    Lê a duração de um WAV a partir do cabeçalho, sem carregar as amostras.
+
+    Args:
+        caminho (str): Caminho do arquivo WAV
+
+    Returns:
+        float: Duração em segundos
+    """
+    with wave.open(caminho, "rb") as wf:
+        return wf.getnframes() / wf.getframerate()
+
+
+def escrever_wav(caminho, amostras, taxa):
+    """
+    Grava uma matriz float32 (amostras x canais) como WAV PCM 16 bits.
+
+    Args:
+        caminho (str): Caminho do arquivo de saída
+        amostras (np.ndarray): Amostras no intervalo [-1, 1]
+        taxa (int): Taxa de amostragem
+    """
+    pcm = para_pcm16(amostras)
+    with wave.open(caminho, "wb") as wf:
+        wf.setnchannels(pcm.shape[1])
+        wf.setsampwidth(2)
+        wf.setframerate(taxa)
+        wf.writeframes(pcm.tobytes())
+
+
+def pcm_para_float(dados, largura, canais):
+    """
+    Converte bytes PCM intercalados em matriz float32.
+
+    Args:
+        dados (bytes): Amostras PCM intercaladas
+        largura (int): Bytes por amostra (1, 2, 3 ou 4)
+        canais (int): Número de canais
+
+    Returns:
+        np.ndarray: Matriz (amostras x canais) em [-1, 1]
+    """
+    if largura == 1:
+        amostras = (np.frombuffer(dados, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif largura == 2:
+        amostras = np.frombuffer(dados, dtype="<i2").astype(np.float32) / 32768.0
+    elif largura == 3:
+        bytes_ = np.frombuffer(dados, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        inteiros = bytes_[:, 0] | (bytes_[:, 1] << 8) | (bytes_[:, 2] << 16)
+        inteiros = np.where(inteiros >= 1 << 23, inteiros - (1 << 24), inteiros)
+        amostras = inteiros.astype(np.float32) / float(1 << 23)
+    elif largura == 4:
+        amostras = np.frombuffer(dados, dtype="<i4").astype(np.float32) / float(1 << 31)
+    else:
+        raise wave.Error(f"Largura de amostra não suportada: {largura}")
+    return amostras.reshape(-1, canais)
+
+
+def para_pcm16(amostras):
+    """
+    Converte uma matriz float32 (amostras x canais) em PCM 16 bits intercalado.
+
+    Args:
+        amostras (np.ndarray): Amostras no intervalo [-1, 1]
+
+    Returns:
+        np.ndarray: Matriz int16 little-endian, pronta para tobytes()
+    """
+    pcm = np.clip(amostras, -1.0, 1.0)
+    return (pcm * 32767.0).round().astype("<i2")
+
+
+def reamostrar(amostras, taxa_origem, taxa_destino):
+    """
+    Reamostra por interpolação linear, todos os canais de uma vez.
+
+    Args:
+        amostras (np.ndarray): Matriz (amostras x canais)
+        taxa_origem (int): Taxa atual
+        taxa_destino (int): Taxa desejada
+
+    Returns:
+        np.ndarray: Matriz reamostrada
+    """
+    if taxa_origem == taxa_destino or len(amostras) == 0:
+        return amostras
+
+    n_saida = int(round(len(amostras) * taxa_destino / taxa_origem))
+    posicoes = np.arange(n_saida, dtype=np.float64) * (taxa_origem / taxa_destino)
+    i0 = np.minimum(posicoes.astype(np.int64), len(amostras) - 1)
+    i1 = np.minimum(i0 + 1, len(amostras) - 1)
+    frac = (posicoes - i0).astype(np.float32)[:, None]
+    return amostras[i0] * (1.0 - frac) + amostras[i1] * frac
+
+
+def ajustar_canais(amostras, canais):
+    """
+    Converte a matriz para o número de canais desejado.
+
+    Args:
+        amostras (np.ndarray): Matriz (amostras x canais)
+        canais (int): Número de canais desejado
+
+    Returns:
+        np.ndarray: Matriz com o número de canais pedido
+    """
+    atual = amostras.shape[1]
+    if atual == canais:
+        return amostras
+    if atual != 1:
+        amostras = amostras.mean(axis=1, keepdims=True)
+    return np.repeat(amostras, canais, axis=1) if canais > 1 else amostras
+
+
+def renderizar_timeline(base_path, recortes, saida_path, duracao=None, sobrepor=False):
+    """
+    Monta o áudio final (ver timeline_em_blocos) e grava em WAV.
+
+    Args:
+        base_path (str): Caminho do áudio base (ambiente ou original)
+        recortes (list): Lista de dicionários {'start', 'end', 'file'} em segundos
+        saida_path (str): Caminho do WAV final
+        duracao (float, optional): Duração final em segundos. Se None, usa a da base
+        sobrepor (bool): Se True, mistura os recortes sobre a base sem silenciá-la
+
+    Returns:
+        str: Caminho do WAV final
+    """
+    blocos, taxa, canais = timeline_em_blocos(base_path, recortes, duracao, sobrepor)
+    with wave.open(saida_path, "wb") as wf:
+        wf.setnchannels(canais)
+        wf.setsampwidth(2)
+        wf.setframerate(taxa)
+        for bloco in blocos:
+            wf.writeframes(para_pcm16(bloco).tobytes())
+    return saida_path
+
+
+def timeline_em_blocos(base_path, recortes, duracao=None, sobrepor=False):
+    """
+    Prepara a montagem do áudio final em blocos consecutivos, com memória
+    limitada ao bloco e aos recortes em uso.
+
+    Cada recorte ocupa a partir de 'start'; o trecho original até 'end' é
+    silenciado e, se o recorte for mais longo, ele avança sobre a base sem
+    deslocar os recortes seguintes. Com sobrepor=True (base já sem a voz
+    original, ver man_vid.separacao) a base não é silenciada e os recortes são
+    somados a ela, preservando o ambiente por baixo da dublagem.
+
+    Args:
+        base_path (str): Caminho do áudio base (WAV PCM)
+        recortes (list): Lista de dicionários {'start', 'end', 'file'} em segundos
+        duracao (float, optional): Duração final em segundos. Se None, usa a da base
+        sobrepor (bool): Se True, mistura os recortes sobre a base sem silenciá-la
+
+    Returns:
+        tuple: (blocos, taxa, canais), onde blocos é um gerador de matrizes
+               float32 (quadros x canais)
+    """
+    with wave.open(base_path, "rb") as wf:
+        taxa = wf.getframerate()
+        canais = wf.getnchannels()
+        n_base = wf.getnframes()
+    total = n_base if duracao is None else int(round(duracao * taxa))
+    # O bloco float32 convive com o PCM lido e com os temporários da conversão
+    # para PCM 16 bits (clip, escala, arredondamento): cerca de 6 cópias
+    tam_bloco = quadros_por_bloco(canais * 4, copias=6)
+    return _gerar_blocos(base_path, recortes, total, tam_bloco, sobrepor), taxa, canais
+
+
+def _gerar_blocos(base_path, recortes, total, tam_bloco, sobrepor=False):
+    """
+    Gera os blocos da linha do tempo, aplicando os recortes na ordem da lista.
+
+    Args:
+        base_path (str): Caminho do WAV base
+        recortes (list): Lista de dicionários {'start', 'end', 'file'} em segundos
+        total (int): Quadros do áudio final
+        tam_bloco (int): Quadros por bloco
+        sobrepor (bool): Se True, soma os recortes à base em vez de substituí-la
+
+    Yields:
+        np.ndarray: Bloco float32 (quadros x canais)
+    """
+    with wave.open(base_path, "rb") as wf:
+        taxa = wf.getframerate()
+        canais = wf.getnchannels()
+        largura = wf.getsampwidth()
+
+        # (ordem, início, fim, arquivo), por início; ativados conforme o bloco avança
+        pendentes = sorted(
+            ((ordem, int(round(r['start'] * taxa)), min(total, int(round(r['end'] * taxa))), r['file'])
+             for ordem, r in enumerate(recortes)),
+            key=lambda item: item[1],
+        )
+        pendentes = [item for item in pendentes if item[1] < total]
+        proximo = 0
+        # ordem -> (início, fim, clipe) dos recortes que ainda cruzam a saída
+        ativos = {}
+
+        for pos in range(0, total, tam_bloco):
+            n = min(tam_bloco, total - pos)
+            dados = wf.readframes(n)
+            bloco = np.zeros((n, canais), dtype=np.float32)
+            if dados:
+                lidos = pcm_para_float(dados, largura, canais)
+                bloco[:len(lidos)] = lidos
+                del lidos
+
+            while proximo < len(pendentes) and pendentes[proximo][1] < pos + n:
+                ordem, inicio, fim, arquivo = pendentes[proximo]
+                clipe, taxa_clipe = ler_audio(arquivo)
+                clipe = ajustar_canais(reamostrar(clipe, taxa_clipe, taxa), canais)
+                ativos[ordem] = (inicio, fim, clipe[:total - inicio])
+                proximo += 1
+
+            for ordem in sorted(ativos):
+                inicio, fim, clipe = ativos[ordem]
+                a, b = max(inicio, pos), min(inicio + len(clipe), pos + n)
+                if sobrepor:
+                    # Base sem a voz original: o ambiente continua por baixo do recorte
+                    if a < b:
+                        bloco[a - pos:b - pos] += clipe[a - inicio:b - inicio]
+                    continue
+                # Silencia o trecho original e escreve o recorte
+                c, d = max(inicio, pos) - pos, min(fim, pos + n) - pos
+                if c < d:
+                    bloco[c:d] = 0.0
+                if a < b:
+                    bloco[a - pos:b - pos] = clipe[a - inicio:b - inicio]
+
+            # Descarta os recortes que terminaram antes do próximo bloco
+            for ordem in [o for o, (ini, fim, c) in ativos.items()
+                          if max(fim, ini + len(c)) <= pos + n]:
+                del ativos[ordem]
+
+            yield bloco
+
+
+def _ler_com_pydub(caminho):
+    """
+    Decodifica um arquivo não-WAV com pydub/ffmpeg.
+
+    Args:
+        caminho (str): Caminho do arquivo de áudio
+
+    Returns:
+        tuple: (amostras, taxa)
+    """
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(caminho)
+    dados = audio.raw_data
+    return pcm_para_float(dados, audio.sample_width, audio.channels), audio.frame_rate
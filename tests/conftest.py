@@ -0,0 +1,11 @@
+"""
+Configuração comum dos testes: coloca a raiz do projeto no path, como os scripts
+de benchmarks/ fazem, para importar os pacotes sem instalação.
+"""
+
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
@@ -0,0 +1,66 @@
+"""
+Vagas de CPU do agendador (utils.agendador): espera assíncrona e divisão entre jobs.
+"""
+
+import asyncio
+import time
+
+from utils.agendador import Agendador
+
+
+def _vaga_livre(agendador, prazo=1.0):
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        if agendador._cpu.acquire(False):
+            agendador._cpu.release()
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_cpu_async_espera_a_vaga_ser_liberada():
+    agendador = Agendador(nucleos=1)
+
+    async def cenario():
+        with agendador.cpu():
+            entrou = asyncio.Event()
+
+            async def job():
+                async with agendador.cpu_async():
+                    entrou.set()
+
+            tarefa = asyncio.create_task(job())
+            await asyncio.sleep(0.05)
+            assert not entrou.is_set()
+        await asyncio.wait_for(tarefa, 1.0)
+
+    asyncio.run(cenario())
+    assert _vaga_livre(agendador)
+
+
+def test_cpu_async_cancelado_devolve_a_vaga():
+    agendador = Agendador(nucleos=1)
+
+    async def cenario():
+        agendador._cpu.acquire()
+
+        async def job():
+            async with agendador.cpu_async():
+                pass
+
+        tarefa = asyncio.create_task(job())
+        await asyncio.sleep(0.05)
+        tarefa.cancel()
+        await asyncio.gather(tarefa, return_exceptions=True)
+        # A thread que esperava obtém a vaga e a devolve em seguida
+        agendador._cpu.release()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(cenario())
+    assert _vaga_livre(agendador)
+
+
+def test_vagas_por_job():
+    assert Agendador(nucleos=8).vagas_por_job() == 8
+    assert Agendador(nucleos=8, jobs=16).vagas_por_job() == 1
+    assert Agendador(nucleos=8, jobs=3).vagas_por_job() == 2
@@ -0,0 +1,54 @@
+"""
+Pool de ASR (man_aud.elabs.asr_pool) com um modelo que não carrega: as tarefas
+devolvem o erro em vez de ficarem presas enquanto o pool recria os workers.
+"""
+
+import asyncio
+import wave
+
+import pytest
+
+from man_aud.elabs.asr_pool import PoolASR
+from man_aud.elabs.motores_asr import ConfigASR
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    modelo = str(tmp_path / "modelo-inexistente")
+    monkeypatch.setenv("POLIGLOTA_VOSK_MODEL", modelo)
+    pool = PoolASR(ConfigASR("vosk", modelo, 4000, 1), processos=1)
+    yield pool
+    pool.fechar()
+
+
+@pytest.fixture
+def audio(tmp_path):
+    caminho = tmp_path / "recorte_1.wav"
+    with wave.open(str(caminho), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * 1600)
+    return str(caminho)
+
+
+def test_transcrever_devolve_o_erro_do_modelo(pool, audio):
+    resultado = pool.transcrever([audio])["recorte_1.wav"]
+
+    assert len(resultado) == 1
+    assert resultado[0].startswith("Erro: Não foi possível carregar o motor vosk")
+
+
+def test_transcrever_async_termina(pool, audio):
+    async def transcrever():
+        return await asyncio.wait_for(pool.transcrever_async(audio), 30)
+
+    resultado = asyncio.run(transcrever())
+
+    assert resultado[0].startswith("Erro:")
+
+
+def test_transcrever_com_intervalos_termina(pool, audio):
+    resultado = pool.transcrever_com_intervalos(audio, 0.5, 0.1, 0.1)
+
+    assert "modelo-inexistente" in resultado["erro"]
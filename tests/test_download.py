@@ -0,0 +1,72 @@
+"""
+Testes do registro de downloads e do pulo de IDs conhecidos sem acesso à rede.
+"""
+
+import struct
+
+from utils import download
+from utils.download import RegistroDownloads
+
+
+def _mp4_minimo(caminho):
+    """Grava um MP4 com as caixas de topo obrigatórias (ftyp, moov, mdat)."""
+    with open(caminho, "wb") as f:
+        for tipo, corpo in ((b"ftyp", b"isom"), (b"moov", b""), (b"mdat", b"\0" * 16)):
+            f.write(struct.pack(">I4s", 8 + len(corpo), tipo) + corpo)
+
+
+def test_registro_compartilhado_nao_perde_ids(tmp_path):
+    caminho = str(tmp_path / "registro.txt")
+    # Duas instâncias sobre o mesmo arquivo, como dois processos do lote
+    a = RegistroDownloads(caminho)
+    b = RegistroDownloads(caminho)
+    a.adicionar("aaa")
+    b.adicionar("bbb")
+    assert a.contem("bbb") and b.contem("aaa")
+
+    a.remover("aaa")
+    assert not b.contem("aaa")
+    assert b.contem("bbb")
+    with open(caminho, encoding="utf-8") as f:
+        assert f.read() == "youtube bbb\n"
+
+
+def test_adicionar_nao_duplica_linhas(tmp_path):
+    caminho = str(tmp_path / "registro.txt")
+    RegistroDownloads(caminho).adicionar("aaa")
+    RegistroDownloads(caminho).adicionar("aaa")
+    with open(caminho, encoding="utf-8") as f:
+        assert f.read().splitlines() == ["youtube aaa"]
+
+
+def test_id_registrado_com_arquivo_integro_nao_acessa_rede(tmp_path, monkeypatch):
+    registro = RegistroDownloads(str(tmp_path / "registro.txt"))
+    registro.adicionar("abc123")
+    _mp4_minimo(str(tmp_path / "abc123.mp4"))
+    # Qualquer tentativa de importar o yt-dlp falha o teste
+    monkeypatch.setitem(__import__("sys").modules, "yt_dlp", None)
+
+    caminho = download.download_shorts("https://www.youtube.com/shorts/abc123", str(tmp_path),
+                                       registro)
+    assert caminho == str(tmp_path / "abc123.mp4")
+
+
+def test_id_registrado_sem_arquivo_sai_do_registro(tmp_path, monkeypatch):
+    registro = RegistroDownloads(str(tmp_path / "registro.txt"))
+    registro.adicionar("abc123")
+    monkeypatch.setitem(__import__("sys").modules, "yt_dlp", None)
+
+    resultado = download.download_shorts("https://www.youtube.com/shorts/abc123", str(tmp_path),
+                                         registro)
+    assert resultado.startswith("Erro")
+    assert not registro.contem("abc123")
+
+
+def test_expansao_pula_ids_registrados(tmp_path, monkeypatch):
+    registro = RegistroDownloads(str(tmp_path / "registro.txt"))
+    registro.adicionar("velho")
+    monkeypatch.setattr(download, "_listar_ids", lambda url: ["velho", "novo"])
+
+    urls = download.expandir_urls(["https://www.youtube.com/@canal",
+                                   "https://www.youtube.com/shorts/velho"], registro)
+    assert urls == ["https://www.youtube.com/shorts/novo", "https://www.youtube.com/shorts/velho"]
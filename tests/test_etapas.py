@@ -0,0 +1,64 @@
+"""
+Seções de JSON como entradas e saídas de etapas (utils.etapas): o arquivo é lido
+uma vez por planejamento e de novo só quando muda.
+"""
+
+import json
+import os
+
+from utils import etapas
+from utils.etapas import Etapa, PipelineEtapas
+
+
+def _gravar_manifesto(caminho, secoes):
+    tmp = f"{caminho}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"secoes": secoes}, f)
+    os.replace(tmp, caminho)
+
+
+def _contar_leituras(monkeypatch):
+    leituras = []
+    carregar = json.load
+
+    def contar(f, *args, **kwargs):
+        leituras.append(f.name)
+        return carregar(f, *args, **kwargs)
+
+    monkeypatch.setattr(etapas.json, "load", contar)
+    return leituras
+
+
+def test_manifesto_lido_uma_vez_por_planejamento(tmp_path, monkeypatch):
+    manifesto = str(tmp_path / "segmentos.json")
+    _gravar_manifesto(manifesto, {"intervalos": "a", "texto": "b", "traducao:en": "c"})
+    pipeline = PipelineEtapas([
+        Etapa("asr", lambda: None, entradas=[f"{manifesto}#intervalos"],
+              saidas=[f"{manifesto}#texto"]),
+        Etapa("traducao", lambda: None, entradas=[f"{manifesto}#texto"],
+              saidas=[f"{manifesto}#traducao:en"], depende=["asr"]),
+    ], str(tmp_path / "estado.json"))
+    pipeline.executar()
+
+    leituras = _contar_leituras(monkeypatch)
+    assert [acao for _, acao, _ in pipeline.planejar()] == ["pular", "pular"]
+    assert leituras == [manifesto]
+
+
+def test_secao_regravada_durante_a_execucao_e_relida(tmp_path):
+    manifesto = str(tmp_path / "segmentos.json")
+    _gravar_manifesto(manifesto, {"intervalos": "a"})
+
+    def transcrever():
+        _gravar_manifesto(manifesto, {"intervalos": "a", "texto": "b"})
+
+    pipeline = PipelineEtapas([
+        Etapa("asr", transcrever, entradas=[f"{manifesto}#intervalos"],
+              saidas=[f"{manifesto}#texto"]),
+    ], str(tmp_path / "estado.json"))
+
+    assert pipeline.executar()["asr"]["acao"] == "executar"
+    assert pipeline.planejar() == [("asr", "pular", "sem alterações")]
+
+    _gravar_manifesto(manifesto, {"intervalos": "outro", "texto": "b"})
+    assert pipeline.planejar()[0][1] == "executar"
@@ -0,0 +1,105 @@
+"""
+Fila persistente de jobs (utils.fila): prazo (lease) expirado, espera
+exponencial entre tentativas e job em erro ao esgotar as tentativas.
+"""
+
+import pytest
+
+from utils import fila as fila_mod
+from utils.fila import CONCLUIDO, ERRO, EXECUTANDO, PENDENTE, FilaJobs
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(fila_mod.time, "time", relogio)
+    monkeypatch.setattr(fila_mod.random, "random", lambda: 0.0)
+    return relogio
+
+
+@pytest.fixture
+def fila(tmp_path, relogio):
+    fila = FilaJobs(str(tmp_path / "fila.sqlite3"), max_tentativas=3, espera_base=10.0)
+    yield fila
+    fila.fechar()
+
+
+def _estado(fila, job_id):
+    return next(j for j in fila.listar() if j["id"] == job_id)
+
+
+def test_prazo_expirado_permite_retomar(fila, relogio):
+    job_id = fila.enfileirar("https://youtu.be/a")
+    fila.registrar_unidade(job_id, "etapa:asr", CONCLUIDO)
+    assert fila.reivindicar("h1:1", prazo=60)["tentativas"] == 1
+    fila.registrar_unidade(job_id, "etapa:tts", EXECUTANDO)
+
+    relogio.agora += 30
+    assert fila.reivindicar("h2:2", prazo=60) is None
+    assert fila.renovar(job_id, "h1:1", prazo=60)
+
+    relogio.agora += 61
+    job = fila.reivindicar("h2:2", prazo=60)
+    assert (job["id"], job["tentativas"]) == (job_id, 2)
+    assert _estado(fila, job_id)["trabalhador"] == "h2:2"
+    # A unidade em andamento é marcada como interrompida; as concluídas ficam
+    unidades = fila.unidades(job_id)
+    assert unidades["etapa:tts"]["estado"] == ERRO
+    assert unidades["etapa:asr"]["estado"] == CONCLUIDO
+    # O trabalhador antigo perdeu o job
+    assert not fila.renovar(job_id, "h1:1")
+    assert not fila.concluir(job_id, "h1:1")
+    assert fila.falhar(job_id, "h1:1", "tarde demais") is None
+
+
+def test_falha_volta_a_fila_com_espera_exponencial(fila, relogio):
+    job_id = fila.enfileirar("https://youtu.be/a")
+
+    fila.reivindicar("h1:1")
+    assert fila.falhar(job_id, "h1:1", "rede") == 10.0
+    assert _estado(fila, job_id)["estado"] == PENDENTE
+    assert fila.reivindicar("h1:1") is None
+
+    relogio.agora += 10.0
+    assert fila.reivindicar("h1:1")["tentativas"] == 2
+    assert fila.falhar(job_id, "h1:1", "rede") == 20.0
+
+    relogio.agora += 19.0
+    assert fila.reivindicar("h1:1") is None
+    relogio.agora += 1.0
+    assert fila.reivindicar("h1:1")["tentativas"] == 3
+
+
+def test_ultima_tentativa_fica_em_erro(fila, relogio):
+    job_id = fila.enfileirar("https://youtu.be/a")
+    for _ in range(2):
+        fila.reivindicar("h1:1")
+        relogio.agora += fila.falhar(job_id, "h1:1", "rede")
+
+    fila.reivindicar("h1:1")
+    assert fila.falhar(job_id, "h1:1", "rede") is None
+
+    estado = _estado(fila, job_id)
+    assert (estado["estado"], estado["tentativas"], estado["erro"]) == (ERRO, 3, "rede")
+    relogio.agora += 3600
+    assert fila.reivindicar("h1:1") is None
+    assert fila.pendentes() == 0
+
+
+def test_prazo_expirado_na_ultima_tentativa_fica_em_erro(fila, relogio):
+    job_id = fila.enfileirar("https://youtu.be/a")
+    for _ in range(3):
+        assert fila.reivindicar("h1:1", prazo=60)["id"] == job_id
+        relogio.agora += 61
+
+    assert fila.reivindicar("h2:2") is None
+    estado = _estado(fila, job_id)
+    assert (estado["estado"], estado["erro"]) == (ERRO, "prazo expirado na última tentativa")
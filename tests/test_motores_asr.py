@@ -0,0 +1,36 @@
+"""
+Interface dos motores de ASR e configuração por variáveis de ambiente
+(man_aud.elabs.motores_asr).
+"""
+
+import pytest
+
+from man_aud.elabs.motores_asr import QUADROS_POR_BLOCO, MotorASR, configuracao_asr
+
+
+def test_motor_sem_reconhecer_nao_pode_ser_criado():
+    class Incompleto(MotorASR):
+        pass
+
+    with pytest.raises(TypeError):
+        Incompleto(None)
+
+
+def test_configuracao_le_inteiros(monkeypatch):
+    monkeypatch.setenv("POLIGLOTA_ASR_QUADROS", "8000")
+    monkeypatch.setenv("POLIGLOTA_ASR_THREADS", "0")
+
+    config = configuracao_asr("vosk")
+
+    assert (config.quadros, config.threads) == (8000, 1)
+
+
+def test_configuracao_invalida_usa_o_padrao(monkeypatch, capsys):
+    monkeypatch.setenv("POLIGLOTA_ASR_QUADROS", "4k")
+    monkeypatch.setenv("POLIGLOTA_ASR_THREADS", "dois")
+
+    config = configuracao_asr("vosk")
+
+    assert (config.quadros, config.threads) == (QUADROS_POR_BLOCO, 1)
+    saida = capsys.readouterr().out
+    assert "POLIGLOTA_ASR_QUADROS" in saida and "POLIGLOTA_ASR_THREADS" in saida
@@ -0,0 +1,84 @@
+"""
+Mapeamentos de PCM reutilizados (utils.pcm.obter_mapa) com visões ainda em uso
+e acesso de várias threads.
+"""
+
+import os
+import threading
+import wave
+
+from utils import pcm
+from utils.pcm import Segmento, ler_info_wav, liberar_mapa, obter_mapa
+
+
+def _gravar_wav(caminho, amostras):
+    with wave.open(str(caminho), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(amostras)
+
+
+def _segmento(caminho):
+    info = ler_info_wav(str(caminho))
+    return Segmento(str(caminho), info.offset, info.tamanho, info.taxa, info.canais, info.largura)
+
+
+def test_regravar_arquivo_com_visao_em_uso(tmp_path):
+    caminho = tmp_path / "audio.wav"
+    _gravar_wav(caminho, b"\x01\x00" * 100)
+    visao = obter_mapa(str(caminho)).trecho(_segmento(caminho))
+
+    # Regravado como arquivo novo, como na extração (tmp + os.replace)
+    _gravar_wav(tmp_path / "novo.wav", b"\x02\x00" * 200)
+    os.replace(tmp_path / "novo.wav", caminho)
+    nova = obter_mapa(str(caminho)).trecho(_segmento(caminho))
+
+    # A visão antiga continua válida e lê o mapeamento anterior
+    assert bytes(visao) == b"\x01\x00" * 100
+    assert bytes(nova) == b"\x02\x00" * 200
+    liberar_mapa(str(caminho))
+    assert bytes(nova[:2]) == b"\x02\x00"
+    visao.release()
+    nova.release()
+
+
+def test_threads_compartilham_o_mapeamento(tmp_path):
+    caminho = tmp_path / "audio.wav"
+    _gravar_wav(caminho, b"\x00\x00" * 100)
+    liberar_mapa(str(caminho))
+    mapas = []
+    barreira = threading.Barrier(8)
+
+    def obter():
+        barreira.wait()
+        mapas.append(obter_mapa(str(caminho)))
+
+    threads = [threading.Thread(target=obter) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(m) for m in mapas}) == 1
+    liberar_mapa(str(caminho))
+
+
+def test_registro_guarda_so_os_mapas_mais_recentes(tmp_path, monkeypatch):
+    monkeypatch.setattr(pcm, "MAPAS_MAXIMOS", 2)
+    caminhos = [str(tmp_path / f"job{i}.wav") for i in range(3)]
+    for caminho in caminhos:
+        _gravar_wav(caminho, b"\x00\x00" * 10)
+    primeiro = obter_mapa(caminhos[0])
+    visao = primeiro.trecho(_segmento(caminhos[0]))
+
+    obter_mapa(caminhos[1])
+    assert obter_mapa(caminhos[0]) is primeiro
+    obter_mapa(caminhos[2])
+
+    # O job1 era o menos recente; o job0 acabou de ser usado
+    assert set(pcm._MAPAS) == {caminhos[0], caminhos[2]}
+    assert bytes(visao) == b"\x00\x00" * 10
+    visao.release()
+    for caminho in caminhos:
+        liberar_mapa(caminho)
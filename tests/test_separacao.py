@@ -0,0 +1,70 @@
+"""
+Testes da separação de voz e ambiente e da mixagem dos recortes sobre o ambiente.
+"""
+
+import numpy as np
+
+from benchmarks.fixtures import escrever_pcm16, sinal_fala
+from man_vid.separacao import separar_ambiente
+from man_vid.timeline import ler_audio, renderizar_timeline
+
+TAXA = 16000
+TOM_HZ = 50.0
+TOM_AMPLITUDE = 0.1
+
+
+def _amplitude_tom(amostras):
+    """Amplitude do tom de fundo (projeção na senoide de TOM_HZ)."""
+    t = np.arange(len(amostras)) / TAXA
+    seno = np.sin(2 * np.pi * TOM_HZ * t)
+    cosseno = np.cos(2 * np.pi * TOM_HZ * t)
+    return 2 * np.hypot(amostras @ seno, amostras @ cosseno) / len(amostras)
+
+
+def _gerar_cena(tmp_path):
+    """Master com voz em 1-3 s sobre um tom constante e um recorte dublado de 1 s."""
+    duracao = 5.0
+    intervalos = [{"start": 1.0, "end": 3.0}]
+    t = np.arange(int(duracao * TAXA)) / TAXA
+    tom = (TOM_AMPLITUDE * np.sin(2 * np.pi * TOM_HZ * t)).astype(np.float32)
+    master = tmp_path / "master.wav"
+    escrever_pcm16(str(master), (sinal_fala(intervalos, duracao, TAXA) + tom)[:, None], TAXA)
+
+    dublado = tmp_path / "recorte_1.wav"
+    escrever_pcm16(str(dublado), sinal_fala([{"start": 0.0, "end": 1.0}], 1.0, TAXA, 7)[:, None],
+                   TAXA)
+    recortes = [{"start": 1.0, "end": 3.0, "file": str(dublado)}]
+    return master, intervalos, recortes
+
+
+def test_ambiente_preserva_tom_fora_da_fala(tmp_path):
+    master, intervalos, _ = _gerar_cena(tmp_path)
+    ambiente = tmp_path / "ambiente.wav"
+    separar_ambiente(str(master), str(ambiente), intervalos)
+
+    original, _ = ler_audio(str(master))
+    separado, _ = ler_audio(str(ambiente))
+    assert separado.shape == original.shape
+    # Fora dos intervalos de fala o ambiente é o próprio master
+    np.testing.assert_allclose(separado[:TAXA // 2], original[:TAXA // 2], atol=2 / 32768)
+    # O tom de fundo continua dentro do intervalo de fala
+    assert _amplitude_tom(separado[int(1.2 * TAXA):int(2.8 * TAXA), 0]) > 0.8 * TOM_AMPLITUDE
+
+
+def test_tom_de_fundo_sobrevive_sob_a_dublagem(tmp_path):
+    master, intervalos, recortes = _gerar_cena(tmp_path)
+    ambiente = tmp_path / "ambiente.wav"
+    separar_ambiente(str(master), str(ambiente), intervalos)
+
+    final, _ = ler_audio(renderizar_timeline(str(ambiente), recortes, str(tmp_path / "final.wav"),
+                                             sobrepor=True))
+    # Sob o recorte (1-2 s) e no resto do intervalo depois dele (2-3 s)
+    assert _amplitude_tom(final[int(1.1 * TAXA):int(1.9 * TAXA), 0]) > 0.8 * TOM_AMPLITUDE
+    assert _amplitude_tom(final[int(2.1 * TAXA):int(2.9 * TAXA), 0]) > 0.8 * TOM_AMPLITUDE
+
+
+def test_sem_ambiente_o_intervalo_e_silenciado(tmp_path):
+    master, _, recortes = _gerar_cena(tmp_path)
+
+    final, _ = ler_audio(renderizar_timeline(str(master), recortes, str(tmp_path / "final.wav")))
+    assert np.abs(final[int(2.1 * TAXA):int(2.9 * TAXA)]).max() == 0.0
@@ -0,0 +1,30 @@
+"""
+Servidor de jobs (utils.servidor) em socket Unix: um socket antigo é
+substituído e qualquer outro arquivo no caminho é preservado.
+"""
+
+import socket
+
+import pytest
+
+from utils.servidor import criar_servidor
+
+
+def test_socket_antigo_e_substituido(tmp_path):
+    caminho = str(tmp_path / "jobs.sock")
+    antigo = socket.socket(socket.AF_UNIX)
+    antigo.bind(caminho)
+    antigo.close()
+
+    servidor = criar_servidor(lambda pedido, progresso: {}, socket_unix=caminho)
+    servidor.server_close()
+
+
+def test_arquivo_comum_nao_e_apagado(tmp_path):
+    arquivo = tmp_path / "jobs.sock"
+    arquivo.write_text("dados")
+
+    with pytest.raises(FileExistsError, match="não é um socket"):
+        criar_servidor(lambda pedido, progresso: {}, socket_unix=str(arquivo))
+
+    assert arquivo.read_text() == "dados"
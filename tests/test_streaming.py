@@ -0,0 +1,115 @@
+"""
+Erros de ASR e tradução no fluxo de trechos (man_aud.processar_segmentos_streaming)
+viram eventos 'erro', que fazem a etapa falhar em vez de ir para o cache.
+"""
+
+import json
+import types
+import wave
+
+import pytest
+
+import man_aud.man_aud as man_aud
+from man_aud.elabs.traduct import BackendStub, Tradutor
+from utils.manifesto import Manifesto
+
+
+class PoolFalso:
+    processos = 1
+
+    async def transcrever_async(self, segmento):
+        if segmento.offset == self.falha:
+            return ["Erro: modelo indisponível"]
+        return [json.dumps({"text": "olá"})]
+
+
+class TradutorFalso:
+    max_workers = 1
+
+    def traduzir(self, textos):
+        if textos == ["ruim"]:
+            raise RuntimeError("cota excedida")
+        return [t.upper() for t in textos]
+
+
+def _sintetizar(textos, caminho, voz, idioma):
+    with open(caminho, "wb") as f:
+        f.write(" ".join(textos).encode("utf-8"))
+    return caminho
+
+
+@pytest.fixture
+def manifesto(tmp_path):
+    audio = tmp_path / "audio.wav"
+    with wave.open(str(audio), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * 32000)
+    dados = Manifesto(str(tmp_path / "segmentos.json"))
+    dados.definir_intervalos(str(audio), [{"start": 0.0, "end": 0.5}, {"start": 1.0, "end": 1.5}])
+    dados.definir_textos({"recorte_1.wav": ["bom"], "recorte_2.wav": ["ruim"]})
+    dados.salvar()
+    return str(audio), dados
+
+
+@pytest.fixture
+def elabs(monkeypatch):
+    pool = PoolFalso()
+    modulos = {
+        "transcribe": types.SimpleNamespace(obter_pool=lambda: pool),
+        "traduct": types.SimpleNamespace(obter_tradutor=lambda **_: TradutorFalso()),
+        "labs": types.SimpleNamespace(sintetizar_textos=_sintetizar),
+    }
+    monkeypatch.setattr(man_aud, "_carregar_elabs", modulos.__getitem__)
+    return pool
+
+
+def _executar(manifesto, reconhecer):
+    audio, dados = manifesto
+    eventos = []
+    man_aud.processar_segmentos_streaming(audio, dados.caminho, reconhecer=reconhecer,
+                                          idiomas=[("en", "voz")], progresso=eventos.append)
+    return eventos
+
+
+def test_erro_de_traducao_gera_evento(manifesto, elabs):
+    eventos = _executar(manifesto, reconhecer=False)
+
+    erros = [e for e in eventos if e["acao"] == "erro"]
+    assert [(e["trecho"], e["etapa"], e["idioma"]) for e in erros] == [("recorte_2.wav", "traducao", "en")]
+    assert [e["trecho"] for e in eventos if e["acao"] == "fim"] == ["recorte_1.wav"]
+
+
+def test_erro_de_asr_gera_evento(manifesto, elabs):
+    _, dados = manifesto
+    elabs.falha = dados.trechos[0]["deslocamento"]
+
+    eventos = _executar(manifesto, reconhecer=True)
+
+    erros = [e for e in eventos if e["acao"] == "erro"]
+    assert [(e["trecho"], e["etapa"]) for e in erros] == [("recorte_1.wav", "asr")]
+    assert "modelo indisponível" in erros[0]["erro"]
+    assert [e["trecho"] for e in eventos if e["acao"] == "fim"] == ["recorte_2.wav"]
+
+
+def test_backend_fora_do_ar_gera_evento(manifesto, elabs, monkeypatch):
+    class BackendOffline(BackendStub):
+        def traduzir_lote(self, textos):
+            raise ConnectionError("offline")
+
+    # O Tradutor real não levanta a exceção: devolve 'Erro na tradução: ...'
+    tradutor = Tradutor(BackendOffline(), max_workers=1)
+    monkeypatch.setattr(man_aud._carregar_elabs("traduct"), "obter_tradutor", lambda **_: tradutor)
+
+    eventos = _executar(manifesto, reconhecer=False)
+
+    assert [(e["trecho"], e["etapa"], e["acao"], e["erro"]) for e in eventos] == [
+        ("recorte_1.wav", "traducao", "erro", "offline"),
+        ("recorte_2.wav", "traducao", "erro", "offline"),
+    ]
+
+
+def test_erro_da_transcricao():
+    assert man_aud._erro_da_transcricao([json.dumps({"text": "olá"})]) is None
+    assert man_aud._erro_da_transcricao(["Formato inválido"]) == "Formato inválido"
@@ -0,0 +1,144 @@
+"""
+Tradutor com backend local (BackendStub), deduplicação de frases e cache de
+traduções em SQLite (man_aud.elabs.traduct e cache_traducao).
+"""
+
+import itertools
+import sqlite3
+
+import pytest
+
+from man_aud.elabs import cache_traducao
+from man_aud.elabs.cache_traducao import CacheTraducao
+from man_aud.elabs.traduct import BackendStub, Tradutor, criar_tradutor
+
+
+class BackendContador(BackendStub):
+    """BackendStub que guarda os lotes recebidos."""
+
+    def __init__(self, source="pt", target="en"):
+        super().__init__(source, target)
+        self.lotes = []
+
+    def traduzir_lote(self, textos):
+        self.lotes.append(list(textos))
+        return super().traduzir_lote(textos)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CacheTraducao(str(tmp_path / "traducoes.sqlite3"))
+    yield cache
+    cache.fechar()
+
+
+def test_stub_traduz_sem_rede(tmp_path):
+    tradutor = criar_tradutor("stub", target="es", caminho_cache=str(tmp_path / "c.sqlite3"))
+
+    assert tradutor.traduzir(["olá", "", "mundo"]) == ["[es] olá", "", "[es] mundo"]
+    assert tradutor.backend.chamadas == 1
+
+
+def test_frases_repetidas_sao_traduzidas_uma_vez():
+    backend = BackendContador()
+    tradutor = Tradutor(backend)
+
+    traducoes = tradutor.traduzir(["bom dia", "  bom   dia ", "até logo", "bom dia"])
+
+    assert traducoes == ["[en] bom dia", "[en] bom dia", "[en] até logo", "[en] bom dia"]
+    assert backend.lotes == [["bom dia", "até logo"]]
+
+
+def test_cache_evita_nova_chamada(cache):
+    backend = BackendContador()
+    tradutor = Tradutor(backend, cache)
+
+    tradutor.traduzir(["bom dia", "até logo"])
+    traducoes = tradutor.traduzir(["até logo", "bom dia", "obrigado"])
+
+    assert traducoes == ["[en] até logo", "[en] bom dia", "[en] obrigado"]
+    assert backend.lotes == [["bom dia", "até logo"], ["obrigado"]]
+
+
+def test_falhas_nao_entram_no_cache(cache):
+    class BackendFalho(BackendStub):
+        def traduzir_lote(self, textos):
+            raise RuntimeError("sem conexão")
+
+    traducoes = Tradutor(BackendFalho(), cache).traduzir(["bom dia"])
+
+    assert traducoes == ["Erro na tradução: sem conexão"]
+    assert cache.buscar("stub", "pt", "en", ["bom dia"]) == {}
+
+
+def test_limite_remove_as_entradas_menos_usadas(cache, monkeypatch):
+    relogio = itertools.count(1)
+    monkeypatch.setattr(cache_traducao.time, "time", lambda: float(next(relogio)))
+    # Cada entrada ocupa 10 bytes (texto de 5 + tradução de 5); acima do limite,
+    # o cache volta a 90% dele (31 bytes)
+    cache.limite_bytes = 35
+
+    cache.salvar("stub", "pt", "en", {"aaaaa": "AAAAA"})
+    cache.salvar("stub", "pt", "en", {"bbbbb": "BBBBB"})
+    cache.salvar("stub", "pt", "en", {"ccccc": "CCCCC"})
+    # Acessar "aaaaa" a torna a mais recente; "bbbbb" passa a ser a mais antiga
+    assert cache.buscar("stub", "pt", "en", ["aaaaa"]) == {"aaaaa": "AAAAA"}
+    cache.salvar("stub", "pt", "en", {"ddddd": "DDDDD"})
+
+    restantes = cache.buscar("stub", "pt", "en", ["aaaaa", "bbbbb", "ccccc", "ddddd"])
+    assert sorted(restantes) == ["aaaaa", "ccccc", "ddddd"]
+    assert cache.tamanho_total() == 30
+
+
+def test_cache_separa_idiomas(cache):
+    cache.salvar("stub", "pt", "en", {"olá": "hello"})
+
+    assert cache.buscar("stub", "pt", "es", ["olá"]) == {}
+    assert cache.buscar("stub", "pt", "en", ["olá"]) == {"olá": "hello"}
+
+
+def test_cache_separa_backends(cache):
+    class BackendReal(BackendContador):
+        nome = "google"
+
+    Tradutor(BackendStub(), cache).traduzir(["bom dia"])
+    real = BackendReal()
+
+    # A tradução simulada do stub não é servida como tradução real
+    assert Tradutor(real, cache).traduzir(["bom dia"]) == ["[en] bom dia"]
+    assert real.lotes == [["bom dia"]]
+    assert cache.buscar("google", "pt", "en", ["bom dia"]) == {"bom dia": "[en] bom dia"}
+
+
+def test_cache_antigo_sem_backend_e_descartado(tmp_path):
+    caminho = str(tmp_path / "antigo.sqlite3")
+    conn = sqlite3.connect(caminho)
+    conn.execute("CREATE TABLE traducoes (chave TEXT PRIMARY KEY, source TEXT NOT NULL,"
+                 " target TEXT NOT NULL, texto TEXT NOT NULL, traducao TEXT NOT NULL,"
+                 " tamanho INTEGER NOT NULL, acesso REAL NOT NULL)")
+    conn.execute("INSERT INTO traducoes VALUES ('x', 'pt', 'en', 'olá', '[en] olá', 12, 1)")
+    conn.commit()
+    conn.close()
+
+    cache = CacheTraducao(caminho)
+    try:
+        assert cache.tamanho_total() == 0
+        cache.salvar("google", "pt", "en", {"olá": "hello"})
+        assert cache.buscar("google", "pt", "en", ["olá"]) == {"olá": "hello"}
+    finally:
+        cache.fechar()
+
+
+def test_limite_nao_soma_a_tabela_a_cada_gravacao(cache, monkeypatch):
+    somas = []
+    somar = cache._somar_tamanho
+    monkeypatch.setattr(cache, "_somar_tamanho", lambda: somas.append(1) or somar())
+
+    for i in range(10):
+        cache.salvar("stub", "pt", "en", {f"frase {i}": f"phrase {i}"})
+
+    assert somas == []
+    cache.limite_bytes = 50
+    cache.salvar("stub", "pt", "en", {"frase 10": "phrase 10"})
+    assert len(somas) == 1
+    assert cache.tamanho_total() <= 50
@@ -0,0 +1,137 @@
+"""
+Cliente da ElevenLabs (man_aud.elabs.labs.ClienteTTS) contra um servidor HTTP
+local: novas tentativas com backoff, Retry-After, erros definitivos e cache em disco.
+"""
+
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from man_aud.elabs import labs
+from utils import agendador
+
+
+class ServidorMock:
+    """Responde com os status da fila e, quando ela acaba, com 200 e o áudio."""
+
+    def __init__(self):
+        self.respostas = []
+        self.pedidos = []
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers["Content-Length"]))
+                mock.pedidos.append((self.path, dict(self.headers), corpo))
+                status, cabecalhos = mock.respostas.pop(0) if mock.respostas else (200, {})
+                dados = b"AUDIO" if status == 200 else b'{"detail": "erro"}'
+                self.send_response(status)
+                for nome, valor in cabecalhos.items():
+                    self.send_header(nome, valor)
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._servidor.server_address[1]}"
+        self._thread = threading.Thread(target=self._servidor.serve_forever, args=(0.01,),
+                                        daemon=True)
+        self._thread.start()
+
+    def fechar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+@pytest.fixture
+def servidor():
+    mock = ServidorMock()
+    yield mock
+    mock.fechar()
+
+
+@pytest.fixture
+def esperas(monkeypatch):
+    esperas = []
+    monkeypatch.setattr(labs, "time", types.SimpleNamespace(sleep=esperas.append))
+    monkeypatch.setattr(labs.random, "random", lambda: 0.0)
+    # Agendador próprio, sem a taxa padrão de requisições do serviço 'tts'
+    monkeypatch.setattr(agendador, "_AGENDADOR",
+                        agendador.Agendador(nucleos=1, servicos={"tts": (4, 0)}))
+    return esperas
+
+
+@pytest.fixture
+def cliente(servidor, esperas, tmp_path):
+    cliente = labs.ClienteTTS("chave", servidor.url, max_tentativas=3, espera_base=0.5,
+                              pasta_cache=str(tmp_path / "cache"))
+    yield cliente
+    cliente.fechar()
+
+
+def test_repete_com_backoff_e_retry_after(servidor, cliente, esperas, tmp_path):
+    servidor.respostas = [(503, {}), (429, {"Retry-After": "7"})]
+    saida = tmp_path / "recorte_1.wav"
+
+    assert cliente.sintetizar("olá", "voz", str(saida)) == (str(saida), False)
+
+    assert saida.read_bytes() == b"AUDIO"
+    assert esperas == [0.5, 7.0]
+    assert len(servidor.pedidos) == 3
+    caminho, cabecalhos, _ = servidor.pedidos[0]
+    assert caminho == f"/v1/text-to-speech/voz?output_format={labs.FORMATO_PADRAO}"
+    assert cabecalhos["xi-api-key"] == "chave"
+
+
+def test_erro_definitivo_nao_repete(servidor, cliente, esperas, tmp_path):
+    servidor.respostas = [(400, {})]
+
+    with pytest.raises(labs.ErroTTS, match="400"):
+        cliente.sintetizar("olá", "voz", str(tmp_path / "recorte_1.wav"))
+
+    assert len(servidor.pedidos) == 1
+    assert esperas == []
+
+
+def test_tentativas_esgotadas(servidor, cliente, esperas, tmp_path):
+    servidor.respostas = [(500, {})] * 3
+
+    with pytest.raises(labs.ErroTTS, match="Tentativas esgotadas"):
+        cliente.sintetizar("olá", "voz", str(tmp_path / "recorte_1.wav"))
+
+    assert len(servidor.pedidos) == 3
+    # Sem espera depois da última tentativa
+    assert esperas == [0.5, 1.0]
+    assert not any(p.suffix == ".part" for p in (tmp_path / "cache").rglob("*"))
+
+
+def test_cache_em_disco(servidor, cliente, tmp_path):
+    primeiro = cliente.sintetizar("olá", "voz", str(tmp_path / "a.wav"))
+    segundo = cliente.sintetizar("olá", "voz", str(tmp_path / "b.wav"))
+    outra_voz = cliente.sintetizar("olá", "outra", str(tmp_path / "c.wav"))
+
+    assert (primeiro[1], segundo[1], outra_voz[1]) == (False, True, False)
+    assert (tmp_path / "b.wav").read_bytes() == b"AUDIO"
+    assert len(servidor.pedidos) == 2
+
+
+def test_sintetizar_varios_devolve_as_falhas(servidor, cliente, tmp_path):
+    servidor.respostas = [(422, {})]
+
+    resultados = cliente.sintetizar_varios([("um", str(tmp_path / "a.wav"))], "voz")
+
+    assert isinstance(resultados[0], labs.ErroTTS)
+
+
+def test_locks_do_cache_nao_crescem(cliente, tmp_path):
+    for i in range(200):
+        cliente._lock_da_chave(str(tmp_path / f"{i}.mp3"))
+
+    assert len(cliente._locks) == labs.LOCKS_CACHE
+    caminho = str(tmp_path / "0.mp3")
+    assert cliente._lock_da_chave(caminho) is cliente._lock_da_chave(caminho)
@@ -0,0 +1,239 @@
+"""
+Módulo de Agendamento de Recursos
+Este módulo fornece funcionalidades para dividir o trabalho dos jobs entre CPU e
+rede. Trechos que usam CPU (VAD, Vosk, colagem, codificação) ocupam uma vaga de
+CPU, e o número de vagas é o número de núcleos. Chamadas de rede (downloads,
+tradução, TTS) passam por um limite de concorrência e um balde de tokens
+(requisições por segundo) de cada serviço. A ElevenLabs tem ainda um balde de
+caracteres por minuto.
+
+Um lote compartilha um único agendador entre todos os processos de jobs (ver
+main._executar_em_processos). As vagas e os baldes ficam em memória compartilhada,
+então os limites e a cota de caracteres valem para o lote inteiro e não por job.
+Pools de workers de um job (ex.: o de ASR) usam só a parte das vagas que cabe a
+ele (ver Agendador.vagas_por_job).
+Sem agendador instalado, cada processo cria o seu na primeira chamada (modo
+servidor e job único).
+
+Os limites padrão podem ser trocados por variáveis de ambiente:
+POLIGLOTA_<SERVICO>_CONCORRENCIA, POLIGLOTA_<SERVICO>_REQ_S (ex.:
+POLIGLOTA_TTS_REQ_S=1.5) e POLIGLOTA_TTS_CARACTERES_MIN.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+
+# Serviço -> (requisições simultâneas, requisições por segundo)
+SERVICOS = {
+    "download": (4, 2.0),
+    "traducao": (8, 10.0),
+    "tts": (4, 3.0),
+}
+
+# Caracteres enviados à ElevenLabs por minuto, somando todos os jobs
+CARACTERES_TTS_POR_MINUTO = 30000
+
+# Agendador do processo atual (instalado pelo lote ou criado sob demanda)
+_AGENDADOR = None
+_AGENDADOR_LOCK = threading.Lock()
+
+
+class BaldeTokens:
+    """
+    Balde de tokens em memória compartilhada: enche a uma taxa fixa até a
+    capacidade e cada uso retira tokens, esperando quando não há o bastante.
+    Pode ser repassado a processos filhos na criação (ex.: initargs de um pool).
+    """
+
+    def __init__(self, taxa, capacidade=None, ctx=None):
+        """
+        Args:
+            taxa (float): Tokens repostos por segundo
+            capacidade (float, optional): Máximo acumulado (rajada). Padrão: taxa
+            ctx (multiprocessing.context.BaseContext, optional): Contexto usado
+                para criar a memória compartilhada
+        """
+        ctx = ctx or multiprocessing.get_context()
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade or taxa)
+        self._lock = ctx.Lock()
+        self._tokens = ctx.RawValue("d", self.capacidade)
+        self._atualizado = ctx.RawValue("d", time.monotonic())
+
+    def adquirir(self, quantidade=1.0):
+        """
+        Retira tokens, esperando até que o balde os tenha. Pedidos maiores que a
+        capacidade esperam o balde encher e deixam o saldo negativo (a dívida
+        atrasa os pedidos seguintes).
+
+        Args:
+            quantidade (float): Tokens a retirar
+
+        Returns:
+            float: Tempo esperado em segundos
+        """
+        necessario = min(float(quantidade), self.capacidade)
+        esperado = 0.0
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                tokens = min(self.capacidade,
+                             self._tokens.value + (agora - self._atualizado.value) * self.taxa)
+                self._atualizado.value = agora
+                if tokens >= necessario:
+                    self._tokens.value = tokens - quantidade
+                    return esperado
+                self._tokens.value = tokens
+                espera = (necessario - tokens) / self.taxa
+            time.sleep(espera)
+            esperado += espera
+
+
+class Agendador:
+    """
+    Vagas de CPU e limites de rede compartilhados pelos jobs.
+    """
+
+    def __init__(self, nucleos=None, servicos=None, caracteres_tts_por_minuto=None, ctx=None,
+                 jobs=1):
+        """
+        Args:
+            nucleos (int, optional): Vagas de CPU. Padrão: núcleos da máquina
+            servicos (dict, optional): Serviço -> (concorrência, requisições por
+                                       segundo). Padrão: SERVICOS com as variáveis
+                                       de ambiente aplicadas
+            caracteres_tts_por_minuto (int, optional): Cota de caracteres da
+                                                       ElevenLabs por minuto
+            ctx (multiprocessing.context.BaseContext, optional): Contexto da
+                memória compartilhada
+            jobs (int): Processos de jobs que dividem as vagas (ver vagas_por_job)
+        """
+        ctx = ctx or multiprocessing.get_context()
+        self.nucleos = nucleos or os.cpu_count() or 1
+        self.jobs = max(1, int(jobs))
+        self.servicos = servicos or servicos_configurados()
+        if caracteres_tts_por_minuto is None:
+            caracteres_tts_por_minuto = float(os.getenv("POLIGLOTA_TTS_CARACTERES_MIN",
+                                                        CARACTERES_TTS_POR_MINUTO))
+
+        self._cpu = ctx.BoundedSemaphore(self.nucleos)
+        self._limites = {nome: ctx.BoundedSemaphore(max(1, int(concorrencia)))
+                         for nome, (concorrencia, _) in self.servicos.items()}
+        self._baldes = {nome: BaldeTokens(taxa, ctx=ctx)
+                        for nome, (_, taxa) in self.servicos.items() if taxa}
+        # Rajada de até um minuto de cota
+        self._caracteres = BaldeTokens(caracteres_tts_por_minuto / 60.0,
+                                       caracteres_tts_por_minuto, ctx=ctx)
+
+    @contextmanager
+    def cpu(self):
+        """
+        Ocupa uma vaga de CPU enquanto o bloco executa.
+        """
+        self._cpu.acquire()
+        try:
+            yield
+        finally:
+            self._cpu.release()
+
+    @asynccontextmanager
+    async def cpu_async(self):
+        """
+        Como cpu(), mas espera a vaga sem bloquear o loop asyncio.
+        """
+        if not self._cpu.acquire(False):
+            # O semáforo é de processos, então a espera bloqueante vai para uma thread
+            espera = asyncio.get_running_loop().run_in_executor(None, self._cpu.acquire)
+            try:
+                await asyncio.shield(espera)
+            except asyncio.CancelledError:
+                # A thread ainda obtém a vaga; ela é devolvida assim que isso acontecer
+                espera.add_done_callback(lambda _: self._cpu.release())
+                raise
+        try:
+            yield
+        finally:
+            self._cpu.release()
+
+    def vagas_por_job(self):
+        """
+        Parte das vagas de CPU de cada job, para dimensionar os pools de workers
+        de um job (ex.: o pool de ASR) sem que os jobs do lote, somados, criem
+        mais processos do que há vagas.
+
+        Returns:
+            int: Vagas de CPU divididas pelos jobs (ao menos 1)
+        """
+        return max(1, self.nucleos // self.jobs)
+
+    @contextmanager
+    def servico(self, nome, caracteres=0):
+        """
+        Respeita a taxa e ocupa uma vaga do serviço durante uma requisição.
+        Serviços desconhecidos não são limitados.
+
+        Args:
+            nome (str): Chave de SERVICOS ('download', 'traducao', 'tts')
+            caracteres (int): Caracteres enviados à ElevenLabs (só 'tts')
+        """
+        if caracteres:
+            self._caracteres.adquirir(caracteres)
+        balde = self._baldes.get(nome)
+        if balde is not None:
+            balde.adquirir()
+        limite = self._limites.get(nome)
+        if limite is None:
+            yield
+            return
+        limite.acquire()
+        try:
+            yield
+        finally:
+            limite.release()
+
+
+def obter_agendador():
+    """
+    Retorna o agendador do processo, criando-o na primeira chamada.
+
+    Returns:
+        Agendador: Agendador instalado pelo lote ou local ao processo
+    """
+    global _AGENDADOR
+    with _AGENDADOR_LOCK:
+        if _AGENDADOR is None:
+            _AGENDADOR = Agendador()
+        return _AGENDADOR
+
+
+def instalar_agendador(agendador):
+    """
+    Define o agendador do processo. Usado como inicializador dos processos de
+    jobs, para que todos compartilhem as mesmas vagas e baldes.
+
+    Args:
+        agendador (Agendador): Agendador criado no processo principal
+    """
+    global _AGENDADOR
+    with _AGENDADOR_LOCK:
+        _AGENDADOR = agendador
+
+
+def servicos_configurados():
+    """
+    Aplica as variáveis de ambiente aos limites padrão dos serviços.
+
+    Returns:
+        dict: Serviço -> (concorrência, requisições por segundo)
+    """
+    servicos = {}
+    for nome, (concorrencia, taxa) in SERVICOS.items():
+        prefixo = f"POLIGLOTA_{nome.upper()}"
+        servicos[nome] = (int(os.getenv(f"{prefixo}_CONCORRENCIA", concorrencia)),
+                          float(os.getenv(f"{prefixo}_REQ_S", taxa)))
+    return servicos
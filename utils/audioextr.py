@@ -1,37 +1,73 @@
 """
 Módulo de Extração de Áudio
-Este módulo fornece funcionalidades para extrair áudio de arquivos de vídeo
-utilizando pydub para conversão de formatos.
+Este módulo fornece funcionalidades para extrair áudio de arquivos de vídeo,
+decodificando a trilha uma única vez com ffmpeg e gerando ao mesmo tempo o PCM
+mono 16 kHz usado pelo Vosk e um PCM master na taxa original.
 """
 
 import os
+import subprocess
 
-from pydub import AudioSegment
+from utils.rastreio import rastrear
 
 
-def extrair_audio_mp4(input_path, output_path=None):
+def caminhos_pcm(video_path):
     """
-    Extrai áudio de arquivo MP4 e converte para MP3.
-    
+    Gera os caminhos dos arquivos PCM derivados de um vídeo.
+
+    Args:
+        video_path (str): Caminho do arquivo de vídeo
+
+    Returns:
+        tuple: (caminho_vosk, caminho_master)
+    """
+    base = os.path.splitext(video_path)[0]
+    return f"{base}_vosk.wav", f"{base}_master.wav"
+
+
+def extrair_audio_pcm(input_path, destino=None):
+    """
+    Extrai o áudio do vídeo em uma única decodificação.
+
+    Uma só execução do ffmpeg decodifica a trilha de áudio e grava duas saídas:
+    WAV mono 16 kHz (ASR) e WAV na taxa e canais originais (master). As saídas
+    são gravadas em arquivos temporários e renomeadas ao final, de modo que um
+    arquivo presente no disco está sempre completo.
+
     Args:
-        input_path (str): Caminho do arquivo de vídeo de entrada
-        output_path (str, optional): Caminho de saída para o áudio. 
-                                   Se None, gera automaticamente baseado no input
-        
+        input_path (str): Caminho do arquivo de entrada (vídeo ou só o áudio)
+        destino (str, optional): Caminho cujo nome base define os PCM gerados
+                                 (ver caminhos_pcm). Padrão: input_path
+
     Returns:
-        str: Caminho do arquivo de áudio extraído ou mensagem de erro
+        tuple: (caminho_vosk, caminho_master) ou None se falhar
     """
     if not os.path.isfile(input_path):
-        return f"Arquivo não encontrado: {input_path}"
-    
-    if output_path is None:
-        base = os.path.splitext(os.path.basename(input_path))[0]
-        pasta = os.path.dirname(input_path)
-        output_path = os.path.join(pasta, f"{base}.mp3")
-    
+        print(f"Arquivo não encontrado: {input_path}")
+        return None
+
+    vosk_path, master_path = caminhos_pcm(destino or input_path)
+    vosk_tmp = vosk_path + ".part"
+    master_tmp = master_path + ".part"
+
+    cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-i", input_path,
+        "-map", "0:a:0", "-ac", "1", "-ar", "16000",
+        "-c:a", "pcm_s16le", "-f", "wav", vosk_tmp,
+        "-map", "0:a:0",
+        "-c:a", "pcm_s16le", "-f", "wav", master_tmp,
+    ]
+
     try:
-        audio = AudioSegment.from_file(input_path, format="mp4")
-        audio.export(output_path, format="mp3")
-        return output_path
-    except Exception as e:
-        return f"Erro ao extrair áudio: {e}"
+        with rastrear("ffmpeg", "subprocesso", acao="extrair_pcm", arquivo=input_path):
+            subprocess.run(cmd, check=True)
+        os.replace(vosk_tmp, vosk_path)
+        os.replace(master_tmp, master_path)
+        return vosk_path, master_path
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Erro ao extrair áudio: {e}")
+        for tmp in (vosk_tmp, master_tmp):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return None
@@ -2,52 +2,371 @@
 Módulo de Download para YouTube Shorts
 Este módulo fornece funcionalidades para baixar vídeos do YouTube Shorts
 utilizando yt-dlp com configurações otimizadas.
+
+Inclui o suporte ao gerenciador de downloads do lote: arquivo de registro no
+formato --download-archive do yt-dlp, retomada de downloads parciais (.part)
+com verificação de integridade do MP4 (um arquivo íntegro é pulado sem acessar
+a rede) e expansão da aba Shorts de um canal ou de uma playlist em URLs
+individuais. IDs que já estão no registro são pulados antes de qualquer acesso à
+rede: na expansão de canais e playlists eles não viram jobs, e o download de um
+ID registrado com o arquivo local íntegro não chama o yt-dlp.
+
+Também baixa separadamente só o áudio ou só o vídeo, para que as etapas de
+áudio comecem antes de o vídeo terminar de baixar (modo áudio primeiro).
 """
 
+import contextlib
 import os
 import re
+import struct
+import threading
 
-import yt_dlp
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock entre threads
+    fcntl = None
 
 from utils.url import shorts_url_ok
 
 
-def download_shorts(url, output_path="downloads"):
+# Caixas de topo que um MP4 completo precisa ter
+CAIXAS_OBRIGATORIAS = {b"ftyp", b"moov", b"mdat"}
+
+# Formato -> (sufixo do arquivo, seletor de formato do yt-dlp). Áudio e vídeo
+# separados ficam restritos a contêineres MP4 (m4a/mp4) para passar na
+# verificação de integridade e no mux final com cópia do vídeo.
+FORMATOS = {
+    "completo": (".mp4", "bestvideo+bestaudio/best"),
+    "audio": ("_audio.m4a", "bestaudio[ext=m4a]"),
+    "video": ("_video.mp4", "bestvideo[ext=mp4]"),
+}
+
+
+def download_shorts(url, output_path="downloads", registro=None, formato="completo"):
     """
     Baixa vídeo do YouTube Shorts para o diretório especificado.
-    
+
+    Um arquivo já presente só é reaproveitado se estiver íntegro; downloads
+    interrompidos são retomados a partir dos arquivos .part do yt-dlp.
+
     Args:
         url (str): URL do YouTube Shorts
         output_path (str): Diretório de saída para o arquivo baixado
-        
+        registro (RegistroDownloads, optional): Registro de IDs já baixados
+        formato (str): 'completo' (vídeo com áudio, {id}.mp4), 'audio'
+                       ({id}_audio.m4a) ou 'video' (sem áudio, {id}_video.mp4)
+
     Returns:
         str: Caminho do arquivo baixado ou mensagem de erro
     """
     if not shorts_url_ok(url):
         return "URL inválida. Não é possível baixar."
-    
+
     if not os.path.exists(output_path):
         os.makedirs(output_path)
-    
+
     # Extrai o ID do vídeo da URL
     match = re.search(r"shorts/([\w-]+)", url)
     video_id = match.group(1) if match else "video"
-    video_filename = f"{video_id}.mp4"
-    
+    filename = caminho_download(output_path, video_id, formato)
+    # O registro só recebe o ID quando o vídeo em si foi obtido
+    if formato == "audio":
+        registro = None
+
+    # Verificado antes de qualquer chamada ao yt-dlp: ID conhecido com arquivo
+    # íntegro não gera acesso à rede
+    registrado = registro is not None and registro.contem(video_id)
+    if mp4_integro(filename):
+        if registro is not None and not registrado:
+            registro.adicionar(video_id)
+        print(f"Arquivo íntegro já existe, pulando download: {filename}")
+        return filename
+    if os.path.exists(filename):
+        # Arquivo final truncado ou corrompido: baixa de novo
+        print(f"Arquivo incompleto, baixando novamente: {filename}")
+        os.remove(filename)
+    if registrado:
+        # Registrado, mas o arquivo local sumiu ou estava corrompido
+        registro.remover(video_id)
+
     ydl_opts = {
-        'outtmpl': os.path.join(output_path, video_filename),
-        'format': 'bestvideo+bestaudio/best',
-        'merge_output_format': 'mp4',
+        'outtmpl': filename,
+        'format': FORMATOS[formato][1],
         'quiet': True,
-        'noplaylist': True
+        'noplaylist': True,
+        # Retoma a partir dos .part de uma tentativa anterior
+        'continuedl': True,
+        'retries': 10,
+        'fragment_retries': 10,
     }
-    
+    if formato == "completo":
+        ydl_opts['merge_output_format'] = 'mp4'
+
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        import yt_dlp
+        from utils.agendador import obter_agendador
+
+        with obter_agendador().servico("download"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
             ydl.extract_info(url, download=True)
-            filename = os.path.join(output_path, video_filename)
-            print(f"Download concluído: {filename}")
-            return filename
+        if not mp4_integro(filename):
+            raise IOError(f"arquivo baixado não é um MP4 íntegro: {filename}")
+        if registro is not None:
+            registro.adicionar(video_id)
+        print(f"Download concluído: {filename}")
+        return filename
     except Exception as e:
         print(f"Erro ao baixar: {e}")
-        return f"Erro: {e}"
\ No newline at end of file
+        return f"Erro: {e}"
+
+
+def caminho_download(output_path, video_id, formato="completo"):
+    """
+    Caminho do arquivo baixado para um ID e formato.
+
+    Args:
+        output_path (str): Diretório de saída
+        video_id (str): ID do vídeo
+        formato (str): Chave de FORMATOS
+
+    Returns:
+        str: Caminho do arquivo
+    """
+    return os.path.join(output_path, f"{video_id}{FORMATOS[formato][0]}")
+
+
+def expandir_urls(urls, registro=None):
+    """
+    Converte URLs de canal ou playlist nas URLs dos Shorts que elas contêm.
+    URLs de Shorts são mantidas; a ordem e a ausência de repetições são preservadas.
+
+    Args:
+        urls (list): URLs de Shorts, canais (@nome, /channel/, /c/, /user/) ou playlists
+        registro (RegistroDownloads, optional): Registro de IDs já baixados; os Shorts
+                                                de canais e playlists que já estão nele
+                                                são pulados (URLs de Shorts informadas
+                                                diretamente são mantidas)
+
+    Returns:
+        list: URLs individuais de Shorts
+    """
+    resultado = []
+    for url in urls:
+        url = url.strip()
+        if not url:
+            continue
+        if re.search(r"youtube\.com/shorts/[\w-]+", url):
+            resultado.append(url)
+            continue
+
+        ids = _listar_ids(_url_da_listagem(url))
+        print(f"{len(ids)} Shorts encontrados em {url}")
+        if registro is not None:
+            novos = [video_id for video_id in ids if not registro.contem(video_id)]
+            if len(novos) < len(ids):
+                print(f"{len(ids) - len(novos)} já estão no registro de downloads, pulando.")
+            ids = novos
+        resultado.extend(f"https://www.youtube.com/shorts/{video_id}" for video_id in ids)
+    return list(dict.fromkeys(resultado))
+
+
+def mp4_integro(caminho):
+    """
+    Verifica se um MP4 está completo percorrendo as caixas (boxes) de topo:
+    os tamanhos declarados precisam fechar exatamente com o tamanho do arquivo
+    e as caixas ftyp, moov e mdat precisam existir. Um download truncado falha
+    nessa verificação sem precisar decodificar o vídeo.
+
+    Args:
+        caminho (str): Caminho do arquivo
+
+    Returns:
+        bool: True se o arquivo existe e está íntegro
+    """
+    try:
+        tamanho_arquivo = os.path.getsize(caminho)
+        encontradas = set()
+        with open(caminho, "rb") as f:
+            posicao = 0
+            while posicao < tamanho_arquivo:
+                f.seek(posicao)
+                cabecalho = f.read(8)
+                if len(cabecalho) < 8:
+                    return False
+                tamanho, tipo = struct.unpack(">I4s", cabecalho)
+                if tamanho == 1:
+                    # Tamanho de 64 bits logo após o cabeçalho
+                    estendido = f.read(8)
+                    if len(estendido) < 8:
+                        return False
+                    tamanho = struct.unpack(">Q", estendido)[0]
+                elif tamanho == 0:
+                    # Caixa vai até o fim do arquivo
+                    tamanho = tamanho_arquivo - posicao
+                if tamanho < 8:
+                    return False
+                encontradas.add(tipo)
+                posicao += tamanho
+        return posicao == tamanho_arquivo and CAIXAS_OBRIGATORIAS <= encontradas
+    except OSError:
+        return False
+
+
+class RegistroDownloads:
+    """
+    Arquivo de registro compatível com --download-archive do yt-dlp
+    (uma linha "youtube <id>" por vídeo). Só recebe IDs cujo MP4 passou na
+    verificação de integridade.
+
+    O mesmo arquivo é compartilhado pelos processos de um lote: toda alteração
+    é feita sob um lock de arquivo (fcntl, em <caminho>.lock) e parte do
+    conteúdo atual do disco, então IDs gravados por outros processos não se
+    perdem. Seguro também para várias threads.
+    """
+
+    def __init__(self, caminho):
+        """
+        Args:
+            caminho (str): Caminho do arquivo de registro
+        """
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._ids = set()
+        # (mtime, tamanho) do arquivo quando _ids foi lido
+        self._versao = None
+
+    def contem(self, video_id):
+        """
+        Indica se o ID já foi baixado (por este ou por outro processo).
+
+        Args:
+            video_id (str): ID do vídeo
+
+        Returns:
+            bool: True se o ID está no registro
+        """
+        with self._lock:
+            self._recarregar()
+            return video_id in self._ids
+
+    def adicionar(self, video_id):
+        """
+        Registra um ID baixado.
+
+        Args:
+            video_id (str): ID do vídeo
+        """
+        with self._lock, self._bloquear_arquivo():
+            self._recarregar()
+            if video_id in self._ids:
+                return
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(f"youtube {video_id}\n")
+            self._ids.add(video_id)
+            self._versao = None
+
+    def remover(self, video_id):
+        """
+        Retira um ID do registro (ex.: arquivo local apagado ou corrompido).
+
+        Args:
+            video_id (str): ID do vídeo
+        """
+        with self._lock, self._bloquear_arquivo():
+            # Reescreve a partir do disco, não da cópia em memória
+            self._versao = None
+            self._recarregar()
+            if video_id not in self._ids:
+                return
+            self._ids.discard(video_id)
+            tmp = self.caminho + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(f"youtube {i}\n" for i in sorted(self._ids))
+            os.replace(tmp, self.caminho)
+            self._versao = None
+
+    def _recarregar(self):
+        """
+        Relê o arquivo se ele mudou desde a última leitura. Chamado com self._lock.
+        """
+        try:
+            estado = os.stat(self.caminho)
+        except FileNotFoundError:
+            self._ids, self._versao = set(), None
+            return
+        versao = (estado.st_mtime_ns, estado.st_size)
+        if versao == self._versao:
+            return
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            self._ids = {partes[1] for partes in map(str.split, f)
+                         if len(partes) == 2 and partes[0] == "youtube"}
+        self._versao = versao
+
+    @contextlib.contextmanager
+    def _bloquear_arquivo(self):
+        """
+        Lock exclusivo entre processos durante uma alteração do registro.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.caminho + ".lock", "a") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+def _url_da_listagem(url):
+    """
+    Aponta URLs de canal para a aba Shorts; playlists ficam como estão.
+
+    Args:
+        url (str): URL de canal ou playlist
+
+    Returns:
+        str: URL a listar
+    """
+    if "list=" in url:
+        return url
+    canal = re.match(r"^(https?://)?(www\.)?youtube\.com/(@[\w.-]+|channel/[\w-]+|c/[\w.-]+|user/[\w.-]+)",
+                     url)
+    if canal:
+        return f"https://www.youtube.com/{canal.group(3)}/shorts"
+    return url
+
+
+def _listar_ids(url):
+    """
+    Lista os IDs de vídeo de uma aba ou playlist sem baixar nada.
+
+    Args:
+        url (str): URL da aba Shorts ou da playlist
+
+    Returns:
+        list: IDs de vídeo, na ordem da listagem
+    """
+    import yt_dlp
+    from utils.agendador import obter_agendador
+
+    opcoes = {'quiet': True, 'extract_flat': 'in_playlist', 'skip_download': True}
+    try:
+        with obter_agendador().servico("download"), yt_dlp.YoutubeDL(opcoes) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        print(f"Erro ao listar {url}: {e}")
+        return []
+
+    ids = []
+    pendentes = list(info.get('entries') or [])
+    while pendentes:
+        entrada = pendentes.pop(0)
+        if not entrada:
+            continue
+        if entrada.get('entries'):
+            # Abas de canal podem vir aninhadas
+            pendentes = list(entrada['entries']) + pendentes
+        elif entrada.get('id'):
+            ids.append(entrada['id'])
+    return list(dict.fromkeys(ids))
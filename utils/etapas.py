@@ -0,0 +1,377 @@
+"""
+Módulo de Execução Incremental de Etapas
+Este módulo fornece um pequeno DAG de etapas: cada etapa declara entradas, parâmetros
+e saídas, recebe uma impressão digital (hash do conteúdo das entradas e dos
+parâmetros) e só é executada novamente quando essa impressão muda ou suas saídas
+deixam de existir ou são alteradas.
+
+Etapas marcadas com recurso 'cpu' ocupam uma vaga de CPU do agendador (ver
+utils.agendador) enquanto executam, de modo que jobs paralelos não disputem mais
+núcleos do que a máquina tem.
+
+Uma entrada ou saída também pode ser uma seção de um arquivo JSON, no formato
+'arquivo.json#secao': o hash usado é o guardado pelo próprio arquivo em
+dados['secoes'][secao] (ver utils.manifesto). Assim várias etapas dividem um
+arquivo, e cada uma só é invalidada pelas seções que lê. Uma seção ausente conta
+como arquivo ausente.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from utils.rastreio import rastrear
+
+
+class ErroEtapa(Exception):
+    """
+    Erro ao executar uma etapa ou ao validar suas saídas.
+    """
+
+
+class Etapa:
+    """
+    Declaração de uma etapa do pipeline.
+
+    Entradas e saídas são caminhos de arquivo ou padrões glob. Um caminho simples
+    de saída precisa existir após a execução; um padrão glob pode não gerar nada
+    (ex.: nenhum trecho de fala detectado). Entradas ausentes entram no hash como
+    ausentes, o que permite entradas opcionais (ex.: ambiente.wav).
+    """
+
+    def __init__(self, nome, funcao, entradas=(), saidas=(), parametros=None, depende=(),
+                 recurso=None):
+        """
+        Args:
+            nome (str): Nome único da etapa
+            funcao (callable): Função sem argumentos que executa a etapa
+            entradas (iterable): Caminhos ou padrões glob lidos pela etapa
+            saidas (iterable): Caminhos ou padrões glob gerados pela etapa
+            parametros (dict, optional): Parâmetros que afetam o resultado
+            depende (iterable): Nomes das etapas que precisam rodar antes
+            recurso (str, optional): 'cpu' para etapas dominadas por CPU (ocupam
+                                     uma vaga de CPU) ou 'rede' para as que
+                                     esperam a rede (limitadas por chamada)
+        """
+        self.nome = nome
+        self.funcao = funcao
+        self.entradas = list(entradas)
+        self.saidas = list(saidas)
+        self.parametros = parametros or {}
+        self.depende = list(depende)
+        self.recurso = recurso
+
+
+class PipelineEtapas:
+    """
+    Executa etapas em ordem, pulando as que não mudaram desde a última execução.
+    """
+
+    def __init__(self, etapas, caminho_estado):
+        """
+        Args:
+            etapas (list): Etapas em ordem topológica
+            caminho_estado (str): Arquivo JSON onde as impressões digitais são guardadas
+        """
+        self.etapas = etapas
+        self.caminho_estado = caminho_estado
+        self._estado = _carregar_estado(caminho_estado)
+        # Seções dos JSONs referenciados como 'arquivo#secao', lidas uma vez por
+        # planejar/executar (ver _hash_secao)
+        self._secoes = {}
+
+        nomes = set()
+        for etapa in etapas:
+            faltando = [d for d in etapa.depende if d not in nomes]
+            if faltando:
+                raise ErroEtapa(f"Etapa '{etapa.nome}' depende de etapas não declaradas antes: {faltando}")
+            nomes.add(etapa.nome)
+
+    def planejar(self):
+        """
+        Calcula quais etapas rodariam, sem executar nada (dry-run).
+
+        Returns:
+            list: Tuplas (nome, acao, motivo) com acao 'executar' ou 'pular'
+        """
+        self._secoes = {}
+        plano = []
+        vao_rodar = set()
+        for etapa in self.etapas:
+            dependencias = [d for d in etapa.depende if d in vao_rodar]
+            if dependencias:
+                acao, motivo = "executar", f"depende de {', '.join(dependencias)}"
+            else:
+                motivo = self._motivo_para_rodar(etapa)
+                acao = "executar" if motivo else "pular"
+                motivo = motivo or "sem alterações"
+            if acao == "executar":
+                vao_rodar.add(etapa.nome)
+            plano.append((etapa.nome, acao, motivo))
+        return plano
+
+    def executar(self, forcar=False, progresso=None):
+        """
+        Executa as etapas necessárias e registra suas impressões digitais.
+
+        Args:
+            forcar (bool): Se True, executa todas as etapas
+            progresso (callable, optional): Recebe um dicionário a cada etapa
+                                            pulada, iniciada ou concluída
+
+        Returns:
+            dict: Nome da etapa -> {'acao', 'motivo', 'duracao'}
+
+        Raises:
+            ErroEtapa: Se uma etapa não gerar as saídas declaradas
+        """
+        self._secoes = {}
+        relatorio = {}
+        for etapa in self.etapas:
+            motivo = "forçado" if forcar else self._motivo_para_rodar(etapa)
+            if not motivo:
+                relatorio[etapa.nome] = {"acao": "pular", "motivo": "sem alterações", "duracao": 0.0}
+                print(f"Etapa '{etapa.nome}' sem alterações, pulando.")
+                _notificar(progresso, etapa.nome, "pular", motivo="sem alterações")
+                continue
+
+            print(f"Executando etapa '{etapa.nome}' ({motivo})...")
+            _notificar(progresso, etapa.nome, "inicio", motivo=motivo)
+            inicio = time.perf_counter()
+            with rastrear(etapa.nome, "etapa", motivo=motivo), _reservar(etapa.recurso):
+                etapa.funcao()
+            duracao = round(time.perf_counter() - inicio, 3)
+
+            saidas = self._hash_saidas(etapa)
+            self._estado["etapas"][etapa.nome] = {
+                "impressao": self._impressao(etapa),
+                "saidas": saidas,
+            }
+            self._salvar_estado()
+            relatorio[etapa.nome] = {"acao": "executar", "motivo": motivo, "duracao": duracao}
+            _notificar(progresso, etapa.nome, "fim", duracao=duracao)
+        return relatorio
+
+    def _motivo_para_rodar(self, etapa):
+        """
+        Explica por que a etapa precisa rodar.
+
+        Args:
+            etapa (Etapa): Etapa a verificar
+
+        Returns:
+            str: Motivo, ou string vazia se a etapa está atualizada
+        """
+        registro = self._estado["etapas"].get(etapa.nome)
+        if registro is None:
+            return "nunca executada"
+        if registro["impressao"] != self._impressao(etapa):
+            return "entradas ou parâmetros alterados"
+
+        atuais = {}
+        for padrao in etapa.saidas:
+            arquivos = _expandir(padrao, self._secoes)
+            if not arquivos and not _eh_padrao(padrao):
+                return f"saída ausente: {padrao}"
+            for arquivo in arquivos:
+                atuais[arquivo] = self._hash_arquivo(arquivo)
+        if atuais != registro["saidas"]:
+            return "saídas alteradas"
+        return ""
+
+    def _impressao(self, etapa):
+        """
+        Calcula a impressão digital da etapa a partir do conteúdo das entradas.
+
+        Args:
+            etapa (Etapa): Etapa a calcular
+
+        Returns:
+            str: Hash SHA-256 em hexadecimal
+        """
+        entradas = {}
+        for padrao in etapa.entradas:
+            arquivos = _expandir(padrao, self._secoes)
+            entradas[padrao] = {
+                os.path.relpath(a, os.path.dirname(self.caminho_estado)): self._hash_arquivo(a)
+                for a in arquivos
+            } or None
+
+        conteudo = json.dumps(
+            {"nome": etapa.nome, "parametros": etapa.parametros, "entradas": entradas},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def _hash_saidas(self, etapa):
+        """
+        Valida e calcula o hash das saídas de uma etapa recém-executada.
+
+        Args:
+            etapa (Etapa): Etapa executada
+
+        Returns:
+            dict: Caminho -> hash de cada saída
+
+        Raises:
+            ErroEtapa: Se uma saída obrigatória não existir
+        """
+        saidas = {}
+        for padrao in etapa.saidas:
+            arquivos = _expandir(padrao, self._secoes)
+            if not arquivos and not _eh_padrao(padrao):
+                raise ErroEtapa(f"Etapa '{etapa.nome}' não gerou a saída {padrao}")
+            for arquivo in arquivos:
+                saidas[arquivo] = self._hash_arquivo(arquivo)
+        return saidas
+
+    def _hash_arquivo(self, caminho):
+        """
+        Calcula o hash do conteúdo de um arquivo, reaproveitando o valor
+        guardado enquanto tamanho e data de modificação não mudarem.
+
+        Args:
+            caminho (str): Caminho do arquivo
+
+        Returns:
+            str: Hash SHA-256 em hexadecimal
+        """
+        if "#" in caminho:
+            return _hash_secao(caminho, self._secoes)
+        info = os.stat(caminho)
+        chave = os.path.abspath(caminho)
+        guardado = self._estado["hashes"].get(chave)
+        if guardado and guardado[0] == info.st_size and guardado[1] == info.st_mtime_ns:
+            return guardado[2]
+
+        h = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(bloco)
+        valor = h.hexdigest()
+        self._estado["hashes"][chave] = [info.st_size, info.st_mtime_ns, valor]
+        return valor
+
+    def _salvar_estado(self):
+        """
+        Grava o estado de forma atômica.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho_estado)), exist_ok=True)
+        tmp = self.caminho_estado + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._estado, f, ensure_ascii=False)
+        os.replace(tmp, self.caminho_estado)
+
+
+def _carregar_estado(caminho_estado):
+    """
+    Carrega o estado salvo, ou um estado vazio se não existir ou estiver corrompido.
+
+    Args:
+        caminho_estado (str): Caminho do arquivo de estado
+
+    Returns:
+        dict: Estado com as chaves 'etapas' e 'hashes'
+    """
+    try:
+        with open(caminho_estado, "r", encoding="utf-8") as f:
+            estado = json.load(f)
+        if isinstance(estado, dict) and "etapas" in estado and "hashes" in estado:
+            return estado
+    except (OSError, ValueError):
+        pass
+    return {"etapas": {}, "hashes": {}}
+
+
+@contextmanager
+def _reservar(recurso):
+    """
+    Ocupa uma vaga de CPU do agendador durante etapas com recurso 'cpu'.
+
+    Args:
+        recurso (str): Recurso declarado pela etapa, ou None
+    """
+    if recurso != "cpu":
+        yield
+        return
+    from utils.agendador import obter_agendador
+
+    with obter_agendador().cpu():
+        yield
+
+
+def _notificar(progresso, nome, acao, **dados):
+    """
+    Repassa um evento de etapa ao callback de progresso, se houver.
+
+    Args:
+        progresso (callable): Callback ou None
+        nome (str): Nome da etapa
+        acao (str): 'pular', 'inicio' ou 'fim'
+        **dados: Campos extras do evento
+    """
+    if progresso is not None:
+        progresso({"evento": "etapa", "etapa": nome, "acao": acao, **dados})
+
+
+def _eh_padrao(caminho):
+    """
+    Indica se o caminho é um padrão glob.
+
+    Args:
+        caminho (str): Caminho ou padrão
+
+    Returns:
+        bool: True se contém caracteres curinga
+    """
+    return any(c in caminho for c in "*?[")
+
+
+def _expandir(padrao, secoes=None):
+    """
+    Lista os arquivos que correspondem a um caminho ou padrão glob.
+
+    Args:
+        padrao (str): Caminho ou padrão glob
+        secoes (dict, optional): Cache de seções já lidas (ver _hash_secao)
+
+    Returns:
+        list: Arquivos existentes, em ordem
+    """
+    if "#" in padrao:
+        return [padrao] if _hash_secao(padrao, secoes) is not None else []
+    if not _eh_padrao(padrao):
+        return [padrao] if os.path.isfile(padrao) else []
+    return sorted(p for p in glob.glob(padrao) if os.path.isfile(p))
+
+
+def _hash_secao(referencia, secoes=None):
+    """
+    Lê o hash de uma seção guardado em um arquivo JSON ('arquivo#secao').
+
+    Args:
+        referencia (str): Caminho do arquivo e nome da seção separados por '#'
+        secoes (dict, optional): Cache caminho -> ((inode, mtime, tamanho), secoes).
+                                 O arquivo só é lido de novo se tiver mudado
+
+    Returns:
+        str: Hash guardado em dados['secoes'][secao], ou None se o arquivo ou a
+             seção não existirem
+    """
+    caminho, _, secao = referencia.partition("#")
+    try:
+        info = os.stat(caminho)
+        versao = (info.st_ino, info.st_mtime_ns, info.st_size)
+        guardado = secoes.get(caminho) if secoes is not None else None
+        if guardado is not None and guardado[0] == versao:
+            return guardado[1].get(secao)
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        if secoes is not None:
+            secoes[caminho] = (versao, dados["secoes"])
+        return dados["secoes"].get(secao)
+    except (OSError, ValueError, KeyError, AttributeError, TypeError):
+        return None
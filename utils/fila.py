@@ -0,0 +1,420 @@
+"""
+Módulo de Fila Persistente de Jobs
+Este módulo fornece uma fila de jobs em SQLite que sobrevive a quedas do processo.
+Cada job guarda suas opções, o número de tentativas e o estado de cada unidade de
+trabalho: as etapas do pipeline ('etapa:<nome>') e os trechos dublados
+('tts:<idioma>:<recorte>').
+
+Vários trabalhadores, no mesmo host ou em hosts que compartilham o sistema de
+arquivos, reivindicam jobs com uma transação exclusiva e recebem um prazo
+(lease) que precisa ser renovado enquanto o job roda. Se o trabalhador cai, o
+prazo expira e outro trabalhador retoma o job; como as etapas concluídas ficam
+registradas no workspace (ver utils.etapas) e os trechos já sintetizados ficam no
+cache do TTS, só a unidade que estava em andamento é refeita. Jobs que falham
+voltam para a fila com espera exponencial até esgotar as tentativas.
+
+O banco usa o journal padrão do SQLite (e não WAL), que depende apenas de travas
+de arquivo e funciona em sistemas de arquivos compartilhados.
+"""
+
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+
+
+# Estados de um job
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+MAX_TENTATIVAS_PADRAO = 5
+PRAZO_PADRAO_S = 120.0
+ESPERA_BASE_S = 30.0
+ESPERA_MAXIMA_S = 3600.0
+
+
+def identificar_trabalhador():
+    """
+    Identificador do trabalhador atual, único entre hosts e processos.
+
+    Returns:
+        str: 'host:pid'
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class FilaJobs:
+    """
+    Fila de jobs em SQLite, segura para várias threads, processos e hosts.
+    """
+
+    def __init__(self, caminho, max_tentativas=MAX_TENTATIVAS_PADRAO, espera_base=ESPERA_BASE_S):
+        """
+        Abre (ou cria) o banco da fila.
+
+        Args:
+            caminho (str): Caminho do arquivo SQLite
+            max_tentativas (int): Tentativas de cada job antes de ficar em erro
+            espera_base (float): Espera após a primeira falha; dobra a cada nova falha
+        """
+        self.caminho = caminho
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self._lock = threading.Lock()
+
+        if caminho != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        # isolation_level=None: as transações são abertas explicitamente
+        self._conn = sqlite3.connect(caminho, timeout=60, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=DELETE')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' url TEXT NOT NULL UNIQUE,'
+            ' opcoes TEXT NOT NULL,'
+            ' estado TEXT NOT NULL,'
+            ' tentativas INTEGER NOT NULL DEFAULT 0,'
+            ' disponivel_em REAL NOT NULL,'
+            ' trabalhador TEXT,'
+            ' prazo REAL,'
+            ' erro TEXT,'
+            ' resumo TEXT,'
+            ' criado REAL NOT NULL,'
+            ' atualizado REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS unidades ('
+            ' job_id INTEGER NOT NULL,'
+            ' unidade TEXT NOT NULL,'
+            ' estado TEXT NOT NULL,'
+            ' tentativas INTEGER NOT NULL DEFAULT 0,'
+            ' duracao REAL,'
+            ' erro TEXT,'
+            ' atualizado REAL NOT NULL,'
+            ' PRIMARY KEY (job_id, unidade))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_estado ON jobs(estado, disponivel_em)')
+
+    def enfileirar(self, url, opcoes=None, reabrir=False):
+        """
+        Adiciona um job à fila. Uma URL já enfileirada não é duplicada.
+
+        Args:
+            url (str): URL do vídeo
+            opcoes (dict, optional): Opções do job, serializáveis em JSON
+            reabrir (bool): Se True, um job já concluído ou em erro volta a pendente
+
+        Returns:
+            int: ID do job
+        """
+        agora = time.time()
+        with self._transacao():
+            linha = self._conn.execute('SELECT id, estado FROM jobs WHERE url = ?', (url,)).fetchone()
+            if linha is None:
+                cursor = self._conn.execute(
+                    'INSERT INTO jobs (url, opcoes, estado, disponivel_em, criado, atualizado)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)',
+                    (url, json.dumps(opcoes or {}, ensure_ascii=False), PENDENTE, agora, agora, agora)
+                )
+                return cursor.lastrowid
+            if reabrir and linha[1] in (CONCLUIDO, ERRO):
+                self._conn.execute(
+                    'UPDATE jobs SET opcoes = ?, estado = ?, tentativas = 0, disponivel_em = ?,'
+                    ' erro = NULL, atualizado = ? WHERE id = ?',
+                    (json.dumps(opcoes or {}, ensure_ascii=False), PENDENTE, agora, agora, linha[0])
+                )
+            return linha[0]
+
+    def reivindicar(self, trabalhador, prazo=PRAZO_PADRAO_S):
+        """
+        Reivindica o próximo job disponível: um pendente cuja espera já passou ou
+        um em execução cujo prazo expirou (trabalhador caído).
+
+        Args:
+            trabalhador (str): Identificador do trabalhador (ver identificar_trabalhador)
+            prazo (float): Segundos até o job poder ser retomado por outro trabalhador
+
+        Returns:
+            dict: Job reivindicado ('id', 'url', 'opcoes', 'tentativas'), ou None
+                  se não houver job disponível
+        """
+        agora = time.time()
+        with self._transacao():
+            # Um job que derrubou o trabalhador em todas as tentativas não volta mais
+            self._conn.execute(
+                'UPDATE jobs SET estado = ?, prazo = NULL, erro = ?, atualizado = ?'
+                ' WHERE estado = ? AND prazo < ? AND tentativas >= ?',
+                (ERRO, 'prazo expirado na última tentativa', agora, EXECUTANDO, agora,
+                 self.max_tentativas)
+            )
+            linha = self._conn.execute(
+                'SELECT id, url, opcoes, tentativas FROM jobs'
+                ' WHERE (estado = ? AND disponivel_em <= ?) OR (estado = ? AND prazo < ?)'
+                ' ORDER BY disponivel_em, id LIMIT 1',
+                (PENDENTE, agora, EXECUTANDO, agora)
+            ).fetchone()
+            if linha is None:
+                return None
+            job_id, url, opcoes, tentativas = linha
+            self._conn.execute(
+                'UPDATE jobs SET estado = ?, tentativas = ?, trabalhador = ?, prazo = ?,'
+                ' atualizado = ? WHERE id = ?',
+                (EXECUTANDO, tentativas + 1, trabalhador, agora + prazo, agora, job_id)
+            )
+            # Unidades que o trabalhador anterior deixou pela metade
+            self._conn.execute(
+                'UPDATE unidades SET estado = ?, erro = ?, atualizado = ?'
+                ' WHERE job_id = ? AND estado = ?',
+                (ERRO, 'interrompida', agora, job_id, EXECUTANDO)
+            )
+        return {"id": job_id, "url": url, "opcoes": json.loads(opcoes), "tentativas": tentativas + 1}
+
+    def renovar(self, job_id, trabalhador, prazo=PRAZO_PADRAO_S):
+        """
+        Estende o prazo de um job em execução.
+
+        Args:
+            job_id (int): ID do job
+            trabalhador (str): Trabalhador que reivindicou o job
+            prazo (float): Segundos a partir de agora
+
+        Returns:
+            bool: False se o job não pertence mais a este trabalhador
+        """
+        agora = time.time()
+        with self._transacao():
+            cursor = self._conn.execute(
+                'UPDATE jobs SET prazo = ?, atualizado = ? WHERE id = ? AND trabalhador = ? AND estado = ?',
+                (agora + prazo, agora, job_id, trabalhador, EXECUTANDO)
+            )
+            return cursor.rowcount == 1
+
+    def concluir(self, job_id, trabalhador, resumo=None):
+        """
+        Marca o job como concluído.
+
+        Args:
+            job_id (int): ID do job
+            trabalhador (str): Trabalhador que reivindicou o job
+            resumo (dict, optional): Resumo da execução
+
+        Returns:
+            bool: False se o job não pertence mais a este trabalhador
+        """
+        agora = time.time()
+        with self._transacao():
+            cursor = self._conn.execute(
+                'UPDATE jobs SET estado = ?, prazo = NULL, erro = NULL, resumo = ?, atualizado = ?'
+                ' WHERE id = ? AND trabalhador = ? AND estado = ?',
+                (CONCLUIDO, json.dumps(resumo, ensure_ascii=False, default=str), agora,
+                 job_id, trabalhador, EXECUTANDO)
+            )
+            return cursor.rowcount == 1
+
+    def falhar(self, job_id, trabalhador, erro, resumo=None):
+        """
+        Registra a falha do job. Se ainda houver tentativas, ele volta à fila
+        após uma espera exponencial com variação aleatória; senão fica em erro.
+
+        Args:
+            job_id (int): ID do job
+            trabalhador (str): Trabalhador que reivindicou o job
+            erro (str): Mensagem de erro
+            resumo (dict, optional): Resumo da execução
+
+        Returns:
+            float: Segundos até a próxima tentativa, ou None se o job ficou em erro
+                   ou não pertence mais a este trabalhador
+        """
+        agora = time.time()
+        with self._transacao():
+            linha = self._conn.execute(
+                'SELECT tentativas FROM jobs WHERE id = ? AND trabalhador = ? AND estado = ?',
+                (job_id, trabalhador, EXECUTANDO)
+            ).fetchone()
+            if linha is None:
+                return None
+            tentativas = linha[0]
+            espera = None
+            if tentativas < self.max_tentativas:
+                espera = min(ESPERA_MAXIMA_S, self.espera_base * (2 ** (tentativas - 1)))
+                espera *= 1 + random.random() * 0.25
+            self._conn.execute(
+                'UPDATE jobs SET estado = ?, disponivel_em = ?, prazo = NULL, erro = ?, resumo = ?,'
+                ' atualizado = ? WHERE id = ?',
+                (PENDENTE if espera is not None else ERRO, agora + (espera or 0), erro,
+                 json.dumps(resumo, ensure_ascii=False, default=str), agora, job_id)
+            )
+            self._conn.execute(
+                'UPDATE unidades SET estado = ?, erro = ?, atualizado = ?'
+                ' WHERE job_id = ? AND estado = ?',
+                (ERRO, erro, agora, job_id, EXECUTANDO)
+            )
+        return espera
+
+    def registrar_unidade(self, job_id, unidade, estado, duracao=None, erro=None,
+                          nova_tentativa=True):
+        """
+        Grava o estado de uma unidade de trabalho (etapa ou trecho) do job.
+
+        Args:
+            job_id (int): ID do job
+            unidade (str): Nome da unidade (ex.: 'etapa:tts', 'tts:en:recorte_3.wav')
+            estado (str): EXECUTANDO, CONCLUIDO ou ERRO
+            duracao (float, optional): Duração em segundos
+            erro (str, optional): Mensagem de erro
+            nova_tentativa (bool): Se True, conta uma tentativa da unidade; False
+                                   ao concluir uma unidade já registrada como em
+                                   execução ou ao pular uma etapa em cache
+        """
+        agora = time.time()
+        incremento = 1 if nova_tentativa else 0
+        with self._transacao():
+            self._conn.execute(
+                'INSERT INTO unidades (job_id, unidade, estado, tentativas, duracao, erro, atualizado)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)'
+                ' ON CONFLICT (job_id, unidade) DO UPDATE SET estado = excluded.estado,'
+                ' tentativas = tentativas + ?, duracao = excluded.duracao, erro = excluded.erro,'
+                ' atualizado = excluded.atualizado',
+                (job_id, unidade, estado, incremento, duracao, erro, agora, incremento)
+            )
+
+    def unidades(self, job_id):
+        """
+        Lista as unidades de trabalho registradas de um job.
+
+        Args:
+            job_id (int): ID do job
+
+        Returns:
+            dict: Unidade -> {'estado', 'tentativas', 'duracao', 'erro'}
+        """
+        with self._lock:
+            linhas = self._conn.execute(
+                'SELECT unidade, estado, tentativas, duracao, erro FROM unidades'
+                ' WHERE job_id = ? ORDER BY atualizado', (job_id,)
+            ).fetchall()
+        return {unidade: {"estado": estado, "tentativas": tentativas, "duracao": duracao, "erro": erro}
+                for unidade, estado, tentativas, duracao, erro in linhas}
+
+    def listar(self):
+        """
+        Lista todos os jobs da fila.
+
+        Returns:
+            list: Dicionários com 'id', 'url', 'estado', 'tentativas', 'trabalhador',
+                  'disponivel_em' e 'erro', em ordem de criação
+        """
+        with self._lock:
+            linhas = self._conn.execute(
+                'SELECT id, url, estado, tentativas, trabalhador, disponivel_em, erro FROM jobs ORDER BY id'
+            ).fetchall()
+        chaves = ("id", "url", "estado", "tentativas", "trabalhador", "disponivel_em", "erro")
+        return [dict(zip(chaves, linha)) for linha in linhas]
+
+    def pendentes(self):
+        """
+        Conta os jobs que ainda podem rodar (pendentes ou em execução).
+
+        Returns:
+            int: Número de jobs não finalizados
+        """
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM jobs WHERE estado IN (?, ?)', (PENDENTE, EXECUTANDO)
+            ).fetchone()[0]
+
+    def fechar(self):
+        """
+        Fecha a conexão com o banco.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def _transacao(self):
+        """
+        Abre uma transação exclusiva (BEGIN IMMEDIATE): nenhum outro processo
+        escreve até o commit, o que torna a reivindicação de jobs atômica.
+
+        Returns:
+            _Transacao: Gerenciador de contexto da transação
+        """
+        return _Transacao(self._conn, self._lock)
+
+
+class _Transacao:
+    """
+    Transação exclusiva sobre a conexão, com commit ao sair ou rollback em erro.
+    """
+
+    def __init__(self, conn, lock):
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            self._conn.execute('BEGIN IMMEDIATE')
+        except Exception:
+            self._lock.release()
+            raise
+        return self._conn
+
+    def __exit__(self, tipo, valor, rastro):
+        try:
+            self._conn.execute('ROLLBACK' if tipo else 'COMMIT')
+        finally:
+            self._lock.release()
+        return False
+
+
+class Renovador:
+    """
+    Thread que renova o prazo do job enquanto ele roda, para que outros
+    trabalhadores só o retomem se este cair.
+    """
+
+    def __init__(self, fila, job_id, trabalhador, prazo=PRAZO_PADRAO_S):
+        """
+        Args:
+            fila (FilaJobs): Fila do job
+            job_id (int): ID do job
+            trabalhador (str): Trabalhador que reivindicou o job
+            prazo (float): Prazo renovado a cada terço dele
+        """
+        self.fila = fila
+        self.job_id = job_id
+        self.trabalhador = trabalhador
+        self.prazo = prazo
+        self.perdido = False
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        self._parar.set()
+        self._thread.join()
+        return False
+
+    def _executar(self):
+        """
+        Renova o prazo até ser parado ou perder o job.
+        """
+        while not self._parar.wait(self.prazo / 3):
+            try:
+                if not self.fila.renovar(self.job_id, self.trabalhador, self.prazo):
+                    self.perdido = True
+                    print(f"Job {self.job_id} foi retomado por outro trabalhador.")
+                    return
+            except sqlite3.Error as e:
+                # Banco ocupado ou indisponível: tenta de novo na próxima renovação
+                print(f"Erro ao renovar o job {self.job_id}: {e}")
@@ -0,0 +1,74 @@
+"""
+Módulo de Idiomas de Destino
+Este módulo fornece funcionalidades para descrever os idiomas para os quais um job
+dubla o vídeo (cada um com sua voz) e para nomear os arquivos de cada idioma.
+
+O inglês mantém os nomes originais do projeto (tts/, base_finalizado.wav); os
+demais idiomas recebem o código como sufixo (tts_es/, base_finalizado_es.wav, ...).
+Traduções e áudios dublados de todos os idiomas são registrados no manifesto de
+trechos do job (ver utils.manifesto).
+"""
+
+import os
+
+
+IDIOMA_ORIGEM = "pt"
+IDIOMA_PADRAO = "en"
+# Voz padrão "EXAVITQu4vr4xnSDxMaL" (Rachel, narradora padrão da ElevenLabs)
+VOZ_PADRAO = "EXAVITQu4vr4xnSDxMaL"
+
+
+def sufixo_idioma(idioma):
+    """
+    Sufixo usado nos nomes de arquivo de um idioma.
+
+    Args:
+        idioma (str): Código do idioma (ex.: 'en', 'es')
+
+    Returns:
+        str: '' para o inglês, '_<idioma>' para os demais
+    """
+    return "" if idioma == IDIOMA_PADRAO else f"_{idioma}"
+
+
+def pasta_tts(pasta_recortes, idioma):
+    """
+    Pasta dos áudios dublados de um idioma.
+
+    Args:
+        pasta_recortes (str): Pasta aud_recort do job
+        idioma (str): Código do idioma
+
+    Returns:
+        str: Caminho de tts{sufixo}
+    """
+    return os.path.join(pasta_recortes, f"tts{sufixo_idioma(idioma)}")
+
+
+def interpretar_idiomas(especificacao, voz_padrao=VOZ_PADRAO):
+    """
+    Converte uma especificação como 'en,es:VOZ_ID,fr' em pares (idioma, voz).
+    Idiomas sem voz usam a voz padrão; repetições são ignoradas.
+
+    Args:
+        especificacao (str | list): Texto separado por vírgulas ou lista de itens 'idioma[:voz]'
+        voz_padrao (str): Voz dos idiomas sem voz informada
+
+    Returns:
+        list: Tuplas (idioma, voice_id), na ordem dada
+
+    Raises:
+        ValueError: Se nenhum idioma for informado
+    """
+    if isinstance(especificacao, str):
+        especificacao = especificacao.split(",")
+
+    pares = {}
+    for item in especificacao:
+        idioma, _, voz = item.strip().partition(":")
+        idioma = idioma.strip().lower()
+        if idioma and idioma not in pares:
+            pares[idioma] = voz.strip() or voz_padrao
+    if not pares:
+        raise ValueError("Informe ao menos um idioma de destino")
+    return list(pares.items())
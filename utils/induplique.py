@@ -6,18 +6,31 @@ já existem antes de processar novamente.
 
 import os
 
+from utils.audioextr import caminhos_pcm
 
-def audio_ja_existe(video_path):
+
+def audio_ja_existe(video_path, origem=None):
     """
-    Verifica se o arquivo de áudio correspondente ao vídeo já existe.
-    
+    Verifica se os arquivos PCM extraídos do vídeo já existem e estão atualizados.
+
     Args:
         video_path (str): Caminho do arquivo de vídeo
-        
+        origem (str, optional): Arquivo de onde o áudio é extraído, se não for
+                                o próprio vídeo (ex.: só o áudio baixado)
+
     Returns:
-        tuple: (bool, str) - (existe, caminho_do_audio)
+        tuple: (bool, str) - (existe, caminho_do_audio_vosk)
     """
-    base = os.path.splitext(os.path.basename(video_path))[0]
-    pasta = os.path.dirname(video_path)
-    audio_path = os.path.join(pasta, f"{base}.mp3")
-    return os.path.exists(audio_path), audio_path
+    vosk_path, master_path = caminhos_pcm(video_path)
+
+    if not (os.path.exists(vosk_path) and os.path.exists(master_path)):
+        return False, vosk_path
+
+    # Considera desatualizado se o vídeo for mais novo que o áudio extraído
+    origem = origem or video_path
+    if os.path.exists(origem):
+        mtime_video = os.path.getmtime(origem)
+        if min(os.path.getmtime(vosk_path), os.path.getmtime(master_path)) < mtime_video:
+            return False, vosk_path
+
+    return True, vosk_path
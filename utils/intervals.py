@@ -1,33 +1,225 @@
 """
 Módulo de Detecção de Intervalos de Fala
 Este módulo fornece funcionalidades para detectar intervalos de fala em arquivos de áudio
-utilizando o script de processamento Python externo.
+WAV usando um detector de atividade de voz (VAD) vetorizado com NumPy, baseado em
+energia e taxa de cruzamentos por zero de cada quadro, executado no próprio processo.
 """
 
-import subprocess
+import json
 import sys
+import wave
 
+import numpy as np
 
-def mostrar_intervalos_fala(audio_path, formato='console', gap=0.5, min_duration=0.1):
+
+# Parâmetros padrão do detector
+FRAME_MS = 30
+BLOCO_SEGUNDOS = 10
+MARGEM_RUIDO_DB = 12.0
+PISO_ABSOLUTO_DB = -50.0
+ZCR_MAXIMO = 0.35
+
+
+def detectar_intervalos_fala(audio_path, gap=0.5, min_duration=0.1, padding=0.1,
+                             frame_ms=FRAME_MS, bloco_segundos=BLOCO_SEGUNDOS):
     """
-    Executa o script main.py para detectar e mostrar intervalos de fala.
-    
+    Detecta intervalos de fala em um arquivo WAV PCM 16 bits.
+
+    O áudio é lido em blocos de tamanho fixo; de cada bloco são extraídas apenas
+    a energia (dB) e a taxa de cruzamentos por zero de cada quadro, de modo que a
+    memória usada não depende da duração do arquivo.
+
+    Args:
+        audio_path (str): Caminho do arquivo WAV (ex.: *_vosk.wav, mono 16 kHz)
+        gap (float): Pausas menores que este valor (s) unem intervalos vizinhos
+        min_duration (float): Duração mínima (s) de um intervalo de fala
+        padding (float): Margem (s) adicionada antes e depois de cada intervalo
+        frame_ms (int): Duração de cada quadro de análise em milissegundos
+        bloco_segundos (float): Duração de cada bloco lido do disco
+
+    Returns:
+        list: Lista de dicionários {'start': float, 'end': float} em segundos
+    """
+    energia_db, zcr, duracao_quadro, duracao_total = _extrair_caracteristicas(
+        audio_path, frame_ms, bloco_segundos
+    )
+    if energia_db.size == 0:
+        return []
+
+    fala = _classificar_quadros(energia_db, zcr)
+    intervalos = _quadros_para_intervalos(fala, duracao_quadro)
+    intervalos = _mesclar_intervalos(intervalos, gap)
+    intervalos = [(ini, fim) for ini, fim in intervalos if fim - ini >= min_duration]
+    intervalos = _aplicar_padding(intervalos, padding, duracao_total)
+
+    return [{'start': round(ini, 3), 'end': round(fim, 3)} for ini, fim in intervalos]
+
+
+def mostrar_intervalos_fala(audio_path, formato='console', gap=0.5, min_duration=0.1, padding=0.1):
+    """
+    Detecta intervalos de fala e mostra o resultado. Os intervalos de um job
+    ficam no manifesto de trechos (ver utils.manifesto), não em arquivo próprio.
+
     Args:
         audio_path (str): Caminho do arquivo de áudio
         formato (str): Formato de saída ('console', 'json', 'csv')
         gap (float): Threshold para mesclar intervalos próximos
         min_duration (float): Duração mínima do intervalo
-        
+        padding (float): Margem adicionada em volta de cada intervalo
+
     Returns:
-        str: Saída do script de detecção ou string vazia se falhar
+        list: Lista de intervalos de fala ou lista vazia se falhar
     """
-    cmd = [sys.executable, r'C:\Users\Gabriel\Documents\pydub\utils\python\main.py', audio_path]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.stderr:
-            print(result.stderr, file=sys.stderr)
-        return result.stdout
-    except Exception as e:
-        print(f'Erro ao executar main.py: {e}', file=sys.stderr)
-        return ""
+        intervalos = detectar_intervalos_fala(
+            audio_path, gap=gap, min_duration=min_duration, padding=padding
+        )
+    except (OSError, wave.Error) as e:
+        print(f'Erro ao detectar intervalos: {e}', file=sys.stderr)
+        return []
+
+    if formato == 'json':
+        print(json.dumps(intervalos, ensure_ascii=False))
+    elif formato == 'csv':
+        print("start,end")
+        for intervalo in intervalos:
+            print(f"{intervalo['start']},{intervalo['end']}")
+    else:
+        for intervalo in intervalos:
+            print(f"Fala: {intervalo['start']:.3f}s - {intervalo['end']:.3f}s")
+
+    return intervalos
+
+
+def _extrair_caracteristicas(audio_path, frame_ms, bloco_segundos):
+    """
+    Lê o WAV em blocos e calcula energia e cruzamentos por zero por quadro.
+
+    Args:
+        audio_path (str): Caminho do arquivo WAV
+        frame_ms (int): Duração do quadro em milissegundos
+        bloco_segundos (float): Duração de cada bloco lido
+
+    Returns:
+        tuple: (energia_db, zcr, duracao_quadro, duracao_total)
+    """
+    with wave.open(audio_path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise wave.Error("Apenas WAV PCM 16 bits é suportado")
+
+        taxa = wf.getframerate()
+        canais = wf.getnchannels()
+        total_amostras = wf.getnframes()
+        tam_quadro = max(1, int(taxa * frame_ms / 1000))
+        # Bloco múltiplo do quadro para que nenhum quadro atravesse dois blocos
+        tam_bloco = max(1, int(taxa * bloco_segundos) // tam_quadro) * tam_quadro
+
+        energias = []
+        cruzamentos = []
+        while True:
+            dados = wf.readframes(tam_bloco)
+            if not dados:
+                break
+
+            amostras = np.frombuffer(dados, dtype='<i2')
+            if canais > 1:
+                amostras = amostras.reshape(-1, canais).mean(axis=1)
+            n_quadros = amostras.size // tam_quadro
+            if n_quadros == 0:
+                break
+
+            quadros = amostras[:n_quadros * tam_quadro].astype(np.float32) / 32768.0
+            quadros = quadros.reshape(n_quadros, tam_quadro)
+
+            rms = np.sqrt(np.mean(quadros * quadros, axis=1))
+            energias.append(20.0 * np.log10(np.maximum(rms, 1e-10)))
+
+            sinais = np.signbit(quadros)
+            cruzamentos.append(np.mean(sinais[:, 1:] != sinais[:, :-1], axis=1))
+
+    if not energias:
+        return np.empty(0), np.empty(0), tam_quadro / taxa, 0.0
+
+    return (np.concatenate(energias), np.concatenate(cruzamentos),
+            tam_quadro / taxa, total_amostras / taxa)
+
+
+def _classificar_quadros(energia_db, zcr):
+    """
+    Classifica cada quadro como fala ou silêncio.
+
+    O limiar é adaptativo: o piso de ruído é estimado pelo percentil 10 da energia
+    e a fala precisa ficar MARGEM_RUIDO_DB acima dele. Quadros com energia
+    intermediária só contam como fala se a taxa de cruzamentos por zero for típica
+    de voz (descarta chiado de banda larga).
+
+    Args:
+        energia_db (np.ndarray): Energia de cada quadro em dB
+        zcr (np.ndarray): Taxa de cruzamentos por zero de cada quadro
+
+    Returns:
+        np.ndarray: Vetor booleano, True para quadros de fala
+    """
+    piso_ruido = float(np.percentile(energia_db, 10))
+    limiar = max(piso_ruido + MARGEM_RUIDO_DB, PISO_ABSOLUTO_DB)
+    limiar_baixo = limiar - MARGEM_RUIDO_DB / 2
+
+    forte = energia_db >= limiar
+    fraco = (energia_db >= limiar_baixo) & (zcr <= ZCR_MAXIMO)
+    return forte | fraco
+
+
+def _quadros_para_intervalos(fala, duracao_quadro):
+    """
+    Converte o vetor de quadros de fala em intervalos contínuos.
+
+    Args:
+        fala (np.ndarray): Vetor booleano de quadros de fala
+        duracao_quadro (float): Duração de cada quadro em segundos
+
+    Returns:
+        list: Lista de tuplas (inicio, fim) em segundos
+    """
+    bordas = np.diff(np.concatenate(([0], fala.astype(np.int8), [0])))
+    inicios = np.flatnonzero(bordas == 1)
+    fins = np.flatnonzero(bordas == -1)
+    return [(float(i * duracao_quadro), float(f * duracao_quadro)) for i, f in zip(inicios, fins)]
+
+
+def _mesclar_intervalos(intervalos, gap):
+    """
+    Une intervalos separados por pausas menores ou iguais a gap.
+
+    Args:
+        intervalos (list): Lista ordenada de tuplas (inicio, fim)
+        gap (float): Pausa máxima em segundos para unir intervalos
+
+    Returns:
+        list: Lista de intervalos mesclados
+    """
+    mesclados = []
+    for ini, fim in intervalos:
+        if mesclados and ini - mesclados[-1][1] <= gap:
+            mesclados[-1] = (mesclados[-1][0], max(fim, mesclados[-1][1]))
+        else:
+            mesclados.append((ini, fim))
+    return mesclados
+
+
+def _aplicar_padding(intervalos, padding, duracao_total):
+    """
+    Expande cada intervalo pela margem, limitado à duração do áudio.
+
+    Args:
+        intervalos (list): Lista de tuplas (inicio, fim)
+        padding (float): Margem em segundos
+        duracao_total (float): Duração total do áudio em segundos
+
+    Returns:
+        list: Lista de intervalos expandidos, sem sobreposição
+    """
+    expandidos = [
+        (max(0.0, ini - padding), min(duracao_total, fim + padding))
+        for ini, fim in intervalos
+    ]
+    return _mesclar_intervalos(expandidos, 0.0)
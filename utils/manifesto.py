@@ -0,0 +1,393 @@
+"""
+Módulo de Manifesto de Trechos
+Este módulo fornece o manifesto de trechos de um job: um único JSON compacto
+(downloads/segmentos.json) que guarda, para cada trecho de fala:
+
+- início e fim em amostras do WAV de 16 kHz;
+- deslocamento e tamanho do PCM do trecho nesse WAV;
+- transcrição;
+- traduções por idioma;
+- áudio dublado de cada idioma, com o hash do conteúdo.
+
+Todas as etapas leem e gravam o manifesto, em vez de JSONs separados por etapa e
+de buscas por arquivos nas pastas. A gravação é atômica (arquivo temporário e
+os.replace).
+
+O manifesto também guarda em 'secoes' o hash de cada seção: 'intervalos', 'texto',
+'traducao:<idioma>' e 'tts:<idioma>'. Uma seção só aparece quando todos os trechos
+têm o campo. As etapas declaram entradas e saídas como 'segmentos.json#<secao>'
+(ver utils.etapas), então gravar uma seção não invalida as etapas que só
+dependem das outras.
+"""
+
+import hashlib
+import json
+import os
+
+from utils.pcm import Segmento, ler_info_wav
+
+
+VERSAO = 1
+NOME_ARQUIVO = "segmentos.json"
+
+
+def caminho_manifesto(downloads_dir):
+    """
+    Caminho do manifesto de trechos de um job.
+
+    Args:
+        downloads_dir (str): Pasta downloads do job
+
+    Returns:
+        str: Caminho de downloads/segmentos.json
+    """
+    return os.path.join(downloads_dir, NOME_ARQUIVO)
+
+
+def secao(caminho, nome):
+    """
+    Referência a uma seção do manifesto, no formato aceito por utils.etapas.
+
+    Args:
+        caminho (str): Caminho do manifesto
+        nome (str): Nome da seção (ex.: 'texto', 'tts:en')
+
+    Returns:
+        str: 'caminho#nome'
+    """
+    return f"{caminho}#{nome}"
+
+
+class Manifesto:
+    """
+    Trechos de fala de um job e os resultados de cada etapa por trecho.
+
+    Cada trecho é um dicionário com 'nome' (recorte_N.wav), 'inicio' e 'fim'
+    (amostras), 'deslocamento' e 'tamanho' (bytes do PCM no WAV), 'texto'
+    (lista de frases ou None), 'traducoes' (idioma -> frases) e 'tts'
+    (idioma -> {'arquivo', 'hash'}, ou None se o trecho não tem frase válida).
+    """
+
+    def __init__(self, caminho, audio=None, trechos=None, idiomas=None):
+        """
+        Args:
+            caminho (str): Caminho do manifesto
+            audio (dict, optional): Formato do WAV de 16 kHz ('arquivo', 'taxa',
+                                    'canais', 'largura')
+            trechos (list, optional): Trechos no formato descrito na classe
+            idiomas (list, optional): Idiomas já traduzidos ou sintetizados, para
+                                      que as seções existam mesmo sem trechos
+        """
+        self.caminho = caminho
+        self.audio = audio or {}
+        self.trechos = trechos or []
+        self.idiomas = list(idiomas or [])
+
+    @classmethod
+    def carregar(cls, caminho):
+        """
+        Lê o manifesto do disco.
+
+        Args:
+            caminho (str): Caminho do manifesto
+
+        Returns:
+            Manifesto: Manifesto lido
+
+        Raises:
+            OSError: Se o arquivo não puder ser lido
+            ValueError: Se o conteúdo for inválido ou de outra versão
+        """
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        if not isinstance(dados, dict) or dados.get("versao") != VERSAO:
+            raise ValueError(f"Manifesto inválido ou de outra versão: {caminho}")
+        return cls(caminho, dados["audio"], dados["trechos"], dados.get("idiomas"))
+
+    @classmethod
+    def carregar_ou_vazio(cls, caminho):
+        """
+        Lê o manifesto ou retorna um vazio se ele não existir ou estiver corrompido.
+
+        Args:
+            caminho (str): Caminho do manifesto
+
+        Returns:
+            Manifesto: Manifesto lido ou vazio
+        """
+        try:
+            return cls.carregar(caminho)
+        except (OSError, ValueError, KeyError):
+            return cls(caminho)
+
+    def definir_intervalos(self, audio_path, intervalos, pasta_recortes=None):
+        """
+        Substitui os trechos pelos intervalos detectados. Um trecho com o mesmo
+        nome e os mesmos limites de antes mantém transcrição, traduções e TTS.
+
+        Args:
+            audio_path (str): WAV de 16 kHz onde os intervalos foram detectados
+            intervalos (list): Dicionários {'start', 'end'} em segundos
+            pasta_recortes (str, optional): Pasta aud_recort. Se informada, apaga o
+                                            recorte exportado e os áudios dublados
+                                            dos trechos descartados
+        """
+        info = ler_info_wav(audio_path)
+        bytes_quadro = info.canais * info.largura
+        total = info.tamanho // bytes_quadro
+        anteriores = {(t["nome"], t["inicio"], t["fim"]): t for t in self.trechos}
+
+        self.audio = {"arquivo": os.path.basename(audio_path), "taxa": info.taxa,
+                      "canais": info.canais, "largura": info.largura}
+        trechos = []
+        for idx, intervalo in enumerate(intervalos, 1):
+            nome = f"recorte_{idx}.wav"
+            inicio = min(total, max(0, int(intervalo["start"] * info.taxa)))
+            fim = min(total, max(inicio, int(intervalo["end"] * info.taxa)))
+            anterior = anteriores.get((nome, inicio, fim), {})
+            trechos.append({
+                "nome": nome, "inicio": inicio, "fim": fim,
+                "deslocamento": info.offset + inicio * bytes_quadro,
+                "tamanho": (fim - inicio) * bytes_quadro,
+                "texto": anterior.get("texto"),
+                "traducoes": anterior.get("traducoes", {}),
+                "tts": anterior.get("tts", {}),
+            })
+
+        if pasta_recortes is not None:
+            mantidos = {(t["nome"], t["inicio"], t["fim"]) for t in trechos}
+            descartados = [t for t in self.trechos
+                           if (t["nome"], t["inicio"], t["fim"]) not in mantidos]
+            self._remover_artefatos(descartados, pasta_recortes)
+        self.trechos = trechos
+
+    def nomes(self):
+        """
+        Returns:
+            list: Nomes dos trechos (recorte_N.wav), em ordem
+        """
+        return [t["nome"] for t in self.trechos]
+
+    def intervalos(self):
+        """
+        Returns:
+            list: Dicionários {'start', 'end'} em segundos, em ordem
+        """
+        taxa = self.audio.get("taxa", 1)
+        return [{"start": t["inicio"] / taxa, "end": t["fim"] / taxa} for t in self.trechos]
+
+    def segmentos(self, audio_path):
+        """
+        Trechos do PCM para o ASR ler direto do WAV mapeado em memória.
+
+        Args:
+            audio_path (str): WAV de 16 kHz dos intervalos
+
+        Returns:
+            list: Segmento de cada trecho (ver utils.pcm), em ordem
+        """
+        return [Segmento(audio_path, t["deslocamento"], t["tamanho"], self.audio["taxa"],
+                         self.audio["canais"], self.audio["largura"]) for t in self.trechos]
+
+    def textos(self):
+        """
+        Returns:
+            dict: Nome do trecho -> frases transcritas (ou None se não transcrito)
+        """
+        return {t["nome"]: t["texto"] for t in self.trechos}
+
+    def definir_textos(self, textos):
+        """
+        Grava a transcrição dos trechos.
+
+        Args:
+            textos (dict): Nome do trecho -> lista de frases
+        """
+        for trecho in self.trechos:
+            if trecho["nome"] in textos:
+                trecho["texto"] = list(textos[trecho["nome"]])
+
+    def traducoes(self, idioma):
+        """
+        Args:
+            idioma (str): Código do idioma
+
+        Returns:
+            dict: Nome do trecho -> frases traduzidas (ou None se não traduzido)
+        """
+        return {t["nome"]: t["traducoes"].get(idioma) for t in self.trechos}
+
+    def definir_traducoes(self, idioma, traducoes):
+        """
+        Grava as traduções dos trechos em um idioma.
+
+        Args:
+            idioma (str): Código do idioma
+            traducoes (dict): Nome do trecho -> frases traduzidas
+        """
+        self._registrar_idioma(idioma)
+        for trecho in self.trechos:
+            if trecho["nome"] in traducoes:
+                trecho["traducoes"][idioma] = list(traducoes[trecho["nome"]])
+
+    def artefatos_tts(self, idioma):
+        """
+        Áudios dublados registrados de um idioma.
+
+        Args:
+            idioma (str): Código do idioma
+
+        Returns:
+            dict: Nome do trecho -> caminho absoluto do áudio, só para os que têm áudio
+        """
+        pasta = os.path.dirname(os.path.abspath(self.caminho))
+        return {t["nome"]: os.path.join(pasta, t["tts"][idioma]["arquivo"])
+                for t in self.trechos if t["tts"].get(idioma)}
+
+    def definir_tts(self, idioma, artefatos):
+        """
+        Registra os áudios dublados de um idioma, com o hash do conteúdo.
+
+        Args:
+            idioma (str): Código do idioma
+            artefatos (dict): Nome do trecho -> caminho do áudio, ou None se o
+                              trecho não tem frase válida para sintetizar
+        """
+        self._registrar_idioma(idioma)
+        pasta = os.path.dirname(os.path.abspath(self.caminho))
+        for trecho in self.trechos:
+            if trecho["nome"] not in artefatos:
+                continue
+            caminho = artefatos[trecho["nome"]]
+            trecho["tts"][idioma] = None if caminho is None else {
+                "arquivo": os.path.relpath(os.path.abspath(caminho), pasta),
+                "hash": _hash_arquivo(caminho),
+            }
+
+    def limpar_tts(self, idioma):
+        """
+        Remove os áudios dublados registrados de um idioma e seus registros,
+        antes de uma nova síntese.
+
+        Args:
+            idioma (str): Código do idioma
+        """
+        for caminho in self.artefatos_tts(idioma).values():
+            if os.path.exists(caminho):
+                os.remove(caminho)
+        for trecho in self.trechos:
+            trecho["tts"].pop(idioma, None)
+
+    def _registrar_idioma(self, idioma):
+        """
+        Inclui um idioma na lista de idiomas do manifesto.
+
+        Args:
+            idioma (str): Código do idioma
+        """
+        if idioma not in self.idiomas:
+            self.idiomas.append(idioma)
+
+    def _remover_artefatos(self, trechos, pasta_recortes):
+        """
+        Apaga o recorte exportado e os áudios dublados de trechos descartados.
+
+        Args:
+            trechos (list): Trechos descartados
+            pasta_recortes (str): Pasta aud_recort
+        """
+        pasta = os.path.dirname(os.path.abspath(self.caminho))
+        caminhos = [os.path.join(pasta_recortes, t["nome"]) for t in trechos]
+        caminhos += [os.path.join(pasta, artefato["arquivo"])
+                     for t in trechos for artefato in t["tts"].values() if artefato]
+        for caminho in caminhos:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    def recortes(self, idioma, pasta_recortes=None):
+        """
+        Recortes colados na linha do tempo do áudio final de um idioma.
+
+        Usa o áudio dublado quando existir; senão o recorte original, se foi
+        exportado (no modo em fluxo não é). Sem nenhum dos dois, o trecho da base
+        fica como está.
+
+        Args:
+            idioma (str): Código do idioma
+            pasta_recortes (str, optional): Pasta aud_recort dos recortes originais
+
+        Returns:
+            list: Dicionários {'start', 'end', 'file'} (ver man_vid.timeline)
+        """
+        dublados = self.artefatos_tts(idioma)
+        resultado = []
+        for trecho, intervalo in zip(self.trechos, self.intervalos()):
+            arquivo = dublados.get(trecho["nome"])
+            if arquivo is None and pasta_recortes is not None:
+                original = os.path.join(pasta_recortes, trecho["nome"])
+                arquivo = original if os.path.exists(original) else None
+            if arquivo is not None:
+                resultado.append({**intervalo, "file": arquivo})
+        return resultado
+
+    def secoes(self):
+        """
+        Calcula o hash de cada seção completa do manifesto.
+
+        Returns:
+            dict: Nome da seção -> hash SHA-256 em hexadecimal
+        """
+        secoes = {"intervalos": _hash_valor([self.audio.get("taxa"),
+                                             [[t["inicio"], t["fim"]] for t in self.trechos]])}
+        if all(t["texto"] is not None for t in self.trechos):
+            secoes["texto"] = _hash_valor([t["texto"] for t in self.trechos])
+        for idioma in self.idiomas:
+            if all(idioma in t["traducoes"] for t in self.trechos):
+                secoes[f"traducao:{idioma}"] = _hash_valor([t["traducoes"][idioma] for t in self.trechos])
+            if all(idioma in t["tts"] for t in self.trechos):
+                secoes[f"tts:{idioma}"] = _hash_valor(
+                    [(t["tts"][idioma] or {}).get("hash") for t in self.trechos])
+        return secoes
+
+    def salvar(self):
+        """
+        Grava o manifesto compacto de forma atômica.
+        """
+        dados = {"versao": VERSAO, "audio": self.audio, "idiomas": self.idiomas,
+                 "secoes": self.secoes(), "trechos": self.trechos}
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        tmp = f"{self.caminho}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.caminho)
+
+
+def _hash_valor(valor):
+    """
+    Hash de um valor serializável em JSON.
+
+    Args:
+        valor: Valor a resumir
+
+    Returns:
+        str: Hash SHA-256 em hexadecimal
+    """
+    conteudo = json.dumps(valor, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def _hash_arquivo(caminho):
+    """
+    Hash do conteúdo de um arquivo.
+
+    Args:
+        caminho (str): Caminho do arquivo
+
+    Returns:
+        str: Hash SHA-256 em hexadecimal
+    """
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
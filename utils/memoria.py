@@ -0,0 +1,59 @@
+"""
+Módulo de Limite de Memória do Áudio
+Este módulo fornece funcionalidades para dimensionar os blocos em que as etapas de
+áudio (recorte, base do ambiente e linha do tempo final) leem e escrevem o PCM, de
+modo que a memória usada por elas dependa de um teto configurável e não da duração
+do vídeo.
+
+O teto vale por buffer de áudio e é lido da variável de ambiente POLIGLOTA_MEMORIA_MB,
+herdada pelos processos de jobs.
+"""
+
+import os
+
+
+VARIAVEL_AMBIENTE = "POLIGLOTA_MEMORIA_MB"
+LIMITE_PADRAO_MB = 32
+
+# Um bloco nunca fica menor que isto, para não multiplicar chamadas de E/S
+QUADROS_MINIMOS = 4096
+
+
+def limite_memoria_mb():
+    """
+    Teto de memória de cada buffer de áudio.
+
+    Returns:
+        float: Limite em MB (POLIGLOTA_MEMORIA_MB ou LIMITE_PADRAO_MB)
+    """
+    try:
+        valor = float(os.getenv(VARIAVEL_AMBIENTE, LIMITE_PADRAO_MB))
+    except ValueError:
+        return float(LIMITE_PADRAO_MB)
+    return valor if valor > 0 else float(LIMITE_PADRAO_MB)
+
+
+def definir_limite_memoria(mb):
+    """
+    Define o teto no processo atual e nos processos criados a partir dele.
+
+    Args:
+        mb (float): Limite em MB
+    """
+    os.environ[VARIAVEL_AMBIENTE] = str(mb)
+
+
+def quadros_por_bloco(bytes_por_quadro, copias=1):
+    """
+    Quantos quadros de amostra cabem em um bloco dentro do teto.
+
+    Args:
+        bytes_por_quadro (int): Bytes de um quadro (canais x bytes por amostra)
+        copias (int): Buffers do mesmo tamanho vivos ao mesmo tempo (ex.: PCM
+                      lido, float32 e PCM convertido para escrita)
+
+    Returns:
+        int: Número de quadros por bloco, nunca menor que QUADROS_MINIMOS
+    """
+    limite_bytes = int(limite_memoria_mb() * 1024 * 1024)
+    return max(QUADROS_MINIMOS, limite_bytes // max(1, bytes_por_quadro * copias))
@@ -0,0 +1,42 @@
+"""
+Módulo de Registro de Módulos das Etapas
+Este módulo fornece um registro estático dos módulos usados pelas etapas do
+pipeline. Cada módulo é importado pelo nome do pacote só quando a etapa que o usa
+roda, e fica no cache normal de importação do Python (sys.modules), de modo que
+dependências pesadas (yt_dlp, pydub, vosk, numpy, requests) não atrasam a
+inicialização de comandos que não precisam delas.
+"""
+
+import importlib
+
+
+# Nome curto -> módulo do pacote
+REGISTRO = {
+    "download": "utils.download",
+    "intervals": "utils.intervals",
+    "servidor": "utils.servidor",
+    "man_aud": "man_aud.man_aud",
+    "transcribe": "man_aud.elabs.transcribe",
+    "traduct": "man_aud.elabs.traduct",
+    "labs": "man_aud.elabs.labs",
+    "json_form": "man_vid.json_form",
+    "timeline": "man_vid.timeline",
+    "separacao": "man_vid.separacao",
+    "mux": "man_vid.mux",
+}
+
+
+def carregar_modulo(nome):
+    """
+    Importa (uma vez por processo) o módulo registrado com o nome dado.
+
+    Args:
+        nome (str): Chave de REGISTRO
+
+    Returns:
+        module: Módulo importado
+
+    Raises:
+        KeyError: Se o nome não estiver registrado
+    """
+    return importlib.import_module(REGISTRO[nome])
@@ -0,0 +1,213 @@
+"""
+Módulo de Acesso Compartilhado a PCM
+Este módulo fornece funcionalidades para mapear em memória (mmap) o bloco de dados
+de um WAV PCM e descrever trechos dele como (deslocamento, tamanho), sem gravar
+arquivos por recorte nem copiar o áudio. Vários processos que mapeiam o mesmo
+arquivo compartilham as mesmas páginas do cache do sistema operacional.
+
+Também copia trechos de um WAV para outro em blocos de tamanho limitado (ver
+utils.memoria), sem carregar o arquivo inteiro.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import wave
+from collections import OrderedDict, namedtuple
+
+from utils.memoria import quadros_por_bloco
+
+
+# Descrição de um trecho: arquivo, deslocamento e tamanho em bytes, formato do PCM
+Segmento = namedtuple("Segmento", "caminho offset tamanho taxa canais largura")
+
+# Formato do bloco de dados de um WAV PCM
+InfoPCM = namedtuple("InfoPCM", "offset tamanho taxa canais largura")
+
+
+def ler_info_wav(caminho):
+    """
+    Localiza o bloco 'data' de um WAV PCM percorrendo os blocos RIFF.
+
+    Args:
+        caminho (str): Caminho do arquivo WAV
+
+    Returns:
+        InfoPCM: Deslocamento e tamanho dos dados e formato das amostras
+
+    Raises:
+        ValueError: Se o arquivo não for um WAV PCM válido
+    """
+    with open(caminho, "rb") as f:
+        cabecalho = f.read(12)
+        if len(cabecalho) < 12 or cabecalho[:4] != b"RIFF" or cabecalho[8:12] != b"WAVE":
+            raise ValueError(f"Arquivo não é WAV: {caminho}")
+
+        formato = None
+        while True:
+            bloco = f.read(8)
+            if len(bloco) < 8:
+                raise ValueError(f"Bloco 'data' não encontrado: {caminho}")
+            nome, tamanho = struct.unpack("<4sI", bloco)
+
+            if nome == b"fmt ":
+                dados = f.read(tamanho)
+                codigo, canais, taxa, _, _, bits = struct.unpack("<HHIIHH", dados[:16])
+                # 1 = PCM; 0xFFFE = WAVE_FORMAT_EXTENSIBLE (usado pelo ffmpeg em alguns casos)
+                if codigo not in (1, 0xFFFE):
+                    raise ValueError(f"WAV não é PCM inteiro: {caminho}")
+                formato = (taxa, canais, bits // 8)
+                f.seek(tamanho % 2, 1)
+            elif nome == b"data":
+                if formato is None:
+                    raise ValueError(f"Bloco 'fmt ' ausente: {caminho}")
+                offset = f.tell()
+                # ffmpeg grava tamanho 0xFFFFFFFF quando escreve em pipe; usa o fim do arquivo
+                f.seek(0, 2)
+                tamanho = min(tamanho, f.tell() - offset)
+                taxa, canais, largura = formato
+                return InfoPCM(offset, tamanho, taxa, canais, largura)
+            else:
+                f.seek(tamanho + tamanho % 2, 1)
+
+
+def segmentos_de_intervalos(caminho, intervalos):
+    """
+    Converte intervalos em segundos em trechos (deslocamento, tamanho) do WAV.
+
+    Args:
+        caminho (str): Caminho do WAV PCM
+        intervalos (list): Lista de dicionários {'start', 'end'} em segundos
+
+    Returns:
+        list: Lista de Segmento, alinhados a quadros de amostra
+    """
+    info = ler_info_wav(caminho)
+    bytes_quadro = info.canais * info.largura
+    total_quadros = info.tamanho // bytes_quadro
+
+    segmentos = []
+    for intervalo in intervalos:
+        inicio = min(total_quadros, max(0, int(intervalo["start"] * info.taxa)))
+        fim = min(total_quadros, max(inicio, int(intervalo["end"] * info.taxa)))
+        segmentos.append(Segmento(
+            caminho, info.offset + inicio * bytes_quadro, (fim - inicio) * bytes_quadro,
+            info.taxa, info.canais, info.largura,
+        ))
+    return segmentos
+
+
+def copiar_trecho_wav(origem, destino, inicio=0, quadros=None):
+    """
+    Copia quadros de um WAV PCM para um novo WAV com o mesmo formato, em blocos.
+
+    Args:
+        origem (str): WAV de entrada
+        destino (str): WAV de saída
+        inicio (int): Primeiro quadro copiado
+        quadros (int, optional): Quadros a copiar. Se None, até o fim da origem
+
+    Returns:
+        int: Quadros copiados
+    """
+    with wave.open(origem, "rb") as entrada, wave.open(destino, "wb") as saida:
+        saida.setparams(entrada.getparams())
+        largura_quadro = entrada.getnchannels() * entrada.getsampwidth()
+        total = entrada.getnframes()
+        inicio = min(max(0, inicio), total)
+        restantes = total - inicio if quadros is None else min(max(0, quadros), total - inicio)
+        entrada.setpos(inicio)
+
+        copiados = 0
+        tam_bloco = quadros_por_bloco(largura_quadro)
+        while copiados < restantes:
+            dados = entrada.readframes(min(tam_bloco, restantes - copiados))
+            if not dados:
+                break
+            saida.writeframes(dados)
+            copiados += len(dados) // largura_quadro
+    return copiados
+
+
+class PCMMapeado:
+    """
+    Arquivo mapeado em memória somente leitura, do qual são obtidas visões
+    (memoryview) de trechos sem cópia.
+
+    O mapeamento não é fechado explicitamente: fechar um mmap com visões ainda
+    exportadas levanta BufferError. Ele é desfeito quando o objeto e todas as
+    visões de trechos deixam de ser referenciados.
+    """
+
+    def __init__(self, caminho):
+        """
+        Args:
+            caminho (str): Caminho do arquivo a mapear
+        """
+        self.caminho = caminho
+        # O mmap duplica o descritor, então o arquivo já pode ser fechado
+        with open(caminho, "rb") as arquivo:
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self._visao = memoryview(self._mapa)
+
+    def trecho(self, segmento):
+        """
+        Retorna a visão dos bytes de um segmento, sem copiar.
+
+        Args:
+            segmento (Segmento): Trecho a ler
+
+        Returns:
+            memoryview: Bytes PCM do trecho
+        """
+        return self._visao[segmento.offset:segmento.offset + segmento.tamanho]
+
+
+# Mapeamentos abertos no processo, reutilizados entre segmentos do mesmo arquivo:
+# caminho -> ((inode, mtime, tamanho), PCMMapeado), do menos ao mais recente
+_MAPAS = OrderedDict()
+_MAPAS_LOCK = threading.Lock()
+# Workers de ASR atendem muitos jobs (lote e modo servidor): só os arquivos mais
+# recentes ficam mapeados, para não manter o espaço de endereços e o disco de
+# workspaces já apagados
+MAPAS_MAXIMOS = 4
+
+
+def obter_mapa(caminho):
+    """
+    Retorna o mapeamento do arquivo, abrindo-o na primeira chamada do processo.
+    Acima de MAPAS_MAXIMOS arquivos, o usado há mais tempo é esquecido (ver
+    liberar_mapa).
+
+    Args:
+        caminho (str): Caminho do arquivo
+
+    Returns:
+        PCMMapeado: Mapeamento reutilizável
+    """
+    info = os.stat(caminho)
+    versao = (info.st_ino, info.st_mtime_ns, info.st_size)
+    with _MAPAS_LOCK:
+        atual = _MAPAS.get(caminho)
+        # Se o arquivo foi regravado (ex.: nova extração), troca o mapeamento; o
+        # antigo é desfeito quando as visões ainda em uso forem liberadas
+        if atual is None or atual[0] != versao:
+            atual = (versao, PCMMapeado(caminho))
+            _MAPAS[caminho] = atual
+        _MAPAS.move_to_end(caminho)
+        while len(_MAPAS) > MAPAS_MAXIMOS:
+            _MAPAS.popitem(last=False)
+        return atual[1]
+
+
+def liberar_mapa(caminho):
+    """
+    Esquece o mapeamento de um arquivo, se estiver aberto. Ele é desfeito assim
+    que as visões de trechos ainda em uso forem liberadas.
+
+    Args:
+        caminho (str): Caminho do arquivo
+    """
+    with _MAPAS_LOCK:
+        _MAPAS.pop(caminho, None)
@@ -0,0 +1,285 @@
+"""
+Módulo de Rastreio e Perfil de Execução
+Este módulo fornece funcionalidades para medir trechos do pipeline (etapas, ffmpeg,
+Vosk, tradução, TTS): tempo de parede, tempo de CPU, bytes lidos e escritos e pico
+de memória residente. Os eventos podem ser exportados como JSON estruturado e no
+formato trace_event do Chrome (chrome://tracing ou ui.perfetto.dev).
+
+O rastreio fica desligado por padrão e é ligado pela variável de ambiente
+POLIGLOTA_PERFIL, herdada pelos processos de jobs e workers de ASR.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+VARIAVEL_AMBIENTE = "POLIGLOTA_PERFIL"
+
+# Eventos registrados no processo atual, ainda não exportados
+_EVENTOS = []
+_EVENTOS_LOCK = threading.Lock()
+
+
+def rastreio_ativo():
+    """
+    Indica se o rastreio está ligado.
+
+    Returns:
+        bool: True se POLIGLOTA_PERFIL estiver definida
+    """
+    return bool(os.getenv(VARIAVEL_AMBIENTE))
+
+
+def ativar_rastreio():
+    """
+    Liga o rastreio no processo atual e nos processos criados a partir dele.
+    """
+    os.environ[VARIAVEL_AMBIENTE] = "1"
+
+
+@contextmanager
+def rastrear(nome, categoria="etapa", **args):
+    """
+    Mede o bloco de código e registra um evento ao sair dele.
+    Sem rastreio ativo, não faz nada.
+
+    Args:
+        nome (str): Nome do evento (ex.: 'asr', 'ffmpeg')
+        categoria (str): Categoria (ex.: 'etapa', 'subprocesso', 'rede')
+        **args: Informações extras guardadas no evento (ex.: arquivo)
+    """
+    if not rastreio_ativo():
+        yield
+        return
+
+    inicio = _amostra()
+    erro = None
+    try:
+        yield
+    except BaseException as e:
+        erro = type(e).__name__
+        raise
+    finally:
+        fim = _amostra()
+        evento = _evento(nome, categoria, inicio, fim, args)
+        if erro:
+            evento["erro"] = erro
+        with _EVENTOS_LOCK:
+            _EVENTOS.append(evento)
+
+
+def drenar_eventos():
+    """
+    Retira e retorna os eventos registrados no processo atual.
+    Usado pelos workers para devolver seus eventos junto com o resultado.
+
+    Returns:
+        list: Eventos registrados desde a última drenagem
+    """
+    with _EVENTOS_LOCK:
+        eventos = list(_EVENTOS)
+        _EVENTOS.clear()
+    return eventos
+
+
+def incorporar_eventos(eventos):
+    """
+    Acrescenta eventos vindos de outro processo aos do processo atual.
+
+    Args:
+        eventos (list): Eventos devolvidos por drenar_eventos()
+    """
+    if eventos:
+        with _EVENTOS_LOCK:
+            _EVENTOS.extend(eventos)
+
+
+def exportar(pasta, prefixo="perfil"):
+    """
+    Grava os eventos pendentes em pasta/<prefixo>.json (eventos e resumo por nome)
+    e pasta/<prefixo>.trace.json (Chrome trace_event), e os descarta da memória.
+
+    Args:
+        pasta (str): Diretório de saída
+        prefixo (str): Nome base dos arquivos
+
+    Returns:
+        tuple: (caminho_json, caminho_trace)
+    """
+    eventos = sorted(drenar_eventos(), key=lambda e: e["inicio"])
+    os.makedirs(pasta, exist_ok=True)
+
+    caminho_json = os.path.join(pasta, f"{prefixo}.json")
+    with open(caminho_json, "w", encoding="utf-8") as f:
+        json.dump({"resumo": resumir(eventos), "eventos": eventos}, f, ensure_ascii=False, indent=2)
+
+    caminho_trace = os.path.join(pasta, f"{prefixo}.trace.json")
+    with open(caminho_trace, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": _para_chrome(eventos), "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+    return caminho_json, caminho_trace
+
+
+def resumir(eventos):
+    """
+    Soma as métricas dos eventos agrupando por categoria e nome.
+
+    Args:
+        eventos (list): Eventos registrados
+
+    Returns:
+        dict: "categoria/nome" -> totais (chamadas, parede_s, cpu_s, bytes, pico de RSS)
+    """
+    resumo = {}
+    for evento in eventos:
+        chave = f"{evento['categoria']}/{evento['nome']}"
+        total = resumo.setdefault(chave, {
+            "chamadas": 0, "parede_s": 0.0, "cpu_s": 0.0, "cpu_filhos_s": 0.0,
+            "bytes_lidos": 0, "bytes_escritos": 0, "rss_pico_kb": 0,
+        })
+        total["chamadas"] += 1
+        for campo in ("parede_s", "cpu_s", "cpu_filhos_s", "bytes_lidos", "bytes_escritos"):
+            total[campo] += evento.get(campo) or 0
+        total["rss_pico_kb"] = max(total["rss_pico_kb"], evento.get("rss_pico_kb") or 0)
+
+    for total in resumo.values():
+        for campo in ("parede_s", "cpu_s", "cpu_filhos_s"):
+            total[campo] = round(total[campo], 4)
+    return dict(sorted(resumo.items(), key=lambda item: -item[1]["parede_s"]))
+
+
+def _amostra():
+    """
+    Lê os contadores do processo no instante atual.
+
+    Returns:
+        dict: Relógios, CPU, E/S e memória
+    """
+    amostra = {
+        "relogio": time.time(),
+        "parede": time.perf_counter(),
+        "cpu": time.process_time(),
+        "cpu_filhos": None,
+        "rss_pico_kb": None,
+        "rss_pico_filhos_kb": None,
+    }
+    if resource is not None:
+        proprio = resource.getrusage(resource.RUSAGE_SELF)
+        filhos = resource.getrusage(resource.RUSAGE_CHILDREN)
+        amostra["cpu_filhos"] = filhos.ru_utime + filhos.ru_stime
+        amostra["rss_pico_kb"] = _rss_kb(proprio.ru_maxrss)
+        amostra["rss_pico_filhos_kb"] = _rss_kb(filhos.ru_maxrss)
+    amostra.update(_bytes_io())
+    return amostra
+
+
+def _evento(nome, categoria, inicio, fim, args):
+    """
+    Monta o evento a partir das amostras de início e fim.
+
+    As métricas de CPU e E/S são do processo inteiro: em blocos que rodam em
+    paralelo com outras threads, elas incluem o trabalho das demais.
+
+    Args:
+        nome (str): Nome do evento
+        categoria (str): Categoria do evento
+        inicio (dict): Amostra inicial
+        fim (dict): Amostra final
+        args (dict): Informações extras
+
+    Returns:
+        dict: Evento serializável em JSON
+    """
+    def delta(campo):
+        if inicio[campo] is None or fim[campo] is None:
+            return None
+        return fim[campo] - inicio[campo]
+
+    cpu_filhos = delta("cpu_filhos")
+    return {
+        "nome": nome,
+        "categoria": categoria,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "inicio": fim["relogio"] - (fim["parede"] - inicio["parede"]),
+        "parede_s": round(fim["parede"] - inicio["parede"], 6),
+        "cpu_s": round(fim["cpu"] - inicio["cpu"], 6),
+        "cpu_filhos_s": None if cpu_filhos is None else round(cpu_filhos, 6),
+        "bytes_lidos": delta("bytes_lidos"),
+        "bytes_escritos": delta("bytes_escritos"),
+        "rss_pico_kb": fim["rss_pico_kb"],
+        "rss_pico_filhos_kb": fim["rss_pico_filhos_kb"],
+        "args": {chave: str(valor) for chave, valor in args.items()},
+    }
+
+
+def _para_chrome(eventos):
+    """
+    Converte eventos para o formato trace_event (eventos completos 'X').
+
+    Args:
+        eventos (list): Eventos registrados
+
+    Returns:
+        list: Eventos no formato do Chrome
+    """
+    convertidos = []
+    for evento in eventos:
+        metricas = {chave: valor for chave, valor in evento.items()
+                    if chave not in ("nome", "categoria", "pid", "tid", "inicio", "args")}
+        convertidos.append({
+            "name": evento["nome"],
+            "cat": evento["categoria"],
+            "ph": "X",
+            "ts": round(evento["inicio"] * 1e6, 1),
+            "dur": round(evento["parede_s"] * 1e6, 1),
+            "pid": evento["pid"],
+            "tid": evento["tid"],
+            "args": {**evento["args"], **metricas},
+        })
+    return convertidos
+
+
+def _bytes_io():
+    """
+    Lê os bytes lidos e escritos pelo processo (Linux, /proc/self/io).
+
+    Returns:
+        dict: {'bytes_lidos', 'bytes_escritos'}, com None onde não disponível
+    """
+    valores = {"bytes_lidos": None, "bytes_escritos": None}
+    try:
+        with open("/proc/self/io", "r") as f:
+            for linha in f:
+                campo, _, valor = linha.partition(":")
+                if campo == "rchar":
+                    valores["bytes_lidos"] = int(valor)
+                elif campo == "wchar":
+                    valores["bytes_escritos"] = int(valor)
+    except OSError:
+        pass
+    return valores
+
+
+def _rss_kb(ru_maxrss):
+    """
+    Normaliza ru_maxrss para KiB (macOS informa em bytes, Linux em KiB).
+
+    Args:
+        ru_maxrss (int): Valor de getrusage
+
+    Returns:
+        int: Pico de memória residente em KiB
+    """
+    if sys.platform == "darwin":
+        return ru_maxrss // 1024
+    return ru_maxrss
@@ -0,0 +1,204 @@
+"""
+Módulo de Servidor Residente de Jobs
+Este módulo fornece um servidor HTTP local (TCP ou socket Unix) que recebe jobs e
+devolve o progresso em JSON por linha (NDJSON) enquanto o job roda. O processo
+continua vivo entre jobs, mantendo módulos importados, modelo Vosk, tradutor e
+sessão HTTP da TTS já carregados.
+
+Exemplos:
+    curl -N -d '{"url": "https://www.youtube.com/shorts/ID"}' http://127.0.0.1:8765/jobs
+    curl -N --unix-socket /tmp/poliglota.sock -d '{"url": "..."}' http://localhost/jobs
+    curl http://127.0.0.1:8765/saude
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Servidor HTTP em socket Unix, uma thread por conexão.
+    """
+
+    daemon_threads = True
+
+
+class _ManipuladorJobs(BaseHTTPRequestHandler):
+    """
+    Atende GET /saude e POST /jobs. O estado compartilhado fica em self.server.
+    """
+
+    protocol_version = "HTTP/1.0"
+
+    def do_GET(self):
+        """
+        Informa se o servidor está ativo e qual job está rodando.
+        """
+        if self.path.rstrip("/") != "/saude":
+            self._responder_json(404, {"erro": "rota não encontrada"})
+            return
+        estado = self.server.estado
+        self._responder_json(200, {
+            "status": "ok",
+            "pid": os.getpid(),
+            "ativo_desde": estado["inicio"],
+            "jobs_atendidos": estado["jobs_atendidos"],
+            "job_atual": estado["job_atual"],
+        })
+
+    def do_POST(self):
+        """
+        Recebe um job ({'url', 'forcar', 'etapas_separadas', 'audio_primeiro',
+        'codec_final', 'asr_unico', 'idiomas'}) e transmite o progresso. 'idiomas'
+        segue o formato de --idiomas ('en,es:VOICE_ID') ou é uma lista desses itens.
+        """
+        if self.path.rstrip("/") != "/jobs":
+            self._responder_json(404, {"erro": "rota não encontrada"})
+            return
+        try:
+            tamanho = int(self.headers.get("Content-Length", 0))
+            pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+            url = pedido["url"]
+        except (ValueError, KeyError, TypeError):
+            self._responder_json(400, {"erro": "corpo deve ser JSON com o campo 'url'"})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        estado = self.server.estado
+        self._enviar_evento({"evento": "fila", "url": url})
+        # Um job por vez: o pool de ASR e a cota da TTS são compartilhados
+        with estado["lock"]:
+            estado["job_atual"] = url
+            self._enviar_evento({"evento": "inicio", "url": url})
+            try:
+                resumo = self.server.executar_job(pedido, self._enviar_evento)
+            except Exception as e:
+                resumo = {"url": url, "status": "erro", "erro": f"{type(e).__name__}: {e}"}
+            finally:
+                estado["job_atual"] = None
+                estado["jobs_atendidos"] += 1
+        self._enviar_evento({"evento": "fim", "resumo": resumo})
+
+    def address_string(self):
+        """
+        Endereço do cliente usado nos logs.
+        """
+        # Em socket Unix o endereço do cliente é uma string vazia
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _enviar_evento(self, evento):
+        """
+        Envia uma linha de progresso. Se o cliente desconectou, o job continua.
+
+        Args:
+            evento (dict): Evento serializável em JSON
+        """
+        try:
+            self.wfile.write((json.dumps(evento, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        except OSError:
+            pass
+
+    def _responder_json(self, status, dados):
+        """
+        Envia uma resposta JSON completa.
+
+        Args:
+            status (int): Código HTTP
+            dados (dict): Corpo da resposta
+        """
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+def _remover_socket(caminho):
+    """
+    Remove um socket Unix deixado por uma execução anterior.
+
+    Args:
+        caminho (str): Caminho do socket
+
+    Raises:
+        FileExistsError: Se o caminho existe e não é um socket Unix
+    """
+    try:
+        modo = os.lstat(caminho).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(modo):
+        raise FileExistsError(f"{caminho} existe e não é um socket Unix; escolha outro caminho.")
+    os.remove(caminho)
+
+
+def criar_servidor(executar_job, host="127.0.0.1", porta=8765, socket_unix=None):
+    """
+    Cria o servidor de jobs, sem iniciar o atendimento.
+
+    Args:
+        executar_job (callable): Função (pedido, progresso) -> resumo, em que
+                                 pedido é o JSON recebido e progresso recebe
+                                 dicionários de evento
+        host (str): Endereço TCP (ignorado com socket_unix)
+        porta (int): Porta TCP (ignorada com socket_unix)
+        socket_unix (str, optional): Caminho do socket Unix. Se informado, usa-o em vez de TCP
+
+    Returns:
+        socketserver.BaseServer: Servidor pronto para serve_forever()
+
+    Raises:
+        FileExistsError: Se socket_unix aponta para algo que não é um socket Unix
+    """
+    if socket_unix:
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Socket Unix não suportado nesta plataforma; use host/porta.")
+        _remover_socket(socket_unix)
+        servidor = _ServidorUnix(socket_unix, _ManipuladorJobs)
+    else:
+        servidor = ThreadingHTTPServer((host, porta), _ManipuladorJobs)
+        servidor.daemon_threads = True
+
+    servidor.executar_job = executar_job
+    servidor.estado = {
+        "lock": threading.Lock(),
+        "inicio": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "jobs_atendidos": 0,
+        "job_atual": None,
+    }
+    return servidor
+
+
+def servir(executar_job, host="127.0.0.1", porta=8765, socket_unix=None):
+    """
+    Atende jobs até Ctrl+C.
+
+    Args:
+        executar_job (callable): Ver criar_servidor
+        host (str): Endereço TCP
+        porta (int): Porta TCP
+        socket_unix (str, optional): Caminho do socket Unix
+    """
+    servidor = criar_servidor(executar_job, host, porta, socket_unix)
+    endereco = socket_unix or f"http://{host}:{porta}"
+    print(f"Servidor de jobs ouvindo em {endereco} (Ctrl+C para sair)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("Encerrando servidor...")
+    finally:
+        servidor.server_close()
+        if socket_unix:
+            _remover_socket(socket_unix)